@@ -62,6 +62,8 @@ INSTALLED_APPS = [
 
 
 MIDDLEWARE = [
+    'entrenamiento.instrumentation.PerformanceMiddleware',  # Solo activa con PERFORMANCE_INSTRUMENTATION
+    'entrenamiento.slowlog.SlowQueryMiddleware',  # Solo activa con SLOW_QUERY_LOG
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -180,12 +182,16 @@ AWS_DEFAULT_ACL = 'public-read'  # Hace los archivos públicos por default (coin
 AWS_S3_OBJECT_PARAMETERS = {'CacheControl': 'max-age=86400'}  # Caché para optimización
 AWS_S3_FILE_OVERWRITE = False  # Evita sobrescribir archivos existentes
 AWS_S3_REGION_NAME = 'us-east-005'
+AWS_S3_MAX_POOL_CONNECTIONS = 50  # Conexiones HTTP keep-alive compartidas por proceso (subidas multipart en paralelo)
+VIDEO_UPLOAD_PART_SIZE = 5 * 1024 * 1024  # Tamaño de cada parte multipart (mínimo de S3/B2: 5 MB salvo la última)
+VIDEO_UPLOAD_CONCURRENCY = 4  # Partes que el navegador sube en paralelo
+UPLOAD_SESSION_TTL_HOURS = 24  # Subidas sin actividad por más tiempo no se reanudan; purge_upload_sessions las aborta
 
 
 # Usa B2 como almacenamiento predeterminado para media (videos)
 STORAGES = {
     "default": {
-        "BACKEND": "storages.backends.s3boto3.S3Boto3Storage",
+        "BACKEND": "entrenamiento.storage.SharedS3Storage",  # S3Boto3Storage con el cliente y pool compartidos (ver entrenamiento/storage.py)
         "OPTIONS": {
             # Opcionalmente, puedes mover aquí configuraciones específicas si quieres personalizar.
         },
@@ -204,4 +210,47 @@ EMAIL_USE_TLS = True
 EMAIL_USE_SSL = False
 EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD')
-DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
\ No newline at end of file
+DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
+
+# Máximo de puntos por serie en los gráficos de progreso (progress_view reduce historiales largos con LTTB)
+PROGRESS_CHART_MAX_POINTS = 120
+
+# Caché compartida (analíticas de dashboards). En producción con varios procesos usar un backend compartido:
+# 'django.core.cache.backends.redis.RedisCache' o 'django.core.cache.backends.filebased.FileBasedCache'.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'flame-cache'),
+    }
+}
+ANALYTICS_CACHE_TTL = 600  # Segundos; las señales invalidan antes si cambian los datos
+CACHE_VERSION_LOCAL_TTL = 60  # Con LocMemCache, cuánto dura la versión de caché de cada worker (ver cache_versions.py)
+
+# Cola de tareas en BD (entrenamiento/tasks.py, worker: python manage.py run_tasks)
+TASK_RETRY_BASE_SECONDS = 30  # Backoff exponencial: 30s, 60s, 120s... con tope TASK_RETRY_MAX_SECONDS
+TASK_RETRY_MAX_SECONDS = 3600
+TASK_LOCK_TIMEOUT_SECONDS = 600  # Tareas 'running' más viejas que esto se consideran de un worker caído
+TASK_HEARTBEAT_SECONDS = 120  # Cada cuánto renueva locked_at el worker mientras corre una tarea (< TASK_LOCK_TIMEOUT_SECONDS)
+
+# Procesamiento de videos en el worker (entrenamiento/video.py): rutas a los binarios locales
+FFMPEG_BINARY = os.getenv('FFMPEG_BINARY', 'ffmpeg')
+FFPROBE_BINARY = os.getenv('FFPROBE_BINARY', 'ffprobe')
+FFMPEG_TIMEOUT_SECONDS = 15 * 60  # Por llamada; el latido de la cola (TASK_HEARTBEAT_SECONDS) mantiene el lock mientras tanto
+
+# Bandeja de salida (entrenamiento/outbox.py, envío: python manage.py send_outbox --loop)
+OUTBOX_BATCH_SIZE = 50  # Mensajes por conexión SMTP
+OUTBOX_THROTTLE_SECONDS = 0.5  # Pausa entre mensajes para respetar el límite de tasa del proveedor
+
+# Instrumentación por request (entrenamiento/instrumentation.py): header Server-Timing y percentiles por vista en
+# /admin/performance/. Desactivada por defecto; PERFORMANCE_INSTRUMENTATION=1 en el entorno la activa.
+PERFORMANCE_INSTRUMENTATION = os.getenv('PERFORMANCE_INSTRUMENTATION') == '1'
+PERFORMANCE_WINDOW_SECONDS = 900  # Ventana móvil de muestras
+PERFORMANCE_MAX_SAMPLES = 500  # Muestras por vista y proceso
+PERFORMANCE_N_PLUS_ONE_THRESHOLD = 5  # Repeticiones de una misma query en un request a partir de las que se avisa en el log
+
+# Registro de queries lentas (entrenamiento/slowlog.py): admin de SlowQuery y `python manage.py slow_queries`.
+# También lo usan los comandos weekly_reports, export_logs, backfill_records y rebuild_progress.
+SLOW_QUERY_LOG = os.getenv('SLOW_QUERY_LOG') == '1'
+SLOW_QUERY_THRESHOLD_MS = 200  # Queries que tarden esto o más se registran
+SLOW_QUERY_EXPLAIN = True  # EXPLAIN en la primera aparición de cada huella (solo SELECT)
+SLOW_QUERY_MAX_ROWS = 5000  # Buffer circular: se conservan las últimas N filas
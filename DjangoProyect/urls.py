@@ -17,6 +17,7 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 from core.views import inicio,login_view, CustomPasswordChangeView
+from entrenamiento.views import performance_dashboard
 from django.contrib.auth.views import PasswordChangeDoneView
 from django.contrib.auth import views as auth_views
 from django.views.generic import TemplateView
@@ -25,6 +26,7 @@ from django.conf.urls.static import static
 from django.contrib.auth.decorators import login_required
 
 urlpatterns = [
+    path('admin/performance/', performance_dashboard, name='performance_dashboard'),
     path('admin/', admin.site.urls),
     path('', inicio , name="inicio"),
     path('login/', login_view, name='login'),
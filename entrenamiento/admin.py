@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import TrainingPlan, Workout, WorkoutExercise,ExerciseLog
+from .models import TrainingPlan, Workout, WorkoutExercise,ExerciseLog, Task, UploadSession, Outbox, PlanTemplate, TemplateWorkout, TemplateExercise, PersonalRecord, SlowQuery
 
 
 class trainingPlanAdmin(admin.ModelAdmin):
@@ -18,10 +18,83 @@ class exerciseLogAdmin(admin.ModelAdmin):
     pass
 
 
+class templateWorkoutInline(admin.TabularInline):
+    model = TemplateWorkout
+    extra = 0
+    show_change_link = True
+
+
+class planTemplateAdmin(admin.ModelAdmin):
+    list_display = ('name', 'trainer', 'progression', 'progression_step', 'deload_every', 'created_at')
+    list_filter = ('progression',)
+    search_fields = ('name',)
+    inlines = [templateWorkoutInline]
+
+
+class templateExerciseInline(admin.TabularInline):
+    model = TemplateExercise
+    extra = 0
+
+
+class templateWorkoutAdmin(admin.ModelAdmin):
+    list_display = ('title', 'template', 'week_number', 'day_of_week')
+    inlines = [templateExerciseInline]
+
+
+class personalRecordAdmin(admin.ModelAdmin):
+    list_display = ('client', 'exercise', 'record_type', 'reps', 'value', 'achieved_at')
+    list_filter = ('record_type',)
+    search_fields = ('client__username', 'exercise__name')
+    raw_id_fields = ('log',)
+
+
+class taskAdmin(admin.ModelAdmin):
+    list_display = ('name', 'status', 'attempts', 'run_at', 'locked_by', 'created_at', 'finished_at')
+    list_filter = ('status', 'name')
+    search_fields = ('idempotency_key',)
+
+
+class uploadSessionAdmin(admin.ModelAdmin):
+    list_display = ('file_name', 'user', 'status', 'file_size', 'created_at', 'updated_at')
+    list_filter = ('status',)
+    search_fields = ('key', 'file_name')
+
+
+class outboxAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at')
+    list_filter = ('status',)
+    search_fields = ('subject',)
+    # El cuerpo puede llevar credenciales (contraseña temporal de create_client): no se muestra.
+    exclude = ('body', 'alternatives', 'attachments')
+
+
+class slowQueryAdmin(admin.ModelAdmin):
+    # Registro de solo lectura (lo escribe slowlog.py); las más lentas primero.
+    list_display = ('created_at', 'duration_ms', 'origin', 'short_sql', 'fingerprint')
+    list_filter = ('origin',)
+    search_fields = ('sql', 'fingerprint')
+    ordering = ('-duration_ms',)
+    readonly_fields = ('fingerprint', 'sql', 'params', 'duration_ms', 'origin', 'stack', 'explain', 'created_at')
+
+    @admin.display(description='SQL')
+    def short_sql(self, obj):
+        return obj.sql[:120]
+
+    def has_add_permission(self, request):
+        return False
+
+
 
 admin.site.register(TrainingPlan, trainingPlanAdmin)
 admin.site.register(Workout, workoutAdmin)
 admin.site.register(WorkoutExercise, workoutExerciseAdmin)
 admin.site.register(ExerciseLog, exerciseLogAdmin)
+admin.site.register(PlanTemplate, planTemplateAdmin)
+admin.site.register(TemplateWorkout, templateWorkoutAdmin)
+admin.site.register(PersonalRecord, personalRecordAdmin)
+admin.site.register(Task, taskAdmin)
+admin.site.register(UploadSession, uploadSessionAdmin)
+admin.site.register(Outbox, outboxAdmin)
+admin.site.register(SlowQuery, slowQueryAdmin)
 admin.site.site_header = "Administración de FitnessPro"
 admin.site.site_title = "FitnessPro Admin"  
\ No newline at end of file
@@ -0,0 +1,121 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Sum
+from django.utils import timezone
+from datetime import timedelta
+
+from .cache_versions import versioned_namespace
+from .completion import completion_summary
+from .models import ExerciseLog, TrainingPlan, Workout, WorkoutExercise
+
+# ====================================================================================================================
+# Caché de Analíticas por Usuario
+# ====================================================================================================================
+# client_dashboard y trainer_dashboard recalculaban consistencia, sesiones semanales, ejercicios completados, etc. en cada
+# request. Aquí esas métricas se guardan en el cache framework de Django (locmem, file o Redis según settings.CACHES).
+#
+# Versionado: cada usuario tiene una clave 'analytics:version:<id>' que forma parte de la clave de datos (ver
+# cache_versions.py). Las señales de ExerciseLog/Workout/WorkoutExercise/TrainingPlan la incrementan al confirmar.
+#
+# Estampida: tras una invalidación, solo el request que consigue el lock (cache.add, atómico en los backends compartidos)
+# recalcula; los demás esperan brevemente a que aparezca el valor en lugar de recalcular todos a la vez.
+# ====================================================================================================================
+
+ANALYTICS_TTL = getattr(settings, 'ANALYTICS_CACHE_TTL', 600)
+LOCK_TIMEOUT = 30
+LOCK_WAIT = 5.0
+LOCK_POLL = 0.05
+
+
+ANALYTICS_VERSIONS = versioned_namespace('analytics')
+
+
+def analytics_version(user_id):
+    return ANALYTICS_VERSIONS.version(user_id)
+
+
+def invalidate_user(user_id):
+    ANALYTICS_VERSIONS.invalidate(user_id)
+
+
+def invalidate_users_on_commit(*user_ids):
+    for user_id in {uid for uid in user_ids if uid}:
+        ANALYTICS_VERSIONS.invalidate_on_commit(user_id)
+
+
+def get_or_compute(key, compute, ttl=ANALYTICS_TTL):
+    value = cache.get(key)
+    if value is not None:
+        return value
+
+    lock_key = f'{key}:lock'
+    if cache.add(lock_key, 1, LOCK_TIMEOUT):
+        try:
+            value = compute()
+            cache.set(key, value, ttl)
+        finally:
+            cache.delete(lock_key)
+        return value
+
+    deadline = time.monotonic() + LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL)
+        value = cache.get(key)
+        if value is not None:
+            return value
+    # El request que tenía el lock tardó demasiado o falló: se calcula sin guardar para no bloquear al usuario.
+    return compute()
+
+
+def _cached(kind, user_id, compute):
+    # La fecha es parte de la clave porque las métricas "próximos 7 días" cambian a medianoche aunque no haya escrituras.
+    today = timezone.now().date().isoformat()
+    key = f'analytics:{kind}:{user_id}:v{analytics_version(user_id)}:{today}'
+    return get_or_compute(key, compute)
+
+
+def _compute_client_metrics(user):
+    today = timezone.now().date()
+    plans = TrainingPlan.objects.filter(client=user)
+    upcoming_sessions = list(Workout.objects.filter(
+        plan__in=plans,
+        date__gte=today
+    ).exclude(date__isnull=True).select_related('plan').order_by('date')[:5])
+    summary = completion_summary(Workout.objects.filter(plan__in=plans))
+    return {
+        'active_plans_count': plans.filter(status='active').count(),
+        'weekly_sessions': Workout.objects.filter(
+            plan__in=plans,
+            date__range=[today, today + timedelta(days=7)]
+        ).exclude(date__isnull=True).count(),
+        'completed_exercises': ExerciseLog.objects.filter(client=user, status='completed').count(),
+        'upcoming_sessions': upcoming_sessions,
+        'next_session': upcoming_sessions[0] if upcoming_sessions else None,
+        'total_workouts': summary['total'],
+        'total_exercises': WorkoutExercise.objects.filter(workout__plan__in=plans).count(),
+        'consistency': summary['consistency'],
+    }
+
+
+def _compute_trainer_metrics(user):
+    today = timezone.now().date()
+    plans = TrainingPlan.objects.filter(trainer=user)
+    return {
+        'active_plans_count': plans.filter(status='active').count(),
+        'weekly_sessions': Workout.objects.filter(
+            plan__in=plans,
+            date__range=[today, today + timedelta(days=7)]
+        ).exclude(date__isnull=True).count(),
+        # Suma de los contadores desnormalizados de cada plan (ver counters.py) en lugar de contar WorkoutExercise.
+        'exercises_count': plans.aggregate(total=Sum('exercise_count'))['total'] or 0,
+    }
+
+
+def client_metrics(user):
+    return _cached('client', user.pk, lambda: _compute_client_metrics(user))
+
+
+def trainer_metrics(user):
+    return _cached('trainer', user.pk, lambda: _compute_trainer_metrics(user))
@@ -0,0 +1,62 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+
+# ====================================================================================================================
+# Versiones de Caché (invalidación por espacio de nombres)
+# ====================================================================================================================
+# analytics.py (por usuario), catalog.py y warmups.py invalidan igual: una clave '<nombre>:version[:<ámbito>]' forma
+# parte de las claves de datos, e invalidar es incrementarla. Las entradas viejas quedan huérfanas y expiran por TTL, sin
+# tener que conocer todas las claves a borrar.
+#   - La versión inicial sale del reloj (time.time_ns), no de 1: si la clave se desaloja, el valor nuevo nunca coincide
+#     con una versión anterior cuyas entradas de datos (o copias en memoria de algún proceso) podrían seguir vivas.
+#   - cache.add para crearla: si dos requests la inicializan a la vez, gana uno y ambos leen el mismo valor.
+#   - Se invalida al confirmar la transacción (invalidate_on_commit): si se hiciera antes, un request concurrente podría
+#     recalcular con datos aún sin confirmar y guardarlos bajo la versión nueva.
+#   - Todo supone una caché compartida (Redis, archivos). Con LocMemCache (el valor por defecto de settings) cada worker
+#     tiene su propia versión y nunca ve lo que incrementa otro: ahí la versión caduca a los CACHE_VERSION_LOCAL_TTL
+#     segundos y renace desde el reloj, así ningún proceso sirve datos viejos por más tiempo. checks.py lo avisa en
+#     `check --deploy`.
+# ====================================================================================================================
+
+
+def process_local_cache():
+    # La caché por defecto solo la ve este proceso: las versiones no se propagan entre workers.
+    return isinstance(caches['default'], LocMemCache)
+
+
+def _version_timeout():
+    return getattr(settings, 'CACHE_VERSION_LOCAL_TTL', 60) if process_local_cache() else None
+
+
+class VersionedNamespace:
+    def __init__(self, name):
+        self.name = name
+
+    def key(self, *scope):
+        return ':'.join([self.name, 'version', *map(str, scope)])
+
+    def version(self, *scope):
+        key = self.key(*scope)
+        version = cache.get(key)
+        if version is None:
+            cache.add(key, time.time_ns(), _version_timeout())
+            version = cache.get(key)
+        return version
+
+    def invalidate(self, *scope):
+        try:
+            cache.incr(self.key(*scope))
+        except ValueError:
+            # La versión no existía (o fue desalojada): cualquier valor nuevo invalida lo que hubiera.
+            cache.set(self.key(*scope), time.time_ns(), _version_timeout())
+
+    def invalidate_on_commit(self, *scope):
+        transaction.on_commit(lambda: self.invalidate(*scope))
+
+
+def versioned_namespace(name):
+    return VersionedNamespace(name)
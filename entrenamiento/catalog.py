@@ -0,0 +1,133 @@
+import hashlib
+import json
+
+from django import forms
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.urls import reverse
+
+from .analytics import get_or_compute
+from .cache_versions import versioned_namespace
+from .models import Exercise
+
+# ====================================================================================================================
+# Catálogo de Ejercicios: Autocompletado
+# ====================================================================================================================
+# WorkoutExerciseForm declaraba ModelChoiceField(queryset=Exercise.objects.all()): cada render de add_exercise y
+# edit_workout_exercise cargaba y serializaba toda la biblioteca en un <select>, y el editor lo repetía por fila. Ahora el
+# campo es un input de búsqueda que consulta exercise_autocomplete y envía solo el id elegido:
+#   - Búsqueda por prefijo del nombre (name__istartswith → LIKE 'pre%', que usa el índice único de name) con filtros
+#     opcionales por grupo muscular y equipamiento (índices compuestos (muscle_group, name) y (equipment, name)).
+#   - Resultados limitados (AUTOCOMPLETE_LIMIT) y guardados en caché. La clave incluye la versión del catálogo
+#     (cache_versions.py) que las señales de Exercise incrementan al confirmar (crear en create_exercise, editar o borrar
+#     en el admin): las entradas viejas quedan huérfanas y expiran por TTL.
+#   - Renderizar el formulario solo necesita el nombre del ejercicio ya elegido; validar es una búsqueda por pk.
+# ====================================================================================================================
+
+AUTOCOMPLETE_LIMIT = 20
+CATALOG_TTL = getattr(settings, 'CATALOG_CACHE_TTL', 3600)
+
+
+CATALOG_VERSIONS = versioned_namespace('catalog')
+
+
+def catalog_version():
+    return CATALOG_VERSIONS.version()
+
+
+def invalidate_catalog():
+    CATALOG_VERSIONS.invalidate()
+
+
+def invalidate_catalog_on_commit():
+    CATALOG_VERSIONS.invalidate_on_commit()
+
+
+def _cache_key(kind, *params):
+    digest = hashlib.md5(json.dumps(params).encode()).hexdigest()
+    return f'catalog:{kind}:v{catalog_version()}:{digest}'
+
+
+def search_exercises(query='', muscle_group='', equipment='', limit=AUTOCOMPLETE_LIMIT):
+    # Ejercicios cuyo nombre empieza por `query` (sin distinguir mayúsculas), ordenados por nombre: lista de dicts.
+    query, limit = query.strip(), max(1, min(limit, AUTOCOMPLETE_LIMIT))
+
+    def compute():
+        exercises = Exercise.objects.all()
+        if query:
+            exercises = exercises.filter(name__istartswith=query)
+        if muscle_group:
+            exercises = exercises.filter(muscle_group=muscle_group)
+        if equipment:
+            exercises = exercises.filter(equipment=equipment)
+        return list(exercises.order_by('name').values('id', 'name', 'muscle_group', 'equipment')[:limit])
+
+    return get_or_compute(_cache_key('search', query.lower(), muscle_group, equipment, limit), compute, CATALOG_TTL)
+
+
+def catalog_facets():
+    # Valores distintos de grupo muscular y equipamiento para los filtros del buscador.
+    def compute():
+        return {
+            field: list(
+                Exercise.objects.exclude(**{field: ''}).order_by(field).values_list(field, flat=True).distinct()
+            )
+            for field in ('muscle_group', 'equipment')
+        }
+
+    return get_or_compute(_cache_key('facets'), compute, CATALOG_TTL)
+
+
+class ExerciseAutocompleteWidget(forms.Widget):
+    # Input de texto para buscar + input oculto con el id elegido (lo único que se envía). filters=False omite los
+    # selectores de grupo muscular/equipamiento (p. ej. en las filas del editor).
+    template_name = 'entrenador/widgets/exercise_autocomplete.html'
+
+    class Media:
+        js = ('entrenamiento/exercise_autocomplete.js',)
+
+    def __init__(self, attrs=None, filters=True, exercises=None):
+        super().__init__(attrs)
+        self.filters = filters
+        self.exercises = exercises
+
+    def label_for(self, value):
+        if value in (None, ''):
+            return ''
+        try:
+            pk = int(value)
+        except (TypeError, ValueError):
+            return ''
+        if self.exercises is not None and pk in self.exercises:
+            return self.exercises[pk].name
+        return Exercise.objects.filter(pk=pk).values_list('name', flat=True).first() or ''
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        context['widget'].update({
+            'url': reverse('exercise_autocomplete'),
+            'label': self.label_for(context['widget']['value']),
+            'facets': catalog_facets() if self.filters else None,
+        })
+        return context
+
+
+class ExerciseChoiceField(forms.ModelChoiceField):
+    # ModelChoiceField que nunca recorre el queryset (no hay <select>). `exercises` ({pk: Exercise}) permite validar y
+    # etiquetar con ejercicios ya cargados, p. ej. todos los de un formset en una sola query.
+    widget = ExerciseAutocompleteWidget
+
+    def __init__(self, exercises=None, **kwargs):
+        kwargs.setdefault('queryset', Exercise.objects.all())
+        super().__init__(**kwargs)
+        self.exercises = exercises
+        if exercises is not None:
+            self.widget.exercises = exercises
+
+    def to_python(self, value):
+        if self.exercises is None or value in self.empty_values:
+            return super().to_python(value)
+        try:
+            return self.exercises[int(value)]
+        except (KeyError, TypeError, ValueError):
+            raise ValidationError(self.error_messages['invalid_choice'], code='invalid_choice')
@@ -0,0 +1,21 @@
+from django.core.checks import Tags, Warning, register
+
+from .cache_versions import process_local_cache
+
+# ====================================================================================================================
+# Chequeos de Despliegue
+# ====================================================================================================================
+# Las versiones de caché (cache_versions.py) solo se propagan entre workers con una caché compartida. Con LocMemCache cada
+# proceso invalida únicamente su propia copia: los demás sirven datos viejos hasta que caduca su versión.
+# ====================================================================================================================
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    if not process_local_cache():
+        return []
+    return [Warning(
+        'La caché por defecto es LocMemCache: las invalidaciones de un worker no llegan a los demás.',
+        hint='Con más de un worker configura CACHE_BACKEND (RedisCache o FileBasedCache, ver settings.CACHES).',
+        id='entrenamiento.W001',
+    )]
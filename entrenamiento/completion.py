@@ -0,0 +1,70 @@
+from django.db.models import Case, Count, Exists, F, IntegerField, OuterRef, Q, Subquery, Value, When, Prefetch
+from django.db.models.functions import Coalesce
+
+from .models import ExerciseLog, WorkoutExercise
+
+# ====================================================================================================================
+# Motor de Completitud de Workouts
+# ====================================================================================================================
+# Calcula el estado (completed / partial / pending) de un conjunto completo de workouts en una sola consulta agregada.
+# Antes, cada vista recorría los workouts y lanzaba un exercises.count() más un conteo de logs por workout (o un .exists()
+# por ejercicio en Workout.is_complete()), lo que con planes de 12 semanas significaba cientos de queries por página.
+#
+# Por qué subqueries y no joins: un Count sobre exercises__exerciselog multiplica filas (un ejercicio con 5 logs cuenta 5 veces).
+# Con Exists por ejercicio y un Count correlacionado por workout, cada ejercicio cuenta una sola vez y la consulta sigue siendo O(1).
+#
+# Estados:
+#   - completed: todos los ejercicios tienen al menos un log con status 'completed'.
+#   - partial:   al menos un ejercicio tiene algún log.
+#   - pending:   ningún ejercicio registrado (o workout sin ejercicios).
+# ====================================================================================================================
+
+STATUS_COMPLETED = 'completed'
+STATUS_PARTIAL = 'partial'
+STATUS_PENDING = 'pending'
+
+
+def _count_subquery(queryset):
+    # order_by() vacío: el Meta.ordering de WorkoutExercise se colaría en el GROUP BY y rompería el conteo.
+    counted = queryset.order_by().values('workout').annotate(n=Count('pk')).values('n')[:1]
+    return Coalesce(Subquery(counted, output_field=IntegerField()), 0)
+
+
+def annotate_completion(workouts):
+    logs = ExerciseLog.objects.filter(workout_exercise=OuterRef('pk'))
+    exercises = WorkoutExercise.objects.filter(workout=OuterRef('pk'))
+    return workouts.annotate(
+        exercise_total=_count_subquery(exercises),
+        exercise_logged=_count_subquery(exercises.filter(Exists(logs))),
+        exercise_completed=_count_subquery(exercises.filter(Exists(logs.filter(status='completed')))),
+    ).annotate(
+        completion_status=Case(
+            When(exercise_total__gt=0, exercise_completed=F('exercise_total'), then=Value(STATUS_COMPLETED)),
+            When(exercise_logged__gt=0, then=Value(STATUS_PARTIAL)),
+            default=Value(STATUS_PENDING),
+        )
+    )
+
+
+# Resumen de un queryset de workouts en una única consulta. 'logged' cuenta los workouts con todos sus ejercicios
+# registrados en cualquier estado (la misma regla que Workout.is_complete()).
+def completion_summary(workouts):
+    summary = annotate_completion(workouts.order_by()).aggregate(
+        total=Count('pk'),
+        completed=Count('pk', filter=Q(completion_status=STATUS_COMPLETED)),
+        partial=Count('pk', filter=Q(completion_status=STATUS_PARTIAL)),
+        pending=Count('pk', filter=Q(completion_status=STATUS_PENDING)),
+        logged=Count('pk', filter=Q(exercise_total__gt=0, exercise_logged=F('exercise_total'))),
+    )
+    summary['consistency'] = round(summary['completed'] / summary['total'] * 100, 2) if summary['total'] > 0 else 0
+    return summary
+
+
+# Prefetch de los ejercicios de cada workout con el ejercicio del catálogo y el id de su último log ya resueltos,
+# para que las plantillas no disparen una query por fila con get_last_log.
+def prefetch_exercises():
+    last_log = ExerciseLog.objects.filter(workout_exercise=OuterRef('pk')).order_by('-date_completed', '-pk')
+    queryset = WorkoutExercise.objects.select_related('exercise').annotate(
+        last_log_id=Subquery(last_log.values('pk')[:1])
+    ).order_by('order')
+    return Prefetch('exercises', queryset=queryset)
@@ -0,0 +1,110 @@
+from django.db import transaction
+from django.db.models import F, Max, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from .completion import annotate_completion
+from .models import ExerciseLog, TrainingPlan, Workout
+
+# ====================================================================================================================
+# Contadores de Progreso Desnormalizados
+# ====================================================================================================================
+# Workout y TrainingPlan guardan exercise_count, logged_count, completed_count y last_log_at para que las páginas del plan
+# lean el progreso de una sola fila en vez de contar WorkoutExercise/ExerciseLog en cada carga.
+#
+# Cómo se mantienen: cada alta/edición/baja de ExerciseLog o WorkoutExercise recalcula solo el workout afectado (pocas filas,
+# una query agregada) y aplica la diferencia contra lo guardado al plan con F(). Recalcular el workout es idempotente; en los
+# borrados en cascada las señales lo hacen una vez por workout, y al borrar workouts enteros el plan se suma de nuevo.
+# Todo ocurre dentro de la transacción del save/delete que originó el cambio.
+# ====================================================================================================================
+
+COUNTER_FIELDS = ('exercise_count', 'logged_count', 'completed_count')
+
+
+def _last_log_subquery():
+    last_log = ExerciseLog.objects.filter(workout_exercise__workout=OuterRef('pk')).order_by('-date_completed')
+    return Subquery(last_log.values('date_completed')[:1])
+
+
+def computed_workout_progress(workouts):
+    # Valores "reales" de los contadores, calculados desde las tablas de ejercicios y logs.
+    return annotate_completion(workouts).annotate(fresh_last_log_at=_last_log_subquery()).values(
+        'pk', 'plan_id', 'exercise_total', 'exercise_logged', 'exercise_completed', 'fresh_last_log_at',
+        *COUNTER_FIELDS, 'last_log_at',
+    )
+
+
+def _fresh_values(row):
+    return {
+        'exercise_count': row['exercise_total'],
+        'logged_count': row['exercise_logged'],
+        'completed_count': row['exercise_completed'],
+        'last_log_at': row['fresh_last_log_at'],
+    }
+
+
+def refresh_workout_progress(workout_id):
+    with transaction.atomic():
+        # Bloquea la fila del workout para serializar actualizaciones concurrentes del mismo entrenamiento.
+        if not Workout.objects.select_for_update().filter(pk=workout_id).exists():
+            return
+        row = computed_workout_progress(Workout.objects.filter(pk=workout_id)).get()
+        fresh = _fresh_values(row)
+        deltas = {field: fresh[field] - row[field] for field in COUNTER_FIELDS}
+        if not any(deltas.values()) and fresh['last_log_at'] == row['last_log_at']:
+            return
+
+        Workout.objects.filter(pk=workout_id).update(**fresh)
+
+        plan_updates = {field: F(field) + delta for field, delta in deltas.items() if delta}
+        plan = TrainingPlan.objects.select_for_update().only('last_log_at').get(pk=row['plan_id'])
+        if fresh['last_log_at'] and (plan.last_log_at is None or fresh['last_log_at'] > plan.last_log_at):
+            plan_updates['last_log_at'] = fresh['last_log_at']
+        elif row['last_log_at'] and row['last_log_at'] == plan.last_log_at:
+            # Se borró el log más reciente del plan: el máximo sale de la columna ya desnormalizada de sus workouts.
+            plan_updates['last_log_at'] = Subquery(
+                Workout.objects.filter(plan=OuterRef('pk')).order_by().values('plan').annotate(m=Max('last_log_at')).values('m')[:1]
+            )
+        if plan_updates:
+            TrainingPlan.objects.filter(pk=row['plan_id']).update(**plan_updates)
+
+
+def _plan_totals(plans):
+    # Totales del plan desde las columnas ya desnormalizadas de sus workouts.
+    return plans.annotate(
+        **{f'fresh_{field}': Coalesce(Sum(f'workouts__{field}'), 0) for field in COUNTER_FIELDS},
+        fresh_last_log_at=Max('workouts__last_log_at'),
+    ).values('pk', *COUNTER_FIELDS, 'last_log_at', *[f'fresh_{field}' for field in COUNTER_FIELDS], 'fresh_last_log_at')
+
+
+def refresh_plan_progress(plan_id):
+    # Tras borrar workouts enteros: el plan se recalcula una vez desde los que quedan (ver signals.py).
+    with transaction.atomic():
+        if not TrainingPlan.objects.select_for_update().filter(pk=plan_id).exists():
+            return
+        row = _plan_totals(TrainingPlan.objects.filter(pk=plan_id)).get()
+        TrainingPlan.objects.filter(pk=plan_id).update(
+                **{field: row[f'fresh_{field}'] for field in (*COUNTER_FIELDS, 'last_log_at')}
+            )
+
+
+# Recalcula (o solo verifica, con fix=False) los contadores de todos los workouts y planes. Devuelve la cantidad de filas
+# que no coincidían con el valor real.
+def rebuild_progress(fix=True, plans=None):
+    plans = plans if plans is not None else TrainingPlan.objects.all()
+    workout_mismatches = 0
+    with transaction.atomic():
+        for row in computed_workout_progress(Workout.objects.filter(plan__in=plans)).iterator(chunk_size=2000):
+            fresh = _fresh_values(row)
+            if any(fresh[field] != row[field] for field in (*COUNTER_FIELDS, 'last_log_at')):
+                workout_mismatches += 1
+                if fix:
+                    Workout.objects.filter(pk=row['pk']).update(**fresh)
+
+        plan_mismatches = 0
+        for row in _plan_totals(plans).iterator(chunk_size=2000):
+            fresh = {field: row[f'fresh_{field}'] for field in (*COUNTER_FIELDS, 'last_log_at')}
+            if any(fresh[field] != row[field] for field in fresh):
+                plan_mismatches += 1
+                if fix:
+                    TrainingPlan.objects.filter(pk=row['pk']).update(**fresh)
+    return workout_mismatches, plan_mismatches
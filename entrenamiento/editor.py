@@ -0,0 +1,109 @@
+from django import forms
+from django.db import transaction
+from django.db.models import F
+from django.forms import BaseInlineFormSet, inlineformset_factory
+
+from .analytics import invalidate_users_on_commit
+from .catalog import ExerciseAutocompleteWidget, ExerciseChoiceField
+from .counters import refresh_workout_progress
+from .forms import WorkoutExerciseForm
+from .models import Exercise, Workout, WorkoutExercise
+from .signals import mark_done
+
+# ====================================================================================================================
+# Editor de Ejercicios del Workout (un solo POST)
+# ====================================================================================================================
+# add_exercise, edit_workout_exercise y delete_workout_exercise manejan un WorkoutExercise por ida y vuelta, y reordenar
+# era editar 'order' fila por fila. El editor es un inline formset con todos los ejercicios del workout: altas, cambios,
+# orden y bajas llegan juntos y se escriben en una transacción con bulk_create, bulk_update y un único DELETE.
+#
+# Concurrencia optimista: el formulario lleva la versión del workout que se cargó; al guardar se hace
+# UPDATE ... SET version = version + 1 WHERE version = <la cargada>. Si otro entrenador (u otra pestaña) guardó antes, no se
+# actualiza ninguna fila y se rechaza el guardado en vez de pisar sus cambios. Las ediciones de una fila por las vistas
+# anteriores (o el admin) también suben la versión (ver signals.py).
+#
+# Como bulk_create/bulk_update no disparan señales, al final se recalculan los contadores del workout una sola vez; al
+# borrado se le marcan esas mismas tareas como hechas para que sus señales no las repitan (ni suban otra vez la versión).
+# ====================================================================================================================
+
+EDITOR_FIELDS = ['exercise', 'sets', 'reps_target', 'rir_target', 'rpe_target', 'rest_period_seconds', 'notes', 'order', 'video_required']
+
+
+class StaleWorkout(Exception):
+    pass
+
+
+class WorkoutEditorRowForm(WorkoutExerciseForm):
+    def __init__(self, *args, exercises=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Los ejercicios de todas las filas se cargan una vez para el formset (ver BaseWorkoutEditorFormSet): cada fila
+        # etiqueta y valida su ejercicio sin queries propias.
+        self.fields['exercise'] = ExerciseChoiceField(
+            exercises=exercises,
+            widget=ExerciseAutocompleteWidget(attrs={'class': 'form-control form-control-sm'}, filters=False),
+        )
+        self.fields['order'].required = False
+        self.fields['notes'].widget = forms.TextInput(attrs={'class': 'form-control form-control-sm'})
+
+
+class BaseWorkoutEditorFormSet(BaseInlineFormSet):
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('queryset', WorkoutExercise.objects.select_related('exercise').order_by('order', 'pk'))
+        super().__init__(*args, **kwargs)
+        # Solo los ejercicios en uso y los enviados en el POST, no el catálogo entero.
+        exercises = {row.exercise_id: row.exercise for row in self.get_queryset()}
+        if self.is_bound:
+            submitted = {
+                int(value) for key, value in self.data.items()
+                if key.startswith(f'{self.prefix}-') and key.endswith('-exercise') and str(value).isdigit()
+            }
+            exercises.update(Exercise.objects.in_bulk(submitted - exercises.keys()))
+        self.form_kwargs = {**self.form_kwargs, 'exercises': exercises}
+
+
+WorkoutEditorFormSet = inlineformset_factory(
+    Workout, WorkoutExercise, form=WorkoutEditorRowForm, formset=BaseWorkoutEditorFormSet,
+    fields=EDITOR_FIELDS, extra=1, can_delete=True,
+)
+
+
+def save_workout_exercises(workout, formset, version):
+    # Aplica un formset ya validado. Devuelve (creados, actualizados, borrados); StaleWorkout si la versión cambió.
+    original_order = {form.instance.pk: form.initial.get('order') for form in formset.initial_forms}
+    deleted, kept = [], []
+    deleted_forms = set(formset.deleted_forms)
+    for position, form in enumerate(formset.forms):
+        if form in deleted_forms:
+            if form.instance.pk:
+                deleted.append(form.instance.pk)
+            continue
+        if form.instance.pk is None and not form.has_changed():
+            continue  # Fila extra vacía
+        kept.append((form.cleaned_data.get('order') or position + 1, position, form))
+
+    # El orden final es el de la lista (order, posición) renumerado 1..n, así no quedan huecos ni empates.
+    to_create, to_update = [], []
+    for new_order, (_, _, form) in enumerate(sorted(kept, key=lambda item: item[:2]), start=1):
+        instance = form.instance
+        instance.order = new_order
+        if instance.pk is None:
+            instance.workout = workout
+            to_create.append(instance)
+        elif form.has_changed() or original_order[instance.pk] != new_order:
+            to_update.append(instance)
+
+    with transaction.atomic():
+        if not Workout.objects.filter(pk=workout.pk, version=version).update(version=F('version') + 1):
+            raise StaleWorkout
+        if deleted:
+            # Las señales por fila volverían a subir la versión (la siguiente edición chocaría consigo misma) y repetirían el
+            # recálculo y la invalidación de abajo: se marcan como hechas. Los récords de los logs en cascada sí se rehacen.
+            doomed = WorkoutExercise.objects.filter(workout=workout, pk__in=deleted)
+            mark_done(doomed, *((kind, workout.pk) for kind in ('version', 'progress', 'analytics'))).delete()
+        if to_update:
+            WorkoutExercise.objects.bulk_update(to_update, EDITOR_FIELDS)
+        if to_create:
+            WorkoutExercise.objects.bulk_create(to_create)
+        refresh_workout_progress(workout.pk)
+        invalidate_users_on_commit(workout.plan.client_id, workout.plan.trainer_id)
+    return len(to_create), len(to_update), len(deleted)
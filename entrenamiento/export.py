@@ -0,0 +1,209 @@
+import csv
+import datetime
+import tempfile
+
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from .history import _start_of_day
+from .models import ExerciseLog
+from .xlsx import Column, XlsxReport
+
+# ====================================================================================================================
+# Exportación Masiva del Historial de Entrenamiento
+# ====================================================================================================================
+# La única forma de sacar el historial de un cliente era abrir client_logs e ir haciendo scroll. Aquí se exporta todo
+# ExerciseLog de un cliente, un plan o el roster completo de un entrenador como CSV, XLSX o Parquet:
+#   - Lectura por bloques de EXPORT_CHUNK_SIZE con keyset sobre el id (WHERE id > último LIMIT n), con los JOIN de
+#     ejercicio/workout/plan/cliente en la misma query. Con MySQL, .iterator() no alcanza: mysqlclient trae el result set
+#     completo a memoria del proceso; cada bloque acotado sí mantiene la memoria constante sin importar los años de historial.
+#   - Cada formato es un generador de bytes para StreamingHttpResponse (o para el comando export_logs): CSV sale fila a
+#     fila y Parquet un row group por bloque, así que el worker empieza a responder de inmediato. XLSX no puede: el ZIP se
+#     escribe al final, así que se arma completo en un archivo temporal (write-only, ver xlsx.py: memoria acotada, no
+#     tiempo) y recién entonces se envía por trozos. Para historiales enormes conviene CSV/Parquet o el comando.
+#   - XLSX admite 1.048.576 filas por hoja: pasado ese límite el historial sigue en hojas "Historial 2", "Historial 3"...
+#   - En CSV y XLSX los textos que empiezan con = + - @ (o tab/CR) se prefijan con ' para que Excel no los evalúe como
+#     fórmulas (notas, nombres de planes y ejercicios los escribe el usuario). Parquet no se abre en Excel: va tal cual.
+# ====================================================================================================================
+
+EXPORT_CHUNK_SIZE = 2000
+STREAM_CHUNK_SIZE = 64 * 1024
+XLSX_SHEET_ROWS = 1048576 - 1  # Límite de filas de Excel menos el encabezado
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+# (clave, encabezado, formato numérico en Excel, tipo en Parquet)
+EXPORT_FIELDS = [
+    ('id', 'ID', None, 'int64'),
+    ('cliente', 'Cliente', None, 'string'),
+    ('plan', 'Plan', None, 'string'),
+    ('workout', 'Workout', None, 'string'),
+    ('fecha_workout', 'Fecha Workout', 'DD/MM/YYYY', 'date'),
+    ('ejercicio', 'Ejercicio', None, 'string'),
+    ('fecha_registro', 'Fecha Registro', 'DD/MM/YYYY HH:MM', 'timestamp'),
+    ('peso_kg', 'Peso (kg)', '0.00', 'float64'),
+    ('reps', 'Reps', '0', 'int64'),
+    ('rir', 'RIR', '0', 'int64'),
+    ('rpe', 'RPE', '0', 'int64'),
+    ('estado', 'Estado', None, 'string'),
+    ('notas', 'Notas', None, 'string'),
+    ('video_url', 'Video URL', None, 'string'),
+]
+
+QUERY_FIELDS = [
+    'pk', 'client__username', 'workout_exercise__workout__plan__name', 'workout_exercise__workout__title',
+    'workout_exercise__workout__date', 'workout_exercise__exercise__name', 'date_completed', 'weight_lifted_kg',
+    'reps_completed', 'rir_actual', 'rpe_actual', 'status', 'notes', 'video_rendition', 'video_log',
+]
+
+STATUS_LABELS = dict(ExerciseLog.STATUS_CHOICES)
+
+
+class ExportUnavailable(Exception):
+    pass
+
+
+def export_queryset(trainer, client=None, plan=None, filters=None):
+    # Solo logs de planes del entrenador; client/plan acotan el alcance y filters son los de client_logs (history_filters).
+    logs = ExerciseLog.objects.filter(workout_exercise__workout__plan__trainer=trainer)
+    if client is not None:
+        logs = logs.filter(client=client)
+    if plan is not None:
+        logs = logs.filter(workout_exercise__workout__plan=plan)
+    if filters:
+        if filters.get('date_from'):
+            logs = logs.filter(date_completed__gte=_start_of_day(filters['date_from']))
+        if filters.get('date_to'):
+            logs = logs.filter(date_completed__lt=_start_of_day(filters['date_to'] + datetime.timedelta(days=1)))
+        if filters.get('exercise'):
+            logs = logs.filter(workout_exercise__exercise_id=filters['exercise'])
+    return logs
+
+
+def export_chunks(logs, chunk_size=EXPORT_CHUNK_SIZE):
+    # Bloques de filas ya planas (tuplas en el orden de EXPORT_FIELDS), leídos por keyset sobre el id.
+    logs = logs.order_by('pk').values_list(*QUERY_FIELDS)
+    last_pk = 0
+    while True:
+        batch = list(logs.filter(pk__gt=last_pk)[:chunk_size])
+        if not batch:
+            return
+        last_pk = batch[-1][0]
+        yield [_export_row(values) for values in batch]
+        if len(batch) < chunk_size:
+            return
+
+
+def _export_row(values):
+    (pk, client, plan, workout, workout_date, exercise, completed, weight, reps, rir, rpe,
+     status, notes, rendition, video) = values
+    video_name = rendition or video
+    return (
+        pk, client, plan, workout, workout_date, exercise,
+        # Hora local sin zona: Excel no admite datetimes con tzinfo y así los tres formatos muestran lo mismo.
+        timezone.localtime(completed).replace(tzinfo=None),
+        weight, reps, rir, rpe, STATUS_LABELS.get(status, status), notes,
+        default_storage.url(video_name) if video_name else '',
+    )
+
+
+# --------------------------------------------------------------------------------------------------------------------
+# Formatos
+# --------------------------------------------------------------------------------------------------------------------
+
+def _spreadsheet_safe(row):
+    return [f"'{value}" if isinstance(value, str) and value.startswith(FORMULA_PREFIXES) else value for value in row]
+
+
+class _Echo:
+    # Pseudo-buffer para csv.writer: devuelve la línea en vez de guardarla.
+    def write(self, value):
+        return value
+
+
+def stream_csv(chunks):
+    writer = csv.writer(_Echo())
+    # BOM para que Excel abra el CSV como UTF-8 (acentos en nombres y notas).
+    yield '\ufeff' + writer.writerow([header for _, header, _, _ in EXPORT_FIELDS])
+    for chunk in chunks:
+        yield ''.join(writer.writerow(_spreadsheet_safe(row)) for row in chunk)
+
+
+def stream_xlsx(chunks, sheet_rows=XLSX_SHEET_ROWS):
+    report = XlsxReport()
+    columns = [Column(header, number_format) for _, header, number_format, _ in EXPORT_FIELDS]
+    sheet = report.add_sheet('Historial', columns)
+    for chunk in chunks:
+        for row in chunk:
+            if sheet.rows == sheet_rows:
+                sheet = report.add_sheet(f'Historial {len(report.sheets) + 1}', columns)
+            sheet.append(_spreadsheet_safe(row))
+    with tempfile.TemporaryFile() as output:
+        report.save(output)
+        output.seek(0)
+        while data := output.read(STREAM_CHUNK_SIZE):
+            yield data
+
+
+class _ParquetSink:
+    # Destino de ParquetWriter que acumula lo escrito hasta que el generador lo entrega.
+    closed = False
+
+    def __init__(self):
+        self.parts = []
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data, self.parts = b''.join(self.parts), []
+        return data
+
+
+def parquet_available():
+    try:
+        import pandas  # noqa: F401
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def stream_parquet(chunks):
+    if not parquet_available():
+        raise ExportUnavailable('La exportación Parquet requiere pandas y pyarrow')
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    types = {'int64': pa.int64(), 'string': pa.string(), 'date': pa.date32(), 'timestamp': pa.timestamp('us'),
+             'float64': pa.float64()}
+    schema = pa.schema([(key, types[kind]) for key, _, _, kind in EXPORT_FIELDS])
+    columns = [key for key, _, _, _ in EXPORT_FIELDS]
+
+    sink = _ParquetSink()
+    writer = pq.ParquetWriter(pa.PythonFile(sink, mode='w'), schema, compression='snappy')
+    try:
+        for chunk in chunks:
+            # Un row group por bloque: solo el bloque actual vive en memoria.
+            frame = pd.DataFrame.from_records(chunk, columns=columns)
+            writer.write_table(pa.Table.from_pandas(frame, schema=schema, preserve_index=False))
+            if data := sink.drain():
+                yield data
+    finally:
+        writer.close()
+    yield sink.drain()  # Footer con los metadatos de los row groups
+
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv; charset=utf-8', stream_csv),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', stream_xlsx),
+    'parquet': ('application/vnd.apache.parquet', stream_parquet),
+}
+
+
+def export_filename(fmt, scope):
+    return f'historial_{scope}_{timezone.localdate():%Y%m%d}.{fmt}'
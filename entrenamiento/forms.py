@@ -1,5 +1,6 @@
 from django import forms
-from .models import TrainingPlan, Workout, WorkoutExercise, ExerciseLog, Warmup, Exercise
+from .models import TrainingPlan, Workout, WorkoutExercise, ExerciseLog, Warmup, Exercise, PlanTemplate
+from .catalog import ExerciseAutocompleteWidget, ExerciseChoiceField
 from core.models import User
 from django.utils.translation import gettext_lazy as _
 from django.core.validators import MaxValueValidator, FileExtensionValidator
@@ -28,6 +29,38 @@ class TrainingPlanForm(forms.ModelForm):
             'notes': 'Notas',
         }
 
+class PlanTemplateForm(forms.ModelForm):
+    # Guardar un plan como plantilla: nombre, periodización y cuántas semanas copiar (vacío = todas).
+    weeks = forms.IntegerField(required=False, min_value=1, label='Semanas a Copiar',
+                               widget=forms.NumberInput(attrs={'class': 'form-control', 'min': 1, 'placeholder': 'Todas'}))
+
+    class Meta:
+        model = PlanTemplate
+        fields = ['name', 'progression', 'progression_step', 'deload_every']
+        widgets = {
+            'name': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Ej: Hipertrofia 5 días'}),
+            'progression': forms.Select(attrs={'class': 'form-select'}),
+            'progression_step': forms.NumberInput(attrs={'class': 'form-control', 'min': 1}),
+            'deload_every': forms.NumberInput(attrs={'class': 'form-control', 'min': 0}),
+        }
+
+class PlanFromTemplateForm(forms.Form):
+    template = forms.ModelChoiceField(queryset=PlanTemplate.objects.none(), label='Plantilla',
+                                      widget=forms.Select(attrs={'class': 'form-select'}))
+    clients = forms.ModelMultipleChoiceField(queryset=User.objects.none(), label='Clientes',
+                                             widget=forms.CheckboxSelectMultiple)
+    start_date = forms.DateField(label='Fecha de Inicio', widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}))
+    weeks = forms.IntegerField(required=False, min_value=1, max_value=52, label='Semanas',
+                               widget=forms.NumberInput(attrs={'class': 'form-control', 'min': 1, 'placeholder': 'Las de la plantilla'}))
+    name = forms.CharField(required=False, max_length=200, label='Nombre del Plan',
+                           widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'El de la plantilla'}))
+
+    def __init__(self, trainer, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Solo plantillas propias y clientes asignados al entrenador.
+        self.fields['template'].queryset = PlanTemplate.objects.filter(trainer=trainer).order_by('name')
+        self.fields['clients'].queryset = User.objects.filter(role='CLIENTE', assigned_professional=trainer).order_by('username')
+
 class WorkoutForm(forms.ModelForm):
     class Meta:
         model = Workout
@@ -39,12 +72,12 @@ class WorkoutForm(forms.ModelForm):
         }
 
 class WorkoutExerciseForm(forms.ModelForm):
-    exercise = forms.ModelChoiceField(queryset=Exercise.objects.all())
+    # Autocompletado contra el catálogo (ver catalog.py): el formulario ya no carga todos los ejercicios en un <select>.
+    exercise = ExerciseChoiceField(widget=ExerciseAutocompleteWidget(attrs={'class': 'form-control'}))
     class Meta:
         model = WorkoutExercise
         fields = ['exercise', 'sets', 'reps_target', 'rir_target', 'rpe_target', 'rest_period_seconds', 'notes', 'order', 'video_required']  # Agregado 'video_required'
         widgets = {
-            'exercise': forms.Select(attrs={'class': 'form-select'}),
             'sets': forms.NumberInput(attrs={'class': 'form-control', 'min': 1}),
             'reps_target': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Ej: 8-12'}),
             'rir_target': forms.NumberInput(attrs={'class': 'form-control', 'min': 0}),
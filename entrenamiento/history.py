@@ -0,0 +1,109 @@
+import base64
+import datetime
+
+from django.db.models import Q
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import Exercise, ExerciseLog
+
+# ====================================================================================================================
+# Historial de Logs Paginado por Cursor (keyset)
+# ====================================================================================================================
+# client_logs y client_statistics cargaban todos los logs del cliente de una vez. Aquí se leen por páginas usando un cursor
+# sobre (date_completed, id): cada página es un "WHERE (fecha, id) < (cursor)" + LIMIT sobre el índice exlog_client_date_idx,
+# así el coste de una página es el mismo en la primera semana que tras años de historial (un OFFSET tendría que saltar filas).
+#
+# El cursor viaja en el querystring codificado en base64 url-safe; el endpoint JSON lo usa para el scroll infinito.
+# ====================================================================================================================
+
+LOG_PAGE_SIZE = 50
+
+
+def encode_cursor(log):
+    raw = f'{log.date_completed.isoformat()}|{log.pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    # Un cursor inválido o manipulado se trata como "primera página" en vez de devolver un error.
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        date_str, pk = raw.rsplit('|', 1)
+        date_completed = parse_datetime(date_str)
+        if date_completed is None:
+            return None
+        return date_completed, int(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def history_filters(params):
+    # Filtros del querystring normalizados: fechas como date y ejercicio como id (o None si no vienen o no son válidos).
+    def as_date(value):
+        try:
+            return parse_date(value) if value else None
+        except ValueError:
+            return None
+
+    exercise = params.get('exercise')
+    return {
+        'date_from': as_date(params.get('date_from')),
+        'date_to': as_date(params.get('date_to')),
+        'exercise': int(exercise) if exercise and exercise.isdigit() else None,
+    }
+
+
+def _start_of_day(day):
+    return timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+
+
+def history_queryset(client, filters):
+    logs = ExerciseLog.objects.filter(client=client).select_related(
+        'workout_exercise__exercise', 'workout_exercise__workout'
+    ).order_by('-date_completed', '-pk')
+    # Los días se convierten a límites datetime para que el rango use el índice (un __date envolvería la columna en una función).
+    if filters['date_from']:
+        logs = logs.filter(date_completed__gte=_start_of_day(filters['date_from']))
+    if filters['date_to']:
+        logs = logs.filter(date_completed__lt=_start_of_day(filters['date_to'] + datetime.timedelta(days=1)))
+    if filters['exercise']:
+        logs = logs.filter(workout_exercise__exercise_id=filters['exercise'])
+    return logs
+
+
+def history_page(client, params, page_size=LOG_PAGE_SIZE):
+    logs = history_queryset(client, history_filters(params))
+    cursor = decode_cursor(params.get('cursor', ''))
+    if cursor:
+        date_completed, pk = cursor
+        logs = logs.filter(Q(date_completed__lt=date_completed) | Q(date_completed=date_completed, pk__lt=pk))
+    # Se pide una fila de más solo para saber si existe una página siguiente.
+    page = list(logs[:page_size + 1])
+    next_cursor = encode_cursor(page[page_size - 1]) if len(page) > page_size else None
+    return page[:page_size], next_cursor
+
+
+def logged_exercises(client):
+    # Opciones del filtro por ejercicio: solo los ejercicios que el cliente ha registrado alguna vez.
+    return Exercise.objects.filter(workoutexercise__exerciselog__client=client).distinct().order_by('name')
+
+
+def log_row(log):
+    return {
+        'id': log.pk,
+        'date': timezone.localtime(log.date_completed).strftime('%d/%m/%Y'),
+        'exercise': log.workout_exercise.exercise.name,
+        'workout': log.workout_exercise.workout.title,
+        'weight_lifted_kg': log.weight_lifted_kg,
+        'reps_completed': log.reps_completed,
+        'rir_actual': log.rir_actual,
+        'rpe_actual': log.rpe_actual,
+        'notes': log.notes,
+        'status': log.status,
+        'status_display': log.get_status_display(),
+        'video_url': log.video_playback_url,
+        'video_poster_url': log.video_poster_url,
+        'detail_url': reverse('view_log', args=[log.pk]),
+    }
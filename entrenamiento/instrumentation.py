@@ -0,0 +1,193 @@
+import logging
+import math
+import os
+import re
+import socket
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict, deque
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# ====================================================================================================================
+# Instrumentación de Rendimiento por Request
+# ====================================================================================================================
+# No había forma de ver qué vistas son lentas en producción ni cuántas queries hacen. PerformanceMiddleware (opcional:
+# settings.PERFORMANCE_INSTRUMENTATION) envuelve cada request con connection.execute_wrapper y registra:
+#   - número de queries y tiempo total de SQL;
+#   - huellas de las queries (SQL con literales e IN (...) normalizados): una huella repetida en el mismo request es una
+#     query duplicada, y si se repite PERFORMANCE_N_PLUS_ONE_THRESHOLD veces o más, casi seguro un N+1 (se avisa en el log);
+#   - nombre de la vista (resolver_match.view_name) y latencia total.
+# Cada respuesta lleva un header Server-Timing (visible en la pestaña Network del navegador) y la muestra se guarda en una
+# ventana móvil por vista (PERFORMANCE_WINDOW_SECONDS, como mucho PERFORMANCE_MAX_SAMPLES por vista).
+#
+# Varios procesos: cada worker guarda sus muestras en memoria y cada PUBLISH_INTERVAL segundos publica su ventana en la
+# caché compartida ('perf:worker:<id>', con TTL de la ventana). /admin/performance/ (solo staff) junta las ventanas de todos
+# los workers registrados y calcula p50/p95/p99 por vista. Con la caché locmem solo se ve el proceso que atiende la página.
+#
+# La latencia se mide hasta que la vista devuelve la respuesta: en un StreamingHttpResponse no incluye el envío del cuerpo.
+# ====================================================================================================================
+
+WINDOW_SECONDS = getattr(settings, 'PERFORMANCE_WINDOW_SECONDS', 900)
+MAX_SAMPLES = getattr(settings, 'PERFORMANCE_MAX_SAMPLES', 500)
+N_PLUS_ONE_THRESHOLD = getattr(settings, 'PERFORMANCE_N_PLUS_ONE_THRESHOLD', 5)
+PUBLISH_INTERVAL = 10
+WORKERS_KEY = 'perf:workers'
+UNRESOLVED = '(sin resolver)'
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LISTS = re.compile(r'\bIN\s*\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)', re.IGNORECASE)
+
+
+def fingerprint(sql):
+    # Misma forma de query = misma huella: los parámetros ya van aparte (%s); se normalizan literales y listas IN.
+    return _IN_LISTS.sub('IN (...)', _LITERALS.sub('?', sql))
+
+
+class QueryRecorder:
+    # Se instala con connection.execute_wrapper: cuenta, cronometra y toma la huella de cada query del request.
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    def duplicates(self):
+        # (queries repetidas, (huella más repetida, veces) o None)
+        repeated = [(times, sql) for sql, times in self.fingerprints.items() if times > 1]
+        if not repeated:
+            return 0, None
+        times, sql = max(repeated)
+        return sum(times - 1 for times, _ in repeated), (sql, times)
+
+
+def server_timing(view, total_ms, recorder, duplicated):
+    return ', '.join([
+        f'db;dur={recorder.duration * 1000:.1f};desc="{recorder.count} queries"',
+        f'app;dur={max(total_ms - recorder.duration * 1000, 0):.1f}',
+        f'dup;desc="{duplicated} duplicadas"',
+        f'total;dur={total_ms:.1f};desc="{view}"',
+    ])
+
+
+class RollingStats:
+    # Ventana móvil de muestras por vista en este proceso, publicada periódicamente en la caché compartida.
+    def __init__(self):
+        self.worker_id = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}'
+        self._lock = threading.Lock()
+        self._published_at = 0.0
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._samples = defaultdict(lambda: deque(maxlen=MAX_SAMPLES))
+
+    def record(self, view, total_ms, db_ms, queries, duplicated, worst):
+        now = time.time()
+        with self._lock:
+            self._samples[view].append((now, round(total_ms, 2), round(db_ms, 2), queries, duplicated, worst[0] if worst else ''))
+        if now - self._published_at >= PUBLISH_INTERVAL:
+            self.publish()
+
+    def window(self):
+        cutoff = time.time() - WINDOW_SECONDS
+        with self._lock:
+            return {view: [s for s in samples if s[0] >= cutoff] for view, samples in self._samples.items()}
+
+    def publish(self):
+        self._published_at = time.time()
+        cache.set(f'perf:worker:{self.worker_id}', self.window(), WINDOW_SECONDS)
+        # Registro de workers: se vuelve a comprobar en cada publicación, así una escritura concurrente perdida se repara sola.
+        workers = cache.get(WORKERS_KEY) or set()
+        if self.worker_id not in workers:
+            cache.set(WORKERS_KEY, workers | {self.worker_id}, None)
+
+
+STATS = RollingStats()
+
+
+def percentile(values, pct):
+    # Nearest-rank: el menor valor que deja al menos pct % de las muestras por debajo o igual. None sin muestras.
+    # Lo comparten este panel, bench_views y loadtest para que un p95 signifique lo mismo en los tres.
+    if not values:
+        return None
+    values = sorted(values)
+    return values[max(math.ceil(pct / 100 * len(values)) - 1, 0)]
+
+
+def performance_summary():
+    # Filas por vista con percentiles de latencia y queries, juntando las ventanas publicadas por todos los workers.
+    STATS.publish()
+    workers = cache.get(WORKERS_KEY) or set()
+    windows = cache.get_many([f'perf:worker:{worker}' for worker in workers])
+    alive = {key.split(':', 2)[2] for key in windows}
+    if alive != workers:
+        cache.set(WORKERS_KEY, alive, None)  # Workers caídos: su ventana expiró
+
+    cutoff = time.time() - WINDOW_SECONDS
+    merged = defaultdict(list)
+    for window in windows.values():
+        for view, samples in window.items():
+            merged[view].extend(s for s in samples if s[0] >= cutoff)
+
+    rows = []
+    for view, samples in merged.items():
+        if not samples:
+            continue
+        latencies = sorted(s[1] for s in samples)
+        queries = sorted(s[3] for s in samples)
+        worst = Counter(s[5] for s in samples if s[5]).most_common(1)
+        rows.append({
+            'view': view,
+            'requests': len(samples),
+            'p50': percentile(latencies, 50),
+            'p95': percentile(latencies, 95),
+            'p99': percentile(latencies, 99),
+            'db_avg': round(sum(s[2] for s in samples) / len(samples), 2),
+            'queries_avg': round(sum(queries) / len(queries), 1),
+            'queries_p95': percentile(queries, 95),
+            'duplicates_max': max(s[4] for s in samples),
+            'worst_duplicate': worst[0][0] if worst else '',
+        })
+    return sorted(rows, key=lambda row: row['p95'], reverse=True)
+
+
+class PerformanceMiddleware:
+    # Va primero en MIDDLEWARE para que la latencia incluya al resto de middlewares. Desactivada no entra en la cadena.
+    def __init__(self, get_response):
+        if not getattr(settings, 'PERFORMANCE_INSTRUMENTATION', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        total_ms = (time.perf_counter() - start) * 1000
+
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else UNRESOLVED
+        duplicated, worst = recorder.duplicates()
+        if worst and worst[1] >= N_PLUS_ONE_THRESHOLD:
+            logger.warning('Posible N+1 en %s: %s veces %s', view, worst[1], worst[0])
+        response['Server-Timing'] = server_timing(view, total_ms, recorder, duplicated)
+        STATS.record(view, total_ms, recorder.duration * 1000, recorder.count, duplicated, worst)
+        return response
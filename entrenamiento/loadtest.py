@@ -0,0 +1,272 @@
+import random
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from http.cookiejar import CookieJar
+
+from django.db import OperationalError, connection, connections
+from django.test import Client
+from django.urls import reverse
+
+from .instrumentation import percentile
+from .models import ExerciseLog, Task, TrainingPlan
+from .tasks import run_pending
+
+# ====================================================================================================================
+# Prueba de Carga del Registro de Series (pico del gimnasio)
+# ====================================================================================================================
+# El pico real son decenas de clientes registrando series a la vez al terminar una clase. Aquí cada cliente virtual
+# recorre un workout de su plan activo como en el navegador: abre log_exercise (GET), envía una serie por POST y sigue el
+# redirect a view_plan, serie tras serie; el último POST completa el workout y dispara el chequeo de completitud y el
+# encolado del reporte diario. La misma tanda de clientes se repite con distinta concurrencia (workers) para ver cómo
+# escalan throughput, p95/p99 y errores, y dónde aparecen los bloqueos de la base.
+#
+# Transportes:
+#   - En proceso (por defecto): django.test.Client en un ThreadPoolExecutor; cada hilo tiene su conexión a la BD. Mide
+#     además el tiempo en escrituras y los errores de bloqueo ("database is locked", "Lock wait timeout", deadlocks) con
+#     un execute_wrapper por hilo. El GIL limita el CPU: sirve para ver contención en la base, no el máximo del servidor.
+#   - HTTP (--url): contra runserver/gunicorn con login real y CSRF; la base la comparte con este proceso (mismos settings).
+# En MySQL se toma también la diferencia de Innodb_row_lock_waits / Innodb_row_lock_time de cada fase.
+#
+# Reportes: 'queue' solo encola (como producción sin worker), 'worker' corre run_pending en un hilo aparte durante la fase
+# (el worker compite por la base con los requests) e 'inline' ejecuta run_pending en el mismo hilo tras el POST que
+# completa el workout, como hacía la generación inline anterior.
+# ====================================================================================================================
+
+LOCK_ERRORS = ('database is locked', 'database table is locked', 'Lock wait timeout', 'Deadlock')
+WRITE_PREFIXES = ('INSERT', 'UPDATE', 'DELETE', 'BEGIN')
+REPORT_MODES = ('queue', 'worker', 'inline')
+
+
+class LoadTestError(Exception):
+    pass
+
+
+class DbRecorder:
+    # Un recorder por hilo (las conexiones son por hilo): tiempo en lecturas/escrituras y errores de bloqueo.
+    def __init__(self):
+        self.read_ms = 0.0
+        self.write_ms = 0.0
+        self.lock_errors = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        except OperationalError as error:
+            if any(marker in str(error) for marker in LOCK_ERRORS):
+                self.lock_errors += 1
+            raise
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            if sql.lstrip()[:6].upper().startswith(WRITE_PREFIXES):
+                self.write_ms += elapsed
+            else:
+                self.read_ms += elapsed
+
+
+class InProcessTransport:
+    def __init__(self, user):
+        self.client = Client(raise_request_exception=False)
+        self.client.force_login(user)
+
+    def request(self, path, data=None):
+        response = self.client.get(path) if data is None else self.client.post(path, data, follow=True)
+        exc_info = getattr(response, 'exc_info', None)
+        if exc_info:
+            return response.status_code, f'{type(exc_info[1]).__name__}: {str(exc_info[1])[:80]}'
+        return response.status_code, None if response.status_code < 400 else f'HTTP {response.status_code}'
+
+
+class HttpTransport:
+    def __init__(self, base_url, user, password):
+        self.base_url = base_url.rstrip('/')
+        self.jar = CookieJar()
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(self.jar))
+        self.request(reverse('login'))
+        status, error = self.request(reverse('login'), {'username': user.username, 'password': password})
+        if error or not any(cookie.name == 'sessionid' for cookie in self.jar):
+            raise LoadTestError(f'No se pudo iniciar sesión como {user.username} en {self.base_url} ({error or status})')
+
+    def request(self, path, data=None):
+        body = None
+        if data is not None:
+            token = next((cookie.value for cookie in self.jar if cookie.name == 'csrftoken'), '')
+            body = urllib.parse.urlencode({**data, 'csrfmiddlewaretoken': token}).encode()
+        request = urllib.request.Request(self.base_url + path, data=body, headers={'Referer': self.base_url + path})
+        try:
+            with self.opener.open(request, timeout=60) as response:
+                response.read()
+                return response.status, None
+        except urllib.error.HTTPError as error:
+            return error.code, f'HTTP {error.code}'
+        except OSError as error:
+            return 0, type(error).__name__
+
+
+def plan_sessions(clients, phase):
+    # Para cada cliente, el workout futuro número `phase` de su plan activo: sin logs previos, así cada fase registra
+    # un workout completo y dispara su reporte. [(cliente, [(workout_exercise_id, series), ...]), ...]
+    sessions = []
+    for client in clients:
+        plan = TrainingPlan.objects.filter(client=client, status='active').order_by('-start_date').first()
+        workouts = list(plan.workouts.filter(logged_count=0).order_by('date', 'pk')[phase:phase + 1]) if plan else []
+        if not workouts:
+            raise LoadTestError(f'{client.username} no tiene un workout sin registrar para la fase {phase + 1}')
+        steps = list(workouts[0].exercises.filter(video_required=False).order_by('order').values_list('pk', 'sets'))
+        sessions.append((client, steps))
+    return sessions
+
+
+def mysql_lock_status():
+    if connection.vendor != 'mysql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute("SHOW GLOBAL STATUS WHERE Variable_name IN ('Innodb_row_lock_waits', 'Innodb_row_lock_time')")
+        return {name: int(value) for name, value in cursor.fetchall()}
+
+
+def _rounded(value):
+    return round(value, 1) if value is not None else None
+
+
+class Phase:
+    def __init__(self, workers, sessions, make_transport, report_mode, think_ms, seed):
+        self.workers = workers
+        self.sessions = sessions
+        self.make_transport = make_transport
+        self.report_mode = report_mode
+        self.think_ms = think_ms
+        self.seed = seed
+        self.samples = []  # (tipo, ms, error)
+        self.recorders = []
+        self.lock = threading.Lock()
+
+    def run_session(self, index):
+        client, steps = self.sessions[index]
+        rnd = random.Random(self.seed + index)
+        recorder = DbRecorder()
+        samples = []
+        try:
+            with connection.execute_wrapper(recorder):
+                # El login (force_login o POST a login) también escribe en la base: si choca con un bloqueo es un error
+                # de este cliente virtual, no de la fase.
+                transports = []
+                login = self.timed('login', self.login, client, transports)
+                if login[2]:
+                    samples.append(login)
+                    return
+                transport = transports[0]
+                for position, (workout_exercise_id, sets) in enumerate(steps):
+                    path = reverse('log_exercise', args=[workout_exercise_id])
+                    samples.append(self.timed('form', transport.request, path))
+                    for _ in range(sets):
+                        self.think(rnd)
+                        samples.append(self.timed('log', transport.request, path, {
+                            'weight_lifted_kg': round(rnd.uniform(20, 120), 1), 'reps_completed': rnd.randint(5, 12),
+                            'rir_actual': rnd.randint(0, 3), 'rpe_actual': rnd.randint(7, 10), 'status': 'completed',
+                        }))
+                    if self.report_mode == 'inline' and position == len(steps) - 1:
+                        samples.append(self.timed('report', self.run_report))
+        finally:
+            connections.close_all()  # Solo las conexiones de este hilo
+            with self.lock:
+                self.samples.extend(samples)
+                self.recorders.append(recorder)
+
+    def login(self, client, transports):
+        transports.append(self.make_transport(client))
+        return 200, None
+
+    def think(self, rnd):
+        if self.think_ms:
+            time.sleep(rnd.uniform(0, self.think_ms) / 1000)
+
+    @staticmethod
+    def run_report():
+        # El reporte que encoló el último POST, generado por el mismo hilo (lo que tardaría si el request lo esperara).
+        run_pending(limit=1)
+        return 200, None
+
+    @staticmethod
+    def timed(kind, call, *args):
+        start = time.perf_counter()
+        try:
+            status, error = call(*args)
+        except Exception as exc:  # Un error de un cliente virtual se cuenta, no corta la fase
+            error = f'{type(exc).__name__}: {str(exc)[:80]}'
+        return kind, (time.perf_counter() - start) * 1000, error
+
+    def drain_tasks(self, stop):
+        recorder = DbRecorder()
+        try:
+            with connection.execute_wrapper(recorder):
+                while not stop.is_set():
+                    try:
+                        if run_pending():
+                            continue
+                    except OperationalError:
+                        pass  # Bloqueado por los requests: ya quedó contado, se reintenta en la siguiente vuelta
+                    time.sleep(0.05)
+                run_pending(limit=1000)
+        finally:
+            connections.close_all()
+            with self.lock:
+                self.recorders.append(recorder)
+
+    def run(self):
+        locks_before = mysql_lock_status()
+        tasks_before = Task.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+        stop = threading.Event()
+        worker = threading.Thread(target=self.drain_tasks, args=(stop,)) if self.report_mode == 'worker' else None
+        if worker:
+            worker.start()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            list(pool.map(self.run_session, range(len(self.sessions))))
+        elapsed = time.perf_counter() - start
+        if worker:
+            stop.set()
+            worker.join()
+        return self.summary(elapsed, locks_before, tasks_before)
+
+    def summary(self, elapsed, locks_before, tasks_before):
+        errors = Counter(error for _, _, error in self.samples if error)
+        logs = [ms for kind, ms, error in self.samples if kind == 'log' and not error]
+        everything = [ms for _, ms, error in self.samples if not error]
+        tasks = Task.objects.filter(pk__gt=tasks_before, name='send_daily_report')
+        result = {
+            'workers': self.workers,
+            'clients': len(self.sessions),
+            'requests': len(self.samples),
+            'seconds': round(elapsed, 2),
+            'throughput_rps': round(len(self.samples) / elapsed, 1) if elapsed else None,
+            'log_p50_ms': _rounded(percentile(logs, 50)),
+            'log_p95_ms': _rounded(percentile(logs, 95)),
+            'log_p99_ms': _rounded(percentile(logs, 99)),
+            'all_p95_ms': _rounded(percentile(everything, 95)),
+            'all_mean_ms': round(statistics.fmean(everything), 1) if everything else None,
+            'error_rate': round(sum(errors.values()) / len(self.samples), 4) if self.samples else 0,
+            'errors': dict(errors.most_common(5)),
+            'db_write_ms': round(sum(r.write_ms for r in self.recorders), 1),
+            'db_read_ms': round(sum(r.read_ms for r in self.recorders), 1),
+            'lock_errors': sum(r.lock_errors for r in self.recorders),
+            'reports_queued': tasks.count(),
+            'reports_done': tasks.filter(status='done').count(),
+        }
+        locks_after = mysql_lock_status()
+        if locks_before is not None:
+            result['innodb_row_lock_waits'] = locks_after['Innodb_row_lock_waits'] - locks_before['Innodb_row_lock_waits']
+            result['innodb_row_lock_time_ms'] = locks_after['Innodb_row_lock_time'] - locks_before['Innodb_row_lock_time']
+        return result
+
+
+def cleanup(clients, last_log_pk, last_task_pk):
+    # Deshace lo que generó la prueba: los borrados disparan las señales (contadores, récords, caché) como cualquier otro.
+    ExerciseLog.objects.filter(client__in=clients, pk__gt=last_log_pk).delete()
+    Task.objects.filter(pk__gt=last_task_pk).delete()
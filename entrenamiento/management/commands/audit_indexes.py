@@ -0,0 +1,96 @@
+import json
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+from datetime import timedelta
+
+from core.models import User
+from entrenamiento.completion import annotate_completion
+from entrenamiento.models import Exercise, ExerciseLog, PersonalRecord, TrainingPlan, Workout, WorkoutExercise
+from entrenamiento.roster import client_roster
+
+
+# Querysets representativos de las vistas más usadas. Se construyen con objetos reales si existen (para que el planner vea
+# estadísticas parecidas a producción) o con ids de relleno; el EXPLAIN solo necesita la forma de la query.
+def hot_path_querysets():
+    plan = TrainingPlan.objects.order_by('pk').first()
+    client = plan.client if plan else User(pk=0)
+    trainer = plan.trainer if plan else User(pk=0)
+    workout = Workout.objects.filter(plan=plan).first() if plan else None
+    workout = workout or Workout(pk=0)
+    w_exercise = WorkoutExercise.objects.filter(workout=workout).first() if workout.pk else None
+    exercise_id = w_exercise.exercise_id if w_exercise else 0
+    today = timezone.now().date()
+    return [
+        ('client_logs / client_statistics', ExerciseLog.objects.filter(client=client).order_by('-date_completed')),
+        ('client_logs rango de fechas', ExerciseLog.objects.filter(
+            client=client, date_completed__gte=timezone.now() - timedelta(days=30))),
+        ('log_exercise récords', PersonalRecord.objects.filter(client=client, exercise_id__in=[exercise_id])),
+        ('progress_view logs por ejercicio', ExerciseLog.objects.filter(
+            workout_exercise__exercise_id=exercise_id, client=client).order_by('date_completed')),
+        ('logs completados de un workout', ExerciseLog.objects.filter(workout_exercise__workout=workout, status='completed')),
+        ('dashboard sesiones próximas', Workout.objects.filter(plan_id=plan.pk if plan else 0, date__gte=today).order_by('date')),
+        ('completion de un plan', annotate_completion(Workout.objects.filter(plan_id=plan.pk if plan else 0))),
+        ('roster del entrenador', client_roster(trainer)),
+        ('autocompletado por grupo muscular', Exercise.objects.filter(
+            muscle_group='Pecho', name__istartswith='pre').order_by('name')[:20]),
+    ]
+
+
+class Command(BaseCommand):
+    help = 'Ejecuta EXPLAIN sobre las queries principales de las vistas y marca los full table scans'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verbose-plan', action='store_true', help='Muestra el plan completo de cada query')
+        parser.add_argument('--fail-on-scan', action='store_true', help='Termina con error si alguna query hace un full scan')
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+        if vendor not in ('sqlite', 'mysql'):
+            raise CommandError(f'Backend no soportado para la auditoría: {vendor} (solo sqlite y mysql)')
+
+        flagged = 0
+        for label, queryset in hot_path_querysets():
+            if vendor == 'mysql':
+                plan = queryset.explain(format='JSON')
+                scans = self.mysql_full_scans(plan)
+            else:
+                plan = queryset.explain()
+                scans = self.sqlite_full_scans(plan)
+
+            if scans:
+                flagged += 1
+                self.stdout.write(self.style.WARNING(f'[SCAN] {label}: {", ".join(sorted(set(scans)))}'))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'[OK]   {label}'))
+            if options['verbose_plan']:
+                self.stdout.write(plan)
+
+        if flagged and options['fail_on_scan']:
+            raise CommandError(f'{flagged} queries con full table scan')
+        self.stdout.write(f'{flagged} queries con full table scan')
+
+    # SQLite: "SCAN tabla" recorre la tabla entera (o un índice completo); "SEARCH tabla USING INDEX" es un acceso por índice.
+    @staticmethod
+    def sqlite_full_scans(plan):
+        return re.findall(r'\bSCAN (?:TABLE )?(\w+)', plan)
+
+    # MySQL: access_type "ALL" en el EXPLAIN JSON equivale a un full table scan.
+    @classmethod
+    def mysql_full_scans(cls, plan):
+        scans = []
+
+        def walk(node):
+            if isinstance(node, dict):
+                if node.get('access_type') == 'ALL':
+                    scans.append(node.get('table_name', '?'))
+                for value in node.values():
+                    walk(value)
+            elif isinstance(node, list):
+                for value in node:
+                    walk(value)
+
+        walk(json.loads(plan))
+        return scans
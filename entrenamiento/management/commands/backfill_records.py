@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from core.models import User
+from entrenamiento.records import backfill_records
+from entrenamiento.slowlog import capture_slow_queries
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye la tabla de récords personales (1RM estimado, mejor peso a N reps, mejor volumen) desde los logs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--client', action='append', dest='clients', help='Limitar a uno o más clientes (username)')
+
+    @capture_slow_queries('manage.py backfill_records')
+    def handle(self, *args, **options):
+        clients = User.objects.filter(username__in=options['clients']) if options['clients'] else None
+        total = backfill_records(clients)
+        self.stdout.write(self.style.SUCCESS(f'Récords reconstruidos: {total}'))
@@ -0,0 +1,84 @@
+import logging
+import statistics
+import time
+
+import boto3
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from entrenamiento.storage import client_config, get_s3_client
+
+
+class Command(BaseCommand):
+    help = ('Compara la latencia por parte de una subida multipart creando un cliente S3 por request (antes) contra el '
+            'cliente compartido (después). Por defecto levanta un servidor moto local como stand-in de S3/B2.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--parts', type=int, default=100, help='Partes simuladas por subida')
+        parser.add_argument('--part-size', type=int, default=64 * 1024, help='Bytes subidos por parte')
+        parser.add_argument('--endpoint', help='Endpoint S3 compatible ya levantado (si no, se usa moto server)')
+        parser.add_argument('--bucket', default='bench-uploads')
+
+    def handle(self, *args, **options):
+        server = None
+        endpoint = options['endpoint']
+        if not endpoint:
+            try:
+                from moto.server import ThreadedMotoServer
+            except ImportError:
+                raise CommandError('moto no está instalado: pip install "moto[server]" o usa --endpoint')
+            logging.getLogger('werkzeug').setLevel(logging.ERROR)  # Sin el log de acceso por cada parte
+            server = ThreadedMotoServer(port=0, verbose=False)
+            server.start()
+            host, port = server.get_host_and_port()
+            endpoint = f'http://{host}:{port}'
+
+        # Credenciales de relleno para moto; con --endpoint se usan las de settings.
+        overrides = {'AWS_S3_ENDPOINT_URL': endpoint}
+        if server:
+            overrides.update(AWS_ACCESS_KEY_ID='bench', AWS_SECRET_ACCESS_KEY='bench', AWS_S3_REGION_NAME='us-east-1')
+        try:
+            with override_settings(**overrides):
+                self.run_benchmark(options['bucket'], options['parts'], b'x' * options['part_size'])
+        finally:
+            if server:
+                server.stop()
+
+    def run_benchmark(self, bucket, parts, body):
+        shared = get_s3_client()
+        if not any(b['Name'] == bucket for b in shared.list_buckets().get('Buckets', [])):
+            shared.create_bucket(Bucket=bucket)
+
+        def fresh_client():
+            # Lo que hacían las vistas antes en cada request
+            return boto3.client(
+                's3',
+                endpoint_url=settings.AWS_S3_ENDPOINT_URL,
+                aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+                aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+                config=client_config(),
+            )
+
+        for label, factory in (('antes (cliente por request)', fresh_client), ('después (cliente compartido)', get_s3_client)):
+            upload_id = shared.create_multipart_upload(Bucket=bucket, Key=f'bench/{time.time_ns()}')
+            key = upload_id['Key']
+            presign, upload = [], []
+            for number in range(1, parts + 1):
+                start = time.perf_counter()
+                client = factory()
+                client.generate_presigned_url('upload_part', Params={
+                    'Bucket': bucket, 'Key': key, 'UploadId': upload_id['UploadId'], 'PartNumber': number,
+                })
+                presign.append((time.perf_counter() - start) * 1000)
+
+                start = time.perf_counter()
+                factory().upload_part(Bucket=bucket, Key=key, UploadId=upload_id['UploadId'], PartNumber=number, Body=body)
+                upload.append((time.perf_counter() - start) * 1000)
+            shared.abort_multipart_upload(Bucket=bucket, Key=key, UploadId=upload_id['UploadId'])
+            self.stdout.write(f'{label}: {self.summary("presign", presign)} | {self.summary("upload_part", upload)}')
+
+    @staticmethod
+    def summary(name, samples):
+        p95 = statistics.quantiles(samples, n=20)[-1] if len(samples) > 1 else samples[0]
+        return f'{name} media {statistics.mean(samples):.2f} ms, p95 {p95:.2f} ms'
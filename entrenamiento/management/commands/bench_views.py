@@ -0,0 +1,169 @@
+import json
+import statistics
+import subprocess
+import time
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from django.utils import timezone
+
+from core.models import User
+from entrenamiento.instrumentation import percentile
+from entrenamiento.models import ExerciseLog, TrainingPlan, Workout
+from entrenamiento.reports import send_daily_report
+
+TARGETS = [
+    'trainer_dashboard', 'client_dashboard', 'view_plan', 'trainer_plan_detail', 'progress_view', 'client_logs',
+    'send_daily_report', 'weekly_reports',
+]
+
+
+def git_commit():
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR, capture_output=True, text=True)
+    except OSError:
+        return ''
+    return result.stdout.strip()
+
+
+def summarize(runs):
+    latencies = sorted(ms for ms, _ in runs)
+    return {
+        'min_ms': round(latencies[0], 2),
+        'median_ms': round(statistics.median(latencies), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+        'queries': max(queries for _, queries in runs),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide latencia y número de queries de las vistas y reportes principales sobre los datos de seed_load y escribe el '
+        'resultado en JSON; --compare contra un JSON anterior marca las regresiones. Para comparar entre commits usar '
+        'siempre la misma base (p. ej. SQLite) y los mismos parámetros de seed_load.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prefix', default='load', help='Prefijo usado en seed_load')
+        parser.add_argument('--repeat', type=int, default=5, help='Mediciones por objetivo, con y sin caché')
+        parser.add_argument('--only', action='append', choices=TARGETS, help='Medir solo estos objetivos')
+        parser.add_argument('--output', default='-', help='Archivo JSON de salida (- = stdout)')
+        parser.add_argument('--compare', help='JSON de una corrida anterior contra el que comparar')
+        parser.add_argument('--tolerance', type=float, default=25.0, help='%% de aumento de la mediana que cuenta como regresión')
+        parser.add_argument('--fail-on-regression', action='store_true', help='Termina con error si hay regresiones')
+
+    def handle(self, *args, **options):
+        trainer = User.objects.filter(username__startswith=f"{options['prefix']}_t", role='ENTRENADOR').order_by('pk').first()
+        client = trainer and trainer.clients.order_by('pk').first()
+        plan = client and TrainingPlan.objects.filter(client=client).order_by('-start_date').first()
+        workout = client and Workout.objects.filter(plan__client=client, logged_count__gt=0).order_by('-date').first()
+        if not (trainer and client and plan and workout):
+            raise CommandError(f"Sin datos con prefijo {options['prefix']}: ejecuta primero seed_load")
+
+        try:
+            setup_test_environment()  # ALLOWED_HOSTS para el Client y correo en memoria
+            own_environment = True
+        except RuntimeError:
+            own_environment = False  # Ya dentro de los tests
+        try:
+            results = self.measure(self.targets(trainer, client, plan, workout), options['only'] or TARGETS, options['repeat'])
+        finally:
+            if own_environment:
+                teardown_test_environment()
+
+        report = {
+            'meta': {
+                'commit': git_commit(),
+                'created_at': timezone.now().isoformat(),
+                'database': connection.vendor,
+                'repeat': options['repeat'],
+                'dataset': {
+                    'prefix': options['prefix'],
+                    'clients': trainer.clients.count(),
+                    'plans': TrainingPlan.objects.filter(trainer=trainer).count(),
+                    'logs': ExerciseLog.objects.filter(client__assigned_professional=trainer).count(),
+                },
+            },
+            'results': results,
+        }
+        payload = json.dumps(report, indent=2, ensure_ascii=False)
+        if options['output'] == '-':
+            self.stdout.write(payload)
+            log = self.stderr
+        else:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                f.write(payload)
+            log = self.stdout
+
+        regressions = self.report(log, results, options['compare'], options['tolerance'])
+        if regressions and options['fail_on_regression']:
+            raise CommandError(f'{len(regressions)} regresiones: {", ".join(regressions)}')
+
+    @staticmethod
+    def targets(trainer, client, plan, workout):
+        as_trainer, as_client = Client(), Client()
+        as_trainer.force_login(trainer)
+        as_client.force_login(client)
+        return {
+            'trainer_dashboard': lambda: as_trainer.get(reverse('trainer_dashboard')),
+            'client_dashboard': lambda: as_client.get(reverse('client_dashboard')),
+            'view_plan': lambda: as_client.get(reverse('view_plan', args=[plan.pk])),
+            'trainer_plan_detail': lambda: as_trainer.get(reverse('trainer_plan_detail', args=[plan.pk])),
+            'progress_view': lambda: as_trainer.get(reverse('progress_view', args=[plan.pk])),
+            'client_logs': lambda: as_trainer.get(reverse('client_logs', args=[client.pk])),
+            'send_daily_report': lambda: send_daily_report(Workout.objects.get(pk=workout.pk)),
+            'weekly_reports': lambda: call_command('weekly_reports', stdout=StringIO()),
+        }
+
+    @staticmethod
+    def run_once(target, name):
+        # Cada medición se deshace al terminar (correos encolados, sesiones...): todas parten de los mismos datos.
+        with CaptureQueriesContext(connection) as ctx, transaction.atomic():
+            start = time.perf_counter()
+            response = target()
+            elapsed = (time.perf_counter() - start) * 1000
+            transaction.set_rollback(True)
+        status = getattr(response, 'status_code', 200)
+        if status != 200:
+            raise CommandError(f'{name} respondió {status}')
+        return elapsed, len(ctx.captured_queries)
+
+    def measure(self, targets, names, repeat):
+        results = {}
+        for name in names:
+            cold = []
+            for _ in range(repeat):
+                cache.clear()
+                cold.append(self.run_once(targets[name], name))
+            # Sin limpiar: la caché queda con lo que calculó la última medición en frío.
+            warm = [self.run_once(targets[name], name) for _ in range(repeat)]
+            results[name] = {'cold': summarize(cold), 'warm': summarize(warm)}
+        return results
+
+    @staticmethod
+    def report(log, results, baseline_path, tolerance):
+        baseline = {}
+        if baseline_path:
+            with open(baseline_path, encoding='utf-8') as f:
+                baseline = json.load(f)['results']
+        regressions = []
+        for name, result in results.items():
+            line = f"{name:<22} frío {result['cold']['median_ms']:>8.1f} ms {result['cold']['queries']:>4} queries | " \
+                   f"caché {result['warm']['median_ms']:>8.1f} ms {result['warm']['queries']:>4} queries"
+            base = baseline.get(name)
+            if base:
+                median, queries = result['cold']['median_ms'], result['cold']['queries']
+                change = (median / base['cold']['median_ms'] - 1) * 100 if base['cold']['median_ms'] else 0.0
+                line += f" | {change:+.0f}% / {queries - base['cold']['queries']:+d} queries"
+                if change > tolerance or queries > base['cold']['queries']:
+                    regressions.append(name)
+                    line += '  [REGRESIÓN]'
+            log.write(line)
+        return regressions
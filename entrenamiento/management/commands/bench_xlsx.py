@@ -0,0 +1,83 @@
+import random
+import time
+import tracemalloc
+from io import BytesIO
+
+import openpyxl
+from django.core.management.base import BaseCommand
+from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+from openpyxl.utils import get_column_letter
+
+from entrenamiento.reports import DAILY_COLUMNS
+from entrenamiento.xlsx import FILLS, XlsxReport
+
+STATUSES = ['completed', 'half', 'not_completed']
+
+
+def sample_rows(count, seed=7):
+    rnd = random.Random(seed)
+    for i in range(count):
+        status = rnd.choice(STATUSES)
+        video = f'https://videos.example.com/logs/videos/{i}_720p.mp4' if rnd.random() < 0.3 else ''
+        values = [f'Ejercicio {i % 40}', round(rnd.uniform(20, 180), 1), rnd.randint(3, 15), rnd.randint(0, 4),
+                  rnd.randint(6, 10), status, 'nota ' * rnd.randint(0, 8), '']
+        yield values, status, {7: (video, 'Ver Video')} if video else None
+
+
+def legacy_workbook(rows):
+    # Réplica del reporte diario anterior: estilos nuevos por celda y autoajuste releyendo cada columna.
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append([column.header for column in DAILY_COLUMNS])
+    for values, status, links in rows:
+        ws.append(values)
+        current_row = ws.max_row
+        for col in range(1, len(values) + 1):
+            cell = ws.cell(row=current_row, column=col)
+            cell.border = Border(left=Side(style='thin'), right=Side(style='thin'), top=Side(style='thin'), bottom=Side(style='thin'))
+            cell.alignment = Alignment(horizontal='left', vertical='center', wrap_text=True)
+            if col in [2, 3, 4, 5]:
+                cell.number_format = '0.00' if col == 2 else '0'
+            if col == 8 and links:
+                cell.hyperlink = links[7][0]
+                cell.font = Font(underline='single', color='0000FF')
+                cell.value = 'Ver Video'
+            cell.fill = PatternFill(start_color=FILLS[status], end_color=FILLS[status], fill_type='solid')
+    for col in range(1, ws.max_column + 1):
+        letter = get_column_letter(col)
+        width = max((len(str(cell.value)) for cell in ws[letter] if cell.value), default=0)
+        ws.column_dimensions[letter].width = (width + 2) * 1.2
+    output = BytesIO()
+    wb.save(output)
+    return output.getvalue()
+
+
+def streaming_workbook(rows):
+    report = XlsxReport()
+    sheet = report.add_sheet('Benchmark', DAILY_COLUMNS, banner='Benchmark')
+    for values, status, links in rows:
+        sheet.append(values, fill=status, links=links)
+    return report.to_bytes()
+
+
+class Command(BaseCommand):
+    help = 'Mide tiempo y memoria pico del reporte Excel anterior contra el constructor en streaming (xlsx.py)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        for label, build in (('anterior (estilos por celda)', legacy_workbook), ('streaming (write-only)', streaming_workbook)):
+            # Tiempo y memoria en pasadas separadas: tracemalloc hace varias veces más lento el código que mide.
+            start = time.perf_counter()
+            data = build(sample_rows(options['rows']))
+            elapsed = time.perf_counter() - start
+
+            tracemalloc.start()
+            build(sample_rows(options['rows']))
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            self.stdout.write(
+                f'{label}: {options["rows"]} filas en {elapsed:.2f} s, memoria pico {peak / 1024 / 1024:.1f} MB, '
+                f'archivo {len(data) / 1024:.0f} KB'
+            )
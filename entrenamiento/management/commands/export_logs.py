@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import User
+from entrenamiento.export import EXPORT_FORMATS, ExportUnavailable, export_chunks, export_filename, export_queryset
+from entrenamiento.models import TrainingPlan
+from entrenamiento.slowlog import capture_slow_queries
+
+
+class Command(BaseCommand):
+    help = 'Exporta el historial de logs de un entrenador (roster completo, un cliente o un plan) a CSV, XLSX o Parquet'
+
+    def add_arguments(self, parser):
+        parser.add_argument('trainer', help='Username del entrenador')
+        parser.add_argument('--client', help='Username del cliente')
+        parser.add_argument('--plan', type=int, help='Id del plan')
+        parser.add_argument('--format', choices=list(EXPORT_FORMATS), default='csv')
+        parser.add_argument('--output', help='Archivo de salida (por defecto historial_<alcance>_<fecha>.<formato>)')
+
+    @capture_slow_queries('manage.py export_logs')
+    def handle(self, *args, **options):
+        try:
+            trainer = User.objects.get(username=options['trainer'], role='ENTRENADOR')
+            client = User.objects.get(username=options['client'], assigned_professional=trainer) if options['client'] else None
+            plan = TrainingPlan.objects.get(pk=options['plan'], trainer=trainer) if options['plan'] else None
+        except (User.DoesNotExist, TrainingPlan.DoesNotExist) as e:
+            raise CommandError(str(e))
+
+        fmt = options['format']
+        scope = f'plan{plan.pk}' if plan else client.username if client else 'roster'
+        output = options['output'] or export_filename(fmt, scope)
+        _, stream = EXPORT_FORMATS[fmt]
+        try:
+            # Los mismos generadores que la vista: el archivo se escribe por bloques, sin cargar todo el historial.
+            with open(output, 'wb') as f:
+                for part in stream(export_chunks(export_queryset(trainer, client=client, plan=plan))):
+                    f.write(part.encode() if isinstance(part, str) else part)
+        except ExportUnavailable as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(f'Historial exportado en {output}'))
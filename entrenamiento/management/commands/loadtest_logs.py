@@ -0,0 +1,116 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils import timezone
+
+from core.models import User
+from entrenamiento.loadtest import REPORT_MODES, HttpTransport, InProcessTransport, LoadTestError, Phase, cleanup, plan_sessions
+from entrenamiento.management.commands.bench_views import git_commit
+from entrenamiento.models import ExerciseLog, Task
+
+
+def worker_counts(value):
+    try:
+        counts = [int(part) for part in value.split(',') if part.strip()]
+    except ValueError:
+        counts = []
+    if not counts or min(counts) < 1:
+        raise ValueError(f'Lista de workers inválida: {value}')
+    return counts
+
+
+class Command(BaseCommand):
+    help = (
+        'Simula el pico del gimnasio sobre los datos de seed_load: clientes virtuales registran un workout completo serie '
+        'a serie (log_exercise) con 1, 2, 4... workers concurrentes, y reporta throughput, p95/p99, tiempo de escritura, '
+        'bloqueos y errores por fase. Lo registrado se borra al terminar salvo con --keep.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prefix', default='load', help='Prefijo usado en seed_load (la contraseña es el prefijo)')
+        parser.add_argument('--workers', type=worker_counts, default=[1, 2, 4, 8], help='Concurrencias a probar, p. ej. 1,4,16')
+        parser.add_argument('--clients', type=int, default=24, help='Clientes virtuales por fase')
+        parser.add_argument('--think-ms', type=int, default=0, help='Pausa aleatoria máxima entre series, en ms')
+        parser.add_argument('--reports', choices=REPORT_MODES, default='queue', help='Qué hacer con los reportes encolados')
+        parser.add_argument('--url', help='Servidor a atacar por HTTP (p. ej. http://127.0.0.1:8000) en vez del Client en proceso')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', help='Archivo JSON con el resultado')
+        parser.add_argument('--keep', action='store_true', help='No borrar los logs y tareas generados')
+
+    def handle(self, *args, **options):
+        clients = list(User.objects.filter(username__startswith=f"{options['prefix']}_t", role='CLIENTE').order_by('pk')[:options['clients']])
+        if not clients:
+            raise CommandError(f"Sin clientes con prefijo {options['prefix']}: ejecuta primero seed_load")
+        try:
+            # Cada fase usa el siguiente workout sin registrar de cada cliente; se preparan todas antes de medir.
+            sessions = [plan_sessions(clients, phase) for phase in range(len(options['workers']))]
+        except LoadTestError as error:
+            raise CommandError(f'{error} (usa menos fases o un seed_load con más semanas de plan)')
+
+        if options['url']:
+            make_transport = lambda user: HttpTransport(options['url'], user, options['prefix'])  # noqa: E731
+        else:
+            make_transport = InProcessTransport
+        last_log = ExerciseLog.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+        last_task = Task.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+
+        try:
+            setup_test_environment()  # ALLOWED_HOSTS para el Client y correo en memoria para los reportes
+            own_environment = True
+        except RuntimeError:
+            own_environment = False  # Ya dentro de los tests
+        phases = []
+        try:
+            for index, workers in enumerate(options['workers']):
+                phase = Phase(workers, sessions[index], make_transport, options['reports'], options['think_ms'], options['seed'])
+                phases.append(phase.run())
+                self.stderr.write(self.line(phases[-1]))
+        finally:
+            if own_environment:
+                teardown_test_environment()
+            if not options['keep']:
+                cleanup(clients, last_log, last_task)
+
+        report = {
+            'meta': {
+                'commit': git_commit(),
+                'created_at': timezone.now().isoformat(),
+                'database': connection.vendor,
+                'transport': options['url'] or 'in-process',
+                'reports': options['reports'],
+                'think_ms': options['think_ms'],
+                'prefix': options['prefix'],
+            },
+            'phases': phases,
+        }
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+        self.stdout.write(self.scaling(phases))
+
+    @staticmethod
+    def line(phase):
+        locks = f"{phase['lock_errors']} errores de bloqueo"
+        if 'innodb_row_lock_waits' in phase:
+            locks += f", {phase['innodb_row_lock_waits']} esperas InnoDB ({phase['innodb_row_lock_time_ms']} ms)"
+        return (
+            f"{phase['workers']:>3} workers | {phase['requests']} requests en {phase['seconds']} s = {phase['throughput_rps']} req/s | "
+            f"log p50 {phase['log_p50_ms']} / p95 {phase['log_p95_ms']} / p99 {phase['log_p99_ms']} ms | "
+            f"escrituras {phase['db_write_ms']:.0f} ms | {locks} | errores {phase['error_rate']:.1%} | "
+            f"reportes {phase['reports_done']}/{phase['reports_queued']}"
+        )
+
+    @staticmethod
+    def scaling(phases):
+        # Cómo escala cada fase respecto de la de menor concurrencia: ideal = throughput × workers, p95 plano.
+        base = phases[0]
+        lines = ['workers  req/s  escala  log p95  log p99  errores  bloqueos']
+        for phase in phases:
+            speedup = phase['throughput_rps'] / base['throughput_rps'] if base['throughput_rps'] else 0
+            lines.append(
+                f"{phase['workers']:>7} {phase['throughput_rps']:>6} {speedup:>6.2f}x {phase['log_p95_ms'] or 0:>8} "
+                f"{phase['log_p99_ms'] or 0:>8} {phase['error_rate']:>8.1%} {phase['lock_errors']:>9}"
+            )
+        return '\n'.join(lines)
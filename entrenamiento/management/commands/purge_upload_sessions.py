@@ -0,0 +1,40 @@
+from datetime import timedelta
+
+from botocore.exceptions import BotoCoreError, ClientError
+from django.core.management.base import BaseCommand
+
+from entrenamiento.models import UploadSession
+from entrenamiento.uploads import UPLOAD_SESSION_TTL, abort_session, stale_sessions
+
+
+class Command(BaseCommand):
+    help = 'Aborta en el bucket las subidas multipart abandonadas y borra las sesiones viejas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=float, help=f'Antigüedad mínima (por defecto {UPLOAD_SESSION_TTL})')
+        parser.add_argument('--dry-run', action='store_true', help='Solo lista lo que se purgaría')
+
+    def handle(self, *args, **options):
+        older_than = timedelta(hours=options['hours']) if options['hours'] is not None else UPLOAD_SESSION_TTL
+        sessions = stale_sessions(older_than)
+        aborted = failed = 0
+        purge = set(sessions.exclude(status='active').values_list('pk', flat=True))
+        for session in sessions.filter(status='active').iterator():
+            if options['dry_run']:
+                self.stdout.write(f'Abortaría {session.key}')
+                continue
+            try:
+                abort_session(session)
+                aborted += 1
+                purge.add(session.pk)
+            except (BotoCoreError, ClientError) as e:
+                # Error de S3 o de red: se sigue con las demás, esta queda activa para el próximo intento.
+                failed += 1
+                self.stderr.write(f'No se pudo abortar {session.key}: {e}')
+
+        if options['dry_run']:
+            self.stdout.write(f'{sessions.count()} sesiones se purgarían')
+            return
+        # Las que no se pudieron abortar siguen activas para el próximo intento; el resto ya no hace falta.
+        deleted, _ = UploadSession.objects.filter(pk__in=purge).delete()
+        self.stdout.write(self.style.SUCCESS(f'{aborted} subidas abortadas, {deleted} sesiones borradas, {failed} con error'))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+from entrenamiento.counters import rebuild_progress
+from entrenamiento.models import TrainingPlan
+from entrenamiento.slowlog import capture_slow_queries
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye (o verifica con --verify) los contadores de progreso de workouts y planes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verify', action='store_true', help='Solo compara los contadores con los datos reales, sin modificarlos')
+        parser.add_argument('--plan', type=int, action='append', dest='plans', help='Limitar a uno o más planes (id)')
+
+    @capture_slow_queries('manage.py rebuild_progress')
+    def handle(self, *args, **options):
+        plans = TrainingPlan.objects.all()
+        if options['plans']:
+            plans = plans.filter(pk__in=options['plans'])
+        fix = not options['verify']
+        workouts, plan_rows = rebuild_progress(fix=fix, plans=plans)
+        if not fix and (workouts or plan_rows):
+            raise CommandError(f'Contadores desincronizados: {workouts} workouts y {plan_rows} planes')
+        action = 'corregidos' if fix else 'desincronizados'
+        self.stdout.write(self.style.SUCCESS(f'Contadores {action}: {workouts} workouts, {plan_rows} planes'))
@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from entrenamiento.tasks import run_pending, worker_id
+
+
+class Command(BaseCommand):
+    help = 'Worker de la cola de tareas: ejecuta las tareas pendientes (reporte diario, etc.) con reintentos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Procesa lo pendiente y termina (útil para cron o tests)')
+        parser.add_argument('--batch', type=int, default=10, help='Tareas por vuelta (se reclaman de a una)')
+        parser.add_argument('--sleep', type=float, default=2.0, help='Segundos de espera cuando la cola está vacía')
+
+    def handle(self, *args, **options):
+        worker = worker_id()
+        processed = 0
+        self.stdout.write(f'Worker {worker} iniciado')
+        try:
+            while True:
+                count = run_pending(worker, options['batch'])
+                processed += count
+                if count:
+                    continue  # Puede haber más: se sigue sin esperar
+                if options['once']:
+                    break
+                time.sleep(options['sleep'])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(f'{processed} tareas procesadas'))
@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import User
+from entrenamiento.seed import flush_load, seed_load
+
+
+class Command(BaseCommand):
+    help = (
+        'Genera datos sintéticos reproducibles (entrenadores, clientes, planes, workouts y años de logs) para medir las '
+        'vistas con bench_views. La contraseña de los usuarios generados es el prefijo.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prefix', default='load', help='Prefijo de los usernames generados')
+        parser.add_argument('--trainers', type=int, default=3)
+        parser.add_argument('--clients', type=int, default=20, help='Clientes por entrenador')
+        parser.add_argument('--history-weeks', type=int, default=104, help='Semanas de historial con logs')
+        parser.add_argument('--plan-weeks', type=int, default=12, help='Duración de cada plan (bloques consecutivos)')
+        parser.add_argument('--days', type=int, default=4, help='Entrenamientos por semana')
+        parser.add_argument('--exercises', type=int, default=6, help='Ejercicios por entrenamiento')
+        parser.add_argument('--completion', type=float, default=0.85, help='Fracción de ejercicios pasados con log')
+        parser.add_argument('--catalog', type=int, default=60, help='Ejercicios en el catálogo')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--flush', action='store_true', help='Borra antes lo generado con el mismo prefijo')
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        if options['exercises'] > options['catalog']:
+            raise CommandError('--exercises no puede ser mayor que --catalog')
+        if options['flush']:
+            self.stdout.write(f'Borrados {flush_load(prefix)} objetos con prefijo {prefix}')
+        elif User.objects.filter(username__startswith=f'{prefix}_t').exists():
+            raise CommandError(f'Ya hay datos con prefijo {prefix}: usa --flush o otro --prefix')
+
+        start = time.perf_counter()
+        summary = seed_load(
+            prefix=prefix, trainers=options['trainers'], clients_per_trainer=options['clients'],
+            history_weeks=options['history_weeks'], plan_weeks=options['plan_weeks'], days=options['days'],
+            exercises=options['exercises'], completion=options['completion'], catalog_size=options['catalog'], seed=options['seed'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"{summary['trainers']} entrenadores, {summary['clients']} clientes, {summary['plans']} planes, "
+            f"{summary['workout_exercises']} ejercicios de plan y {summary['logs']} logs en {time.perf_counter() - start:.1f} s"
+        ))
@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from entrenamiento.outbox import OUTBOX_BATCH_SIZE, OUTBOX_THROTTLE, send_batch
+
+
+class Command(BaseCommand):
+    help = 'Envía los correos pendientes de la bandeja de salida en lotes por una sola conexión SMTP'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=OUTBOX_BATCH_SIZE, help='Mensajes por conexión SMTP')
+        parser.add_argument('--throttle', type=float, default=OUTBOX_THROTTLE, help='Segundos de pausa entre mensajes')
+        parser.add_argument('--loop', action='store_true', help='Seguir esperando correos nuevos en vez de terminar')
+        parser.add_argument('--sleep', type=float, default=5.0, help='Espera con la bandeja vacía (con --loop)')
+
+    def handle(self, *args, **options):
+        total_sent = total_failed = 0
+        try:
+            while True:
+                sent, failed = send_batch(options['batch_size'], options['throttle'])
+                total_sent += sent
+                total_failed += failed
+                if sent or failed:
+                    continue
+                if not options['loop']:
+                    break
+                time.sleep(options['sleep'])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(f'{total_sent} correos enviados, {total_failed} con error'))
@@ -0,0 +1,60 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Avg, Count, Max, Sum
+from django.utils import timezone
+
+from entrenamiento.models import SlowQuery
+
+
+class Command(BaseCommand):
+    help = 'Lista las queries lentas registradas (ver entrenamiento/slowlog.py) agrupadas por huella, las peores primero'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=20, help='Cuántas huellas mostrar')
+        parser.add_argument('--hours', type=int, help='Solo las registradas en las últimas N horas')
+        parser.add_argument('--origin', help='Solo las de una vista o comando (p. ej. progress_view)')
+        parser.add_argument('--order', choices=['total', 'max', 'count'], default='total', help='Criterio de orden')
+        parser.add_argument('--details', action='store_true', help='Muestra traza y EXPLAIN de cada huella')
+        parser.add_argument('--clear', action='store_true', help='Borra el registro después de listarlo')
+
+    def handle(self, *args, **options):
+        queries = SlowQuery.objects.all()
+        if options['hours']:
+            queries = queries.filter(created_at__gte=timezone.now() - timedelta(hours=options['hours']))
+        if options['origin']:
+            queries = queries.filter(origin=options['origin'])
+
+        top = list(
+            queries.values('fingerprint')
+            .annotate(count=Count('id'), total=Sum('duration_ms'), avg=Avg('duration_ms'), max=Max('duration_ms'))
+            .order_by(f'-{options["order"]}')[:options['limit']]
+        )
+        if not top:
+            self.stdout.write('Sin queries lentas registradas')
+            return
+
+        # La ejecución más lenta de cada huella (origen, traza) y el EXPLAIN guardado en su primera aparición.
+        fingerprints = [t['fingerprint'] for t in top]
+        slowest = {}
+        for row in queries.filter(fingerprint__in=fingerprints).order_by('fingerprint', '-duration_ms'):
+            slowest.setdefault(row.fingerprint, row)
+        plans = dict(SlowQuery.objects.filter(fingerprint__in=fingerprints).exclude(explain='').values_list('fingerprint', 'explain'))
+
+        for rank, stats in enumerate(top, start=1):
+            sample = slowest[stats['fingerprint']]
+            self.stdout.write(self.style.WARNING(
+                f"#{rank} {stats['count']}× total {stats['total']:.0f} ms | prom. {stats['avg']:.1f} ms | máx. {stats['max']:.1f} ms"
+                f" | {sample.origin}"
+            ))
+            self.stdout.write(f'    {sample.sql}')
+            if options['details']:
+                self.stdout.write(f'    Parámetros: {sample.params}')
+                self.stdout.write(sample.stack.rstrip() or '    (sin traza del proyecto)')
+                if plans.get(stats['fingerprint']):
+                    self.stdout.write('    EXPLAIN:')
+                    self.stdout.write('\n'.join(f'      {line}' for line in plans[stats['fingerprint']].splitlines()))
+
+        if options['clear']:
+            deleted, _ = SlowQuery.objects.all().delete()
+            self.stdout.write(self.style.SUCCESS(f'Registro vaciado ({deleted} filas)'))
@@ -1,50 +1,59 @@
-from datetime import timedelta
-from django.core.management.base import BaseCommand
-from entrenamiento.models import TrainingPlan, Workout, ExerciseLog
-from django.utils import timezone
-from io import BytesIO
-import openpyxl
-from django.core.mail import EmailMessage
+from concurrent.futures import ProcessPoolExecutor
+
+import django
 from django.conf import settings
-from django.db.models import Avg
-from entrenamiento.models import Exercise
+from django.core.mail import EmailMessage
+from django.core.management.base import BaseCommand, CommandError
+
+from entrenamiento.outbox import queue_email
+from entrenamiento.weekly import build_weekly_workbook, previous_week, weekly_data
+from entrenamiento.slowlog import capture_slow_queries
+
+
+def parse_shard(value):
+    # "--shard 2/4": este proceso solo atiende los planes con pk % 4 == 2 (para repartir la corrida entre máquinas/cron).
+    try:
+        index, total = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise CommandError('--shard debe tener la forma i/n, p. ej. 0/4')
+    if total < 1 or not 0 <= index < total:
+        raise CommandError('--shard fuera de rango: se espera 0 <= i < n')
+    return index, total
+
+
+def workbook_pool(workers, mp_context=None):
+    # Con spawn/forkserver (macOS; Linux por defecto desde Python 3.14) los hijos arrancan de cero y al deserializar
+    # build_weekly_workbook importan los modelos: necesitan django.setup() antes, como un manage.py cualquiera.
+    return ProcessPoolExecutor(max_workers=workers, mp_context=mp_context, initializer=django.setup)
+
+
 class Command(BaseCommand):
     help = 'Envía reportes semanales de progresos'
 
-    def handle(self, *args, **kwargs):
-        today = timezone.now().date()
-        start_of_week = today - timedelta(days=today.weekday() + 7)  # Inicio de semana pasada
-        end_of_week = start_of_week + timedelta(days=6)
-        plans = TrainingPlan.objects.filter(status='active')
-        for plan in plans:
-            workouts = plan.workouts.filter(date__range=[start_of_week, end_of_week])
-            if not workouts.exists():
-                continue
-            # Analizar datos
-            wb = openpyxl.Workbook()
-            ws = wb.active
-            ws.title = f"Reporte Semanal - {plan.name}"
-            ws.append(['Ejercicio', 'Avg Peso (kg)', 'Avg Reps', 'Avg RIR', 'Avg RPE', 'Consistencia (%)'])
-            exercises = Exercise.objects.filter(workoutexercise__workout__in=workouts).distinct()
-            total_workouts = workouts.count()
-            completed_workouts = sum(1 for w in workouts if w.is_complete())
-            consistency = (completed_workouts / total_workouts * 100) if total_workouts > 0 else 0
-            for ex in exercises:
-                logs = ExerciseLog.objects.filter(workout_exercise__exercise=ex, date_completed__range=[start_of_week, end_of_week])
-                if logs.exists():
-                    avg_weight = logs.aggregate(Avg('weight_lifted_kg'))['weight_lifted_kg__avg']
-                    avg_reps = logs.aggregate(Avg('reps_completed'))['reps_completed__avg']
-                    avg_rir = logs.aggregate(Avg('rir_actual'))['rir_actual__avg']
-                    avg_rpe = logs.aggregate(Avg('rpe_actual'))['rpe_actual__avg']
-                    ws.append([ex.name, avg_weight, avg_reps, avg_rir, avg_rpe, consistency])
-            # Guardar y enviar
-            output = BytesIO()
-            wb.save(output)
-            output.seek(0)
-            trainer_email = plan.trainer.email
-            subject = f"Reporte Semanal: {plan.name} para {plan.client.username}"
-            message = f"Adjunto el reporte semanal. Consistencia: {consistency}%"
-            email = EmailMessage(subject, message, settings.EMAIL_HOST_USER, [trainer_email])
-            email.attach(f'reporte_semanal_{start_of_week}.xlsx', output.getvalue(), 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-            email.send()
-            self.stdout.write(self.style.SUCCESS(f'Reporte enviado para {plan.name}'))
\ No newline at end of file
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=1, help='Procesos para armar los Excel (1 = en este proceso)')
+        parser.add_argument('--shard', type=parse_shard, help='Procesar solo una fracción de los planes: i/n')
+
+    @capture_slow_queries('manage.py weekly_reports')
+    def handle(self, *args, **options):
+        start_of_week, end_of_week = previous_week()
+        reports = weekly_data(start_of_week, end_of_week, options['shard'])
+        if not reports:
+            self.stdout.write('Sin planes con workouts la semana pasada')
+            return
+
+        # Los datos ya están en memoria: el pool solo arma workbooks (CPU) y no abre conexiones a la BD.
+        if options['workers'] > 1 and len(reports) > 1:
+            with workbook_pool(options['workers']) as pool:
+                workbooks = dict(pool.map(build_weekly_workbook, reports, chunksize=8))
+        else:
+            workbooks = dict(map(build_weekly_workbook, reports))
+
+        for report in reports:
+            subject = f"Reporte Semanal: {report['plan_name']} para {report['client']}"
+            message = f"Adjunto el reporte semanal. Consistencia: {report['consistency']}%"
+            email = EmailMessage(subject, message, settings.EMAIL_HOST_USER, [report['trainer_email']])
+            email.attach(f'reporte_semanal_{start_of_week}.xlsx', workbooks[report['plan_id']], 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+            queue_email(email)
+            self.stdout.write(self.style.SUCCESS(f"Reporte encolado para {report['plan_name']}"))
+        # Los envía send_outbox en lotes por una sola conexión SMTP, respetando el límite de tasa del proveedor.
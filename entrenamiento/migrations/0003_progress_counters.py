@@ -0,0 +1,113 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:26
+
+from django.db import migrations, models
+from django.db.models import Count, Exists, IntegerField, Max, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def backfill_progress(apps, schema_editor):
+    # Carga inicial de los contadores; luego los mantiene entrenamiento.counters (ver también rebuild_progress).
+    Workout = apps.get_model("entrenamiento", "Workout")
+    WorkoutExercise = apps.get_model("entrenamiento", "WorkoutExercise")
+    ExerciseLog = apps.get_model("entrenamiento", "ExerciseLog")
+    TrainingPlan = apps.get_model("entrenamiento", "TrainingPlan")
+
+    def count(queryset):
+        counted = (
+            queryset.order_by()
+            .values("workout")
+            .annotate(n=Count("pk"))
+            .values("n")[:1]
+        )
+        return Coalesce(Subquery(counted, output_field=IntegerField()), 0)
+
+    logs = ExerciseLog.objects.filter(workout_exercise=OuterRef("pk"))
+    exercises = WorkoutExercise.objects.filter(workout=OuterRef("pk"))
+    last_log = ExerciseLog.objects.filter(
+        workout_exercise__workout=OuterRef("pk")
+    ).order_by("-date_completed")
+    Workout.objects.update(
+        exercise_count=count(exercises),
+        logged_count=count(exercises.filter(Exists(logs))),
+        completed_count=count(
+            exercises.filter(Exists(logs.filter(status="completed")))
+        ),
+        last_log_at=Subquery(last_log.values("date_completed")[:1]),
+    )
+    totals = TrainingPlan.objects.annotate(
+        e=Coalesce(Sum("workouts__exercise_count"), 0),
+        l=Coalesce(Sum("workouts__logged_count"), 0),
+        c=Coalesce(Sum("workouts__completed_count"), 0),
+        last=Max("workouts__last_log_at"),
+    ).values_list("pk", "e", "l", "c", "last")
+    for pk, e, l, c, last in totals.iterator():
+        TrainingPlan.objects.filter(pk=pk).update(
+            exercise_count=e, logged_count=l, completed_count=c, last_log_at=last
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("entrenamiento", "0002_workoutexercise_video_required"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="trainingplan",
+            name="completed_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="Ejercicios Completados"
+            ),
+        ),
+        migrations.AddField(
+            model_name="trainingplan",
+            name="exercise_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="Ejercicios"
+            ),
+        ),
+        migrations.AddField(
+            model_name="trainingplan",
+            name="last_log_at",
+            field=models.DateTimeField(
+                blank=True, editable=False, null=True, verbose_name="Último Registro"
+            ),
+        ),
+        migrations.AddField(
+            model_name="trainingplan",
+            name="logged_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="Ejercicios Registrados"
+            ),
+        ),
+        migrations.AddField(
+            model_name="workout",
+            name="completed_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="Ejercicios Completados"
+            ),
+        ),
+        migrations.AddField(
+            model_name="workout",
+            name="exercise_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="Ejercicios"
+            ),
+        ),
+        migrations.AddField(
+            model_name="workout",
+            name="last_log_at",
+            field=models.DateTimeField(
+                blank=True, editable=False, null=True, verbose_name="Último Registro"
+            ),
+        ),
+        migrations.AddField(
+            model_name="workout",
+            name="logged_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="Ejercicios Registrados"
+            ),
+        ),
+        migrations.RunPython(backfill_progress, migrations.RunPython.noop),
+    ]
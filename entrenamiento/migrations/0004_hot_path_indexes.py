@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:28
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("entrenamiento", "0003_progress_counters"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="exerciselog",
+            index=models.Index(
+                fields=["client", "date_completed"], name="exlog_client_date_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="exerciselog",
+            index=models.Index(
+                fields=["workout_exercise", "status"], name="exlog_wexercise_status_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="exerciselog",
+            index=models.Index(
+                fields=["workout_exercise", "date_completed"],
+                name="exlog_wexercise_date_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="exerciselog",
+            index=models.Index(
+                fields=[
+                    "client",
+                    "-weight_lifted_kg",
+                    "-reps_completed",
+                    "workout_exercise",
+                ],
+                name="exlog_client_best_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="workout",
+            index=models.Index(fields=["plan", "date"], name="workout_plan_date_idx"),
+        ),
+    ]
@@ -0,0 +1,107 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:34
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("entrenamiento", "0004_hot_path_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Task",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=100, verbose_name="Tarea")),
+                (
+                    "payload",
+                    models.JSONField(
+                        blank=True, default=dict, verbose_name="Parámetros"
+                    ),
+                ),
+                (
+                    "idempotency_key",
+                    models.CharField(
+                        blank=True,
+                        max_length=200,
+                        null=True,
+                        unique=True,
+                        verbose_name="Clave de Idempotencia",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pendiente"),
+                            ("running", "En Ejecución"),
+                            ("done", "Completada"),
+                            ("failed", "Fallida"),
+                        ],
+                        default="pending",
+                        max_length=20,
+                        verbose_name="Estado",
+                    ),
+                ),
+                (
+                    "attempts",
+                    models.PositiveIntegerField(default=0, verbose_name="Intentos"),
+                ),
+                (
+                    "max_attempts",
+                    models.PositiveIntegerField(
+                        default=5, verbose_name="Máximo de Intentos"
+                    ),
+                ),
+                (
+                    "run_at",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now, verbose_name="Ejecutar Desde"
+                    ),
+                ),
+                (
+                    "locked_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Tomada En"
+                    ),
+                ),
+                (
+                    "locked_by",
+                    models.CharField(blank=True, max_length=100, verbose_name="Worker"),
+                ),
+                (
+                    "last_error",
+                    models.TextField(blank=True, verbose_name="Último Error"),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="Creada En"),
+                ),
+                (
+                    "finished_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Terminada En"
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["run_at", "pk"],
+                "indexes": [
+                    models.Index(
+                        fields=["status", "run_at"], name="task_status_run_at_idx"
+                    )
+                ],
+            },
+        ),
+    ]
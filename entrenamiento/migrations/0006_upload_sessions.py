@@ -0,0 +1,99 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:39
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("entrenamiento", "0005_task_queue"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UploadSession",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "key",
+                    models.CharField(
+                        max_length=500, unique=True, verbose_name="Clave en el Bucket"
+                    ),
+                ),
+                (
+                    "upload_id",
+                    models.CharField(max_length=500, verbose_name="Upload ID"),
+                ),
+                (
+                    "file_name",
+                    models.CharField(max_length=255, verbose_name="Nombre del Archivo"),
+                ),
+                (
+                    "file_size",
+                    models.PositiveBigIntegerField(verbose_name="Tamaño (bytes)"),
+                ),
+                (
+                    "part_size",
+                    models.PositiveIntegerField(verbose_name="Tamaño de Parte (bytes)"),
+                ),
+                (
+                    "confirmed_parts",
+                    models.JSONField(
+                        blank=True, default=list, verbose_name="Partes Confirmadas"
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("active", "En Curso"),
+                            ("completed", "Completada"),
+                            ("aborted", "Abortada"),
+                        ],
+                        default="active",
+                        max_length=20,
+                        verbose_name="Estado",
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="Creada En"),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="Actualizada En"),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Usuario",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["user", "status", "file_name", "file_size"],
+                        name="upload_resume_idx",
+                    ),
+                    models.Index(
+                        fields=["status", "updated_at"],
+                        name="upload_status_updated_idx",
+                    ),
+                ],
+            },
+        ),
+    ]
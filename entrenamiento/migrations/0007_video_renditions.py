@@ -0,0 +1,61 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("entrenamiento", "0006_upload_sessions"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="exerciselog",
+            name="video_duration",
+            field=models.FloatField(
+                blank=True,
+                editable=False,
+                null=True,
+                verbose_name="Duración del Video (s)",
+            ),
+        ),
+        migrations.AddField(
+            model_name="exerciselog",
+            name="video_poster",
+            field=models.FileField(
+                blank=True,
+                editable=False,
+                null=True,
+                upload_to="logs/videos/",
+                verbose_name="Miniatura del Video",
+            ),
+        ),
+        migrations.AddField(
+            model_name="exerciselog",
+            name="video_rendition",
+            field=models.FileField(
+                blank=True,
+                editable=False,
+                null=True,
+                upload_to="logs/videos/",
+                verbose_name="Video 720p",
+            ),
+        ),
+        migrations.AddField(
+            model_name="exerciselog",
+            name="video_status",
+            field=models.CharField(
+                blank=True,
+                choices=[
+                    ("", "Sin Video"),
+                    ("pending", "Procesando"),
+                    ("ready", "Listo"),
+                    ("failed", "Error al Procesar"),
+                ],
+                default="",
+                max_length=20,
+                verbose_name="Estado del Video",
+            ),
+        ),
+    ]
@@ -0,0 +1,106 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:43
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("entrenamiento", "0007_video_renditions"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Outbox",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("subject", models.CharField(max_length=255, verbose_name="Asunto")),
+                ("body", models.TextField(blank=True, verbose_name="Cuerpo")),
+                (
+                    "content_subtype",
+                    models.CharField(
+                        default="plain", max_length=20, verbose_name="Tipo de Contenido"
+                    ),
+                ),
+                (
+                    "from_email",
+                    models.CharField(
+                        blank=True, max_length=255, verbose_name="Remitente"
+                    ),
+                ),
+                ("to", models.JSONField(default=list, verbose_name="Destinatarios")),
+                (
+                    "attachments",
+                    models.JSONField(blank=True, default=list, verbose_name="Adjuntos"),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pendiente"),
+                            ("sending", "Enviando"),
+                            ("sent", "Enviado"),
+                            ("failed", "Fallido"),
+                        ],
+                        default="pending",
+                        max_length=20,
+                        verbose_name="Estado",
+                    ),
+                ),
+                (
+                    "attempts",
+                    models.PositiveIntegerField(default=0, verbose_name="Intentos"),
+                ),
+                (
+                    "max_attempts",
+                    models.PositiveIntegerField(
+                        default=5, verbose_name="Máximo de Intentos"
+                    ),
+                ),
+                (
+                    "next_attempt_at",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now,
+                        verbose_name="Próximo Intento",
+                    ),
+                ),
+                (
+                    "locked_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Tomado En"
+                    ),
+                ),
+                (
+                    "last_error",
+                    models.TextField(blank=True, verbose_name="Último Error"),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="Creado En"),
+                ),
+                (
+                    "sent_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Enviado En"
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["status", "next_attempt_at"],
+                        name="outbox_status_next_idx",
+                    )
+                ],
+            },
+        ),
+    ]
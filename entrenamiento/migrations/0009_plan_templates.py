@@ -0,0 +1,197 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:54
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("entrenamiento", "0008_outbox"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PlanTemplate",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "name",
+                    models.CharField(
+                        max_length=200, verbose_name="Nombre de la Plantilla"
+                    ),
+                ),
+                ("notes", models.TextField(blank=True, verbose_name="Notas")),
+                (
+                    "progression",
+                    models.CharField(
+                        choices=[
+                            ("none", "Sin Progresión"),
+                            ("reps", "Repeticiones"),
+                            ("load", "Carga (RIR/RPE)"),
+                            ("sets", "Series"),
+                        ],
+                        default="none",
+                        max_length=20,
+                        verbose_name="Progresión Semanal",
+                    ),
+                ),
+                (
+                    "progression_step",
+                    models.PositiveIntegerField(
+                        default=1, verbose_name="Incremento por Semana"
+                    ),
+                ),
+                (
+                    "deload_every",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Descarga Cada N Semanas (0 = nunca)"
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="Creada En"),
+                ),
+                (
+                    "trainer",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="plan_templates",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Entrenador",
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="TemplateWorkout",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "week_number",
+                    models.PositiveIntegerField(
+                        default=1, verbose_name="Número de Semana"
+                    ),
+                ),
+                (
+                    "day_of_week",
+                    models.PositiveIntegerField(
+                        verbose_name="Día de la Semana (1=Lunes)"
+                    ),
+                ),
+                (
+                    "title",
+                    models.CharField(
+                        max_length=200, verbose_name="Título del Entrenamiento"
+                    ),
+                ),
+                (
+                    "template",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="workouts",
+                        to="entrenamiento.plantemplate",
+                        verbose_name="Plantilla",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["week_number", "day_of_week"],
+            },
+        ),
+        migrations.CreateModel(
+            name="TemplateExercise",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("sets", models.PositiveIntegerField(verbose_name="Series")),
+                (
+                    "reps_target",
+                    models.CharField(
+                        max_length=50, verbose_name="Repeticiones Objetivo"
+                    ),
+                ),
+                (
+                    "rir_target",
+                    models.PositiveIntegerField(
+                        blank=True, null=True, verbose_name="RIR Objetivo"
+                    ),
+                ),
+                (
+                    "rpe_target",
+                    models.PositiveIntegerField(
+                        blank=True, null=True, verbose_name="RPE Objetivo"
+                    ),
+                ),
+                (
+                    "rest_period_seconds",
+                    models.PositiveIntegerField(
+                        default=60, verbose_name="Descanso (segundos)"
+                    ),
+                ),
+                ("notes", models.TextField(blank=True, verbose_name="Notas")),
+                (
+                    "order",
+                    models.PositiveIntegerField(
+                        default=1, verbose_name="Orden en el Workout"
+                    ),
+                ),
+                (
+                    "video_required",
+                    models.BooleanField(default=False, verbose_name="Video Requerido"),
+                ),
+                (
+                    "exercise",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.PROTECT,
+                        to="entrenamiento.exercise",
+                        verbose_name="Ejercicio",
+                    ),
+                ),
+                (
+                    "workout",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="exercises",
+                        to="entrenamiento.templateworkout",
+                        verbose_name="Entrenamiento",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["order"],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="templateworkout",
+            constraint=models.UniqueConstraint(
+                fields=("template", "week_number", "day_of_week"),
+                name="template_workout_day_uniq",
+            ),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("entrenamiento", "0009_plan_templates"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="workout",
+            name="version",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="Versión"
+            ),
+        ),
+    ]
@@ -0,0 +1,94 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:59
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("entrenamiento", "0010_workout_version"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PersonalRecord",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "record_type",
+                    models.CharField(
+                        choices=[
+                            ("e1rm", "1RM Estimado"),
+                            ("weight", "Mejor Peso a N Reps"),
+                            ("volume", "Mejor Volumen"),
+                        ],
+                        max_length=10,
+                        verbose_name="Tipo de Récord",
+                    ),
+                ),
+                (
+                    "reps",
+                    models.PositiveIntegerField(default=0, verbose_name="Repeticiones"),
+                ),
+                ("value", models.FloatField(verbose_name="Valor")),
+                (
+                    "weight_lifted_kg",
+                    models.FloatField(verbose_name="Peso Levantado (kg)"),
+                ),
+                (
+                    "reps_completed",
+                    models.PositiveIntegerField(
+                        verbose_name="Repeticiones Completadas"
+                    ),
+                ),
+                ("achieved_at", models.DateTimeField(verbose_name="Logrado En")),
+                (
+                    "client",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="personal_records",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Cliente",
+                    ),
+                ),
+                (
+                    "exercise",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="entrenamiento.exercise",
+                        verbose_name="Ejercicio",
+                    ),
+                ),
+                (
+                    "log",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="entrenamiento.exerciselog",
+                        verbose_name="Registro",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("client", "exercise", "record_type", "reps"),
+                        name="personal_record_uniq",
+                    )
+                ],
+            },
+        ),
+    ]
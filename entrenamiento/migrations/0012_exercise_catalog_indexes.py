@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("entrenamiento", "0011_personal_records"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="exercise",
+            index=models.Index(
+                fields=["muscle_group", "name"], name="exercise_muscle_name_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="exercise",
+            index=models.Index(
+                fields=["equipment", "name"], name="exercise_equipment_name_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("entrenamiento", "0012_exercise_catalog_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SlowQuery",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("fingerprint", models.CharField(max_length=32, verbose_name="Huella")),
+                ("sql", models.TextField(verbose_name="SQL Normalizado")),
+                ("params", models.TextField(blank=True, verbose_name="Parámetros")),
+                ("duration_ms", models.FloatField(verbose_name="Duración (ms)")),
+                ("origin", models.CharField(max_length=200, verbose_name="Origen")),
+                ("stack", models.TextField(blank=True, verbose_name="Traza")),
+                ("explain", models.TextField(blank=True, verbose_name="EXPLAIN")),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        auto_now_add=True, db_index=True, verbose_name="Registrada En"
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["fingerprint", "created_at"],
+                        name="slow_query_fingerprint_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("entrenamiento", "0013_slow_queries"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="outbox",
+            name="alternatives",
+            field=models.JSONField(
+                blank=True, default=list, verbose_name="Alternativas"
+            ),
+        ),
+        migrations.AddField(
+            model_name="outbox",
+            name="bcc",
+            field=models.JSONField(
+                blank=True, default=list, verbose_name="Copia Oculta"
+            ),
+        ),
+        migrations.AddField(
+            model_name="outbox",
+            name="cc",
+            field=models.JSONField(blank=True, default=list, verbose_name="Copia"),
+        ),
+        migrations.AddField(
+            model_name="outbox",
+            name="headers",
+            field=models.JSONField(
+                blank=True, default=dict, verbose_name="Encabezados"
+            ),
+        ),
+        migrations.AddField(
+            model_name="outbox",
+            name="reply_to",
+            field=models.JSONField(
+                blank=True, default=list, verbose_name="Responder A"
+            ),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("entrenamiento", "0014_outbox_envelope"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="uploadsession",
+            name="fingerprint",
+            field=models.CharField(
+                blank=True, max_length=128, verbose_name="Huella del Archivo"
+            ),
+        ),
+    ]
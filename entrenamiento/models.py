@@ -1,10 +1,16 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 from django.utils.translation import gettext_lazy as _
 from django.utils.crypto import get_random_string
+from django.utils import timezone
 import datetime
 from datetime import timedelta
 
+def workout_date(start_date, week_number, day_of_week):
+    # Fecha de un workout dentro del plan: semana 1, día 1 = start_date.
+    return start_date + timedelta(days=(week_number - 1) * 7 + (day_of_week - 1))
+
+
 class Exercise(models.Model):
     name = models.CharField(max_length=100, unique=True, verbose_name=_("Nombre del Ejercicio"))
     description = models.TextField(blank=True, verbose_name=_("Descripción"))
@@ -12,6 +18,13 @@ class Exercise(models.Model):
     muscle_group = models.CharField(max_length=100, blank=True, verbose_name=_("Grupo Muscular"))
     equipment = models.CharField(max_length=100, blank=True, verbose_name=_("Equipamiento"))
 
+    class Meta:
+        # Autocompletado (ver catalog.py): prefijo de nombre dentro de un grupo muscular o equipamiento, ya ordenado.
+        indexes = [
+            models.Index(fields=['muscle_group', 'name'], name='exercise_muscle_name_idx'),
+            models.Index(fields=['equipment', 'name'], name='exercise_equipment_name_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -43,6 +56,11 @@ class TrainingPlan(models.Model):
     end_date = models.DateField(verbose_name=_("Fecha de Fin"))
     status = models.CharField(max_length=20, default='active', choices=[('active', 'Activo'), ('completed', 'Completado')], verbose_name=_("Estado"))
     notes = models.TextField(blank=True, verbose_name=_("Notas"))
+    # Contadores de progreso desnormalizados (mantenidos por entrenamiento.counters; reconstruir con rebuild_progress)
+    exercise_count = models.PositiveIntegerField(default=0, editable=False, verbose_name=_("Ejercicios"))
+    logged_count = models.PositiveIntegerField(default=0, editable=False, verbose_name=_("Ejercicios Registrados"))
+    completed_count = models.PositiveIntegerField(default=0, editable=False, verbose_name=_("Ejercicios Completados"))
+    last_log_at = models.DateTimeField(null=True, blank=True, editable=False, verbose_name=_("Último Registro"))
 
     def __str__(self):
         return f"Plan '{self.name}' para {self.client.username}"
@@ -53,23 +71,40 @@ class Workout(models.Model):
     day_of_week = models.PositiveIntegerField(verbose_name=_("Día de la Semana (1=Lunes)"))
     title = models.CharField(max_length=200, verbose_name=_("Título del Entrenamiento"))
     date = models.DateField(null=True, blank=True, verbose_name=_("Fecha del Entrenamiento"))
+    # Contadores de progreso desnormalizados (mantenidos por entrenamiento.counters)
+    exercise_count = models.PositiveIntegerField(default=0, editable=False, verbose_name=_("Ejercicios"))
+    logged_count = models.PositiveIntegerField(default=0, editable=False, verbose_name=_("Ejercicios Registrados"))
+    completed_count = models.PositiveIntegerField(default=0, editable=False, verbose_name=_("Ejercicios Completados"))
+    last_log_at = models.DateTimeField(null=True, blank=True, editable=False, verbose_name=_("Último Registro"))
+    # Versión para concurrencia optimista del editor de ejercicios (ver editor.py): sube con cada cambio de sus ejercicios
+    version = models.PositiveIntegerField(default=0, editable=False, verbose_name=_("Versión"))
+
+    class Meta:
+        indexes = [
+            # Sesiones próximas / semanales de un plan (dashboards, weekly_reports)
+            models.Index(fields=['plan', 'date'], name='workout_plan_date_idx'),
+        ]
 
     def __str__(self):
         return f"{self.plan.name} - Semana {self.week_number}, Día {self.day_of_week}: {self.title}"
 
     def save(self, *args, **kwargs):
         if not self.date and self.plan and self.plan.start_date:
-            delta_days = (self.week_number - 1) * 7 + (self.day_of_week - 1)
-            self.date = self.plan.start_date + timedelta(days=delta_days)
+            self.date = workout_date(self.plan.start_date, self.week_number, self.day_of_week)
         super().save(*args, **kwargs)
 
     def is_complete(self):
-        # Verifica si todos los ejercicios tienen al menos un log
-        exercises = self.exercises.all()
-        for ex in exercises:
-            if not ExerciseLog.objects.filter(workout_exercise=ex).exists():
-                return False
-        return True
+        # Verifica si todos los ejercicios tienen al menos un log, en una sola query (antes era un .exists() por ejercicio)
+        if hasattr(self, 'exercise_logged'):
+            return self.exercise_logged == self.exercise_total
+        logs = ExerciseLog.objects.filter(workout_exercise=models.OuterRef('pk'))
+        return not self.exercises.filter(~models.Exists(logs)).exists()
+
+    def get_completion_percentage(self):
+        # Lee los contadores desnormalizados: no requiere queries adicionales
+        if not self.exercise_count:
+            return 0
+        return round(self.completed_count / self.exercise_count * 100)
 
 class WorkoutExercise(models.Model):
     workout = models.ForeignKey(Workout, related_name='exercises', on_delete=models.CASCADE, verbose_name=_("Entrenamiento"))
@@ -89,9 +124,75 @@ class WorkoutExercise(models.Model):
     def __str__(self):
         return f"{self.sets}x{self.reps_target} de {self.exercise.name}"
 
+    def save(self, *args, **kwargs):
+        # Atómico para que los contadores de progreso (señal post_save) se actualicen en la misma transacción
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
     def get_last_log(self):
         return ExerciseLog.objects.filter(workout_exercise=self).order_by('-date_completed').first()
 
+
+class PlanTemplate(models.Model):
+    # Plantilla reutilizable (workouts + ejercicios) que se instancia como TrainingPlan para uno o varios clientes (ver plans.py).
+    PROGRESSION_CHOICES = [
+        ('none', 'Sin Progresión'),
+        ('reps', 'Repeticiones'),
+        ('load', 'Carga (RIR/RPE)'),
+        ('sets', 'Series'),
+    ]
+    trainer = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name='plan_templates',
+        on_delete=models.CASCADE,
+        verbose_name=_("Entrenador")
+    )
+    name = models.CharField(max_length=200, verbose_name=_("Nombre de la Plantilla"))
+    notes = models.TextField(blank=True, verbose_name=_("Notas"))
+    # Periodización aplicada semana a semana al instanciar
+    progression = models.CharField(max_length=20, choices=PROGRESSION_CHOICES, default='none', verbose_name=_("Progresión Semanal"))
+    progression_step = models.PositiveIntegerField(default=1, verbose_name=_("Incremento por Semana"))
+    deload_every = models.PositiveIntegerField(default=0, verbose_name=_("Descarga Cada N Semanas (0 = nunca)"))
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name=_("Creada En"))
+
+    def __str__(self):
+        return f"Plantilla '{self.name}'"
+
+
+class TemplateWorkout(models.Model):
+    template = models.ForeignKey(PlanTemplate, related_name='workouts', on_delete=models.CASCADE, verbose_name=_("Plantilla"))
+    week_number = models.PositiveIntegerField(default=1, verbose_name=_("Número de Semana"))
+    day_of_week = models.PositiveIntegerField(verbose_name=_("Día de la Semana (1=Lunes)"))
+    title = models.CharField(max_length=200, verbose_name=_("Título del Entrenamiento"))
+
+    class Meta:
+        ordering = ['week_number', 'day_of_week']
+        constraints = [
+            models.UniqueConstraint(fields=['template', 'week_number', 'day_of_week'], name='template_workout_day_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.template.name} - Semana {self.week_number}, Día {self.day_of_week}: {self.title}"
+
+
+class TemplateExercise(models.Model):
+    workout = models.ForeignKey(TemplateWorkout, related_name='exercises', on_delete=models.CASCADE, verbose_name=_("Entrenamiento"))
+    exercise = models.ForeignKey(Exercise, on_delete=models.PROTECT, verbose_name=_("Ejercicio"))
+    sets = models.PositiveIntegerField(verbose_name=_("Series"))
+    reps_target = models.CharField(max_length=50, verbose_name=_("Repeticiones Objetivo"))
+    rir_target = models.PositiveIntegerField(null=True, blank=True, verbose_name=_("RIR Objetivo"))
+    rpe_target = models.PositiveIntegerField(null=True, blank=True, verbose_name=_("RPE Objetivo"))
+    rest_period_seconds = models.PositiveIntegerField(default=60, verbose_name=_("Descanso (segundos)"))
+    notes = models.TextField(blank=True, verbose_name=_("Notas"))
+    order = models.PositiveIntegerField(default=1, verbose_name=_("Orden en el Workout"))
+    video_required = models.BooleanField(default=False, verbose_name=_("Video Requerido"))
+
+    class Meta:
+        ordering = ['order']
+
+    def __str__(self):
+        return f"{self.sets}x{self.reps_target} de {self.exercise.name}"
+
 class ExerciseLog(models.Model):
     STATUS_CHOICES = [
         ('completed', 'Completado'),
@@ -117,6 +218,210 @@ class ExerciseLog(models.Model):
         verbose_name=_("Video de Registro")
     )
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='completed', verbose_name=_("Estado"))
+    # Versión liviana del video generada en el servidor (ver video.py): 720p H.264, póster y duración.
+    VIDEO_STATUS_CHOICES = [
+        ('', 'Sin Video'),
+        ('pending', 'Procesando'),
+        ('ready', 'Listo'),
+        ('failed', 'Error al Procesar'),
+    ]
+    video_status = models.CharField(max_length=20, choices=VIDEO_STATUS_CHOICES, default='', blank=True, verbose_name=_("Estado del Video"))
+    video_rendition = models.FileField(upload_to='logs/videos/', null=True, blank=True, editable=False, verbose_name=_("Video 720p"))
+    video_poster = models.FileField(upload_to='logs/videos/', null=True, blank=True, editable=False, verbose_name=_("Miniatura del Video"))
+    video_duration = models.FloatField(null=True, blank=True, editable=False, verbose_name=_("Duración del Video (s)"))
+
+    class Meta:
+        indexes = [
+            # Historial de un cliente por fecha (client_logs, client_statistics, dashboards)
+            models.Index(fields=['client', 'date_completed'], name='exlog_client_date_idx'),
+            # Completitud por ejercicio del plan y estado (completion.py, counters.py)
+            models.Index(fields=['workout_exercise', 'status'], name='exlog_wexercise_status_idx'),
+            # Último log de un ejercicio del plan (prefetch_exercises, last_log_at)
+            models.Index(fields=['workout_exercise', 'date_completed'], name='exlog_wexercise_date_idx'),
+            # "Mejor log" de un cliente: recorre sus logs ya ordenados por peso/reps y filtra el ejercicio desde el índice
+            models.Index(fields=['client', '-weight_lifted_kg', '-reps_completed', 'workout_exercise'], name='exlog_client_best_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        # Atómico para que los contadores de progreso (señal post_save) se actualicen en la misma transacción
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    @property
+    def video_playback_url(self):
+        # La versión 720p cuando ya está procesada; mientras tanto (o si falló) el archivo original.
+        if self.video_rendition:
+            return self.video_rendition.url
+        return self.video_log.url if self.video_log else ''
+
+    @property
+    def video_poster_url(self):
+        return self.video_poster.url if self.video_poster else ''
+
+    def __str__(self):
+        return f"Registro de {self.client.username} para {self.workout_exercise.exercise.name} el {self.date_completed.strftime('%Y-%m-%d')}"
+
+class PersonalRecord(models.Model):
+    # Récords materializados por (cliente, ejercicio, tipo[, reps]); se mantienen al guardar/borrar logs (ver records.py).
+    RECORD_TYPES = [
+        ('e1rm', '1RM Estimado'),
+        ('weight', 'Mejor Peso a N Reps'),
+        ('volume', 'Mejor Volumen'),
+    ]
+    client = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name='personal_records',
+        on_delete=models.CASCADE,
+        verbose_name=_("Cliente")
+    )
+    exercise = models.ForeignKey(Exercise, on_delete=models.CASCADE, verbose_name=_("Ejercicio"))
+    record_type = models.CharField(max_length=10, choices=RECORD_TYPES, verbose_name=_("Tipo de Récord"))
+    # Solo para 'weight' (récord a esas repeticiones); 0 en los demás tipos
+    reps = models.PositiveIntegerField(default=0, verbose_name=_("Repeticiones"))
+    value = models.FloatField(verbose_name=_("Valor"))
+    # Log que marcó el récord; queda en NULL si se borra y records.py lo recalcula en la misma transacción
+    log = models.ForeignKey('ExerciseLog', null=True, blank=True, on_delete=models.SET_NULL, related_name='+', verbose_name=_("Registro"))
+    weight_lifted_kg = models.FloatField(verbose_name=_("Peso Levantado (kg)"))
+    reps_completed = models.PositiveIntegerField(verbose_name=_("Repeticiones Completadas"))
+    achieved_at = models.DateTimeField(verbose_name=_("Logrado En"))
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['client', 'exercise', 'record_type', 'reps'], name='personal_record_uniq'),
+        ]
+
+    def __str__(self):
+        label = f"{self.reps}RM" if self.record_type == 'weight' else self.get_record_type_display()
+        return f"{label} de {self.client} en {self.exercise}: {self.value}"
+
+
+class Task(models.Model):
+    # Cola de tareas en base de datos (ver tasks.py): el request solo inserta la fila y el worker (run_tasks) la ejecuta.
+    STATUS_CHOICES = [
+        ('pending', 'Pendiente'),
+        ('running', 'En Ejecución'),
+        ('done', 'Completada'),
+        ('failed', 'Fallida'),
+    ]
+    name = models.CharField(max_length=100, verbose_name=_("Tarea"))
+    payload = models.JSONField(default=dict, blank=True, verbose_name=_("Parámetros"))
+    # Evita encolar dos veces el mismo trabajo (p. ej. el reporte diario de un workout); NULL = sin deduplicación.
+    idempotency_key = models.CharField(max_length=200, unique=True, null=True, blank=True, verbose_name=_("Clave de Idempotencia"))
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', verbose_name=_("Estado"))
+    attempts = models.PositiveIntegerField(default=0, verbose_name=_("Intentos"))
+    max_attempts = models.PositiveIntegerField(default=5, verbose_name=_("Máximo de Intentos"))
+    run_at = models.DateTimeField(default=timezone.now, verbose_name=_("Ejecutar Desde"))
+    locked_at = models.DateTimeField(null=True, blank=True, verbose_name=_("Tomada En"))
+    locked_by = models.CharField(max_length=100, blank=True, verbose_name=_("Worker"))
+    last_error = models.TextField(blank=True, verbose_name=_("Último Error"))
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name=_("Creada En"))
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name=_("Terminada En"))
+
+    class Meta:
+        ordering = ['run_at', 'pk']
+        indexes = [
+            # Lo que consulta el worker en cada vuelta: pendientes cuyo run_at ya pasó, en orden
+            models.Index(fields=['status', 'run_at'], name='task_status_run_at_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} [{self.get_status_display()}] #{self.pk}"
+
+
+class UploadSession(models.Model):
+    # Subida multipart de un video en curso (ver uploads.py): permite reanudar desde la primera parte que falta.
+    STATUS_CHOICES = [
+        ('active', 'En Curso'),
+        ('completed', 'Completada'),
+        ('aborted', 'Abortada'),
+    ]
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, verbose_name=_("Usuario"))
+    key = models.CharField(max_length=500, unique=True, verbose_name=_("Clave en el Bucket"))
+    upload_id = models.CharField(max_length=500, verbose_name=_("Upload ID"))
+    file_name = models.CharField(max_length=255, verbose_name=_("Nombre del Archivo"))
+    file_size = models.PositiveBigIntegerField(verbose_name=_("Tamaño (bytes)"))
+    part_size = models.PositiveIntegerField(verbose_name=_("Tamaño de Parte (bytes)"))
+    # Huella del contenido que manda el navegador (lastModified + hash del primer y último bloque): nombre y tamaño solos
+    # no distinguen dos versiones del mismo video.
+    fingerprint = models.CharField(max_length=128, blank=True, verbose_name=_("Huella del Archivo"))
+    # Partes confirmadas por S3 (ListParts): lista de {'PartNumber', 'ETag', 'Size'}
+    confirmed_parts = models.JSONField(default=list, blank=True, verbose_name=_("Partes Confirmadas"))
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='active', verbose_name=_("Estado"))
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name=_("Creada En"))
+    updated_at = models.DateTimeField(auto_now=True, verbose_name=_("Actualizada En"))
+
+    class Meta:
+        indexes = [
+            # Buscar la sesión reanudable de un usuario para el mismo archivo
+            models.Index(fields=['user', 'status', 'file_name', 'file_size'], name='upload_resume_idx'),
+            # Purga de sesiones viejas (purge_upload_sessions)
+            models.Index(fields=['status', 'updated_at'], name='upload_status_updated_idx'),
+        ]
+
+    @property
+    def part_count(self):
+        return max(1, -(-self.file_size // self.part_size))
+
+    def __str__(self):
+        return f"{self.file_name} ({self.get_status_display()}) de {self.user}"
+
+
+class Outbox(models.Model):
+    # Correo pendiente de envío (ver outbox.py): se guarda ya renderizado (adjuntos incluidos) y send_outbox lo envía en
+    # lotes por una sola conexión SMTP. Un reintento reenvía estos mismos bytes sin volver a generar el Excel.
+    STATUS_CHOICES = [
+        ('pending', 'Pendiente'),
+        ('sending', 'Enviando'),
+        ('sent', 'Enviado'),
+        ('failed', 'Fallido'),
+    ]
+    subject = models.CharField(max_length=255, verbose_name=_("Asunto"))
+    body = models.TextField(blank=True, verbose_name=_("Cuerpo"))
+    content_subtype = models.CharField(max_length=20, default='plain', verbose_name=_("Tipo de Contenido"))
+    from_email = models.CharField(max_length=255, blank=True, verbose_name=_("Remitente"))
+    to = models.JSONField(default=list, verbose_name=_("Destinatarios"))
+    cc = models.JSONField(default=list, blank=True, verbose_name=_("Copia"))
+    bcc = models.JSONField(default=list, blank=True, verbose_name=_("Copia Oculta"))
+    reply_to = models.JSONField(default=list, blank=True, verbose_name=_("Responder A"))
+    headers = models.JSONField(default=dict, blank=True, verbose_name=_("Encabezados"))
+    # Lista de {'content', 'mimetype'}: versiones alternativas del cuerpo (p. ej. HTML de EmailMultiAlternatives)
+    alternatives = models.JSONField(default=list, blank=True, verbose_name=_("Alternativas"))
+    # Lista de {'filename', 'mimetype', 'content'} con el contenido en base64
+    attachments = models.JSONField(default=list, blank=True, verbose_name=_("Adjuntos"))
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', verbose_name=_("Estado"))
+    attempts = models.PositiveIntegerField(default=0, verbose_name=_("Intentos"))
+    max_attempts = models.PositiveIntegerField(default=5, verbose_name=_("Máximo de Intentos"))
+    next_attempt_at = models.DateTimeField(default=timezone.now, verbose_name=_("Próximo Intento"))
+    locked_at = models.DateTimeField(null=True, blank=True, verbose_name=_("Tomado En"))
+    last_error = models.TextField(blank=True, verbose_name=_("Último Error"))
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name=_("Creado En"))
+    sent_at = models.DateTimeField(null=True, blank=True, verbose_name=_("Enviado En"))
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_status_next_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} → {', '.join(self.to)} [{self.get_status_display()}]"
+
+
+class SlowQuery(models.Model):
+    # Query que superó SLOW_QUERY_THRESHOLD_MS (ver slowlog.py). fingerprint agrupa las ejecuciones de una misma forma de
+    # SQL; el EXPLAIN se guarda solo en la primera ocurrencia de cada huella.
+    fingerprint = models.CharField(max_length=32, verbose_name=_("Huella"))
+    sql = models.TextField(verbose_name=_("SQL Normalizado"))
+    params = models.TextField(blank=True, verbose_name=_("Parámetros"))
+    duration_ms = models.FloatField(verbose_name=_("Duración (ms)"))
+    origin = models.CharField(max_length=200, verbose_name=_("Origen"))
+    stack = models.TextField(blank=True, verbose_name=_("Traza"))
+    explain = models.TextField(blank=True, verbose_name=_("EXPLAIN"))
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True, verbose_name=_("Registrada En"))
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['fingerprint', 'created_at'], name='slow_query_fingerprint_idx'),
+        ]
 
     def __str__(self):
-        return f"Registro de {self.client.username} para {self.workout_exercise.exercise.name} el {self.date_completed.strftime('%Y-%m-%d')}"
\ No newline at end of file
+        return f"{self.duration_ms:.0f} ms en {self.origin}"
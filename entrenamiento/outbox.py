@@ -0,0 +1,148 @@
+import base64
+import logging
+import smtplib
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Outbox
+
+logger = logging.getLogger(__name__)
+
+# ====================================================================================================================
+# Bandeja de Salida de Correo
+# ====================================================================================================================
+# create_client, el reporte diario y weekly_reports enviaban cada correo con su propia conexión: un handshake TLS con
+# smtp.gmail.com (~1 s) por mensaje y límites de tasa del proveedor durante el lote semanal. Ahora solo guardan el mensaje
+# ya renderizado en Outbox (queue_email) y el comando send_outbox lo drena:
+#   - Lotes de OUTBOX_BATCH_SIZE por una sola conexión (get_connection().open() una vez, send_messages por mensaje para
+#     saber cuál falló), con una pausa OUTBOX_THROTTLE_SECONDS entre mensajes para no pasar el límite del proveedor.
+#   - Un fallo reprograma solo ese mensaje con backoff exponencial; los adjuntos ya están guardados, no se regeneran.
+#   - Si el servidor corta la conexión a mitad de lote, se reabre y se sigue.
+# Se guarda el sobre completo (to, cc, bcc, reply_to, encabezados, alternativas HTML y adjuntos): el mensaje enviado es el
+# mismo que se encoló. Lo que no se puede guardar fielmente (adjuntos MIME armados a mano) se rechaza al encolar.
+# El contenido (cuerpo, alternativas, adjuntos) solo hace falta hasta enviarlo: al marcarse 'sent' se vacía, así la tabla
+# no acumula contraseñas temporales ni reportes. Quedan asunto, destinatarios y fechas para auditar.
+# ====================================================================================================================
+
+OUTBOX_BATCH_SIZE = getattr(settings, 'OUTBOX_BATCH_SIZE', 50)
+OUTBOX_THROTTLE = getattr(settings, 'OUTBOX_THROTTLE_SECONDS', 0.0)
+OUTBOX_LOCK_TIMEOUT = getattr(settings, 'OUTBOX_LOCK_TIMEOUT_SECONDS', 600)
+OUTBOX_RETRY_BASE = getattr(settings, 'OUTBOX_RETRY_BASE_SECONDS', 60)
+OUTBOX_RETRY_MAX = 3600
+
+
+def queue_email(message):
+    attachments = []
+    for attachment in message.attachments:
+        if not isinstance(attachment, tuple):
+            raise ValueError(f'Adjunto MIME no soportado en la bandeja de salida: {type(attachment).__name__}')
+        filename, content, mimetype = attachment
+        attachments.append({
+            'filename': filename,
+            'mimetype': mimetype,
+            'content': base64.b64encode(content if isinstance(content, bytes) else content.encode()).decode(),
+        })
+    return Outbox.objects.create(
+        subject=message.subject,
+        body=message.body,
+        content_subtype=message.content_subtype,
+        from_email=message.from_email or '',
+        to=list(message.to),
+        cc=list(message.cc),
+        bcc=list(message.bcc),
+        reply_to=list(message.reply_to),
+        headers=dict(message.extra_headers),
+        alternatives=[
+            {'content': content, 'mimetype': mimetype} for content, mimetype in getattr(message, 'alternatives', [])
+        ],
+        attachments=attachments,
+    )
+
+
+def build_message(row, connection=None):
+    message = EmailMultiAlternatives(
+        row.subject, row.body, row.from_email or None, row.to, bcc=row.bcc, connection=connection, cc=row.cc,
+        reply_to=row.reply_to, headers=row.headers,
+    )
+    message.content_subtype = row.content_subtype
+    for alternative in row.alternatives:
+        message.attach_alternative(alternative['content'], alternative['mimetype'])
+    for attachment in row.attachments:
+        message.attach(attachment['filename'], base64.b64decode(attachment['content']), attachment['mimetype'])
+    return message
+
+
+def claim_batch(limit):
+    now = timezone.now()
+    stale = now - timedelta(seconds=OUTBOX_LOCK_TIMEOUT)
+    with transaction.atomic():
+        ready = Outbox.objects.filter(Q(status='pending', next_attempt_at__lte=now) | Q(status='sending', locked_at__lt=stale))
+        rows = list(ready.select_for_update(skip_locked=True).order_by('next_attempt_at', 'pk')[:limit])
+        if rows:
+            Outbox.objects.filter(pk__in=[row.pk for row in rows]).update(status='sending', locked_at=now)
+            for row in rows:
+                row.status, row.locked_at = 'sending', now
+    return rows
+
+
+def _mark_failed(row, error):
+    row.attempts += 1
+    row.last_error = error
+    row.locked_at = None
+    if row.attempts >= row.max_attempts:
+        row.status = 'failed'
+        logger.error('Correo #%s fallido tras %s intentos: %s', row.pk, row.attempts, error)
+    else:
+        row.status = 'pending'
+        row.next_attempt_at = timezone.now() + timedelta(seconds=min(OUTBOX_RETRY_BASE * 2 ** (row.attempts - 1), OUTBOX_RETRY_MAX))
+    row.save(update_fields=['attempts', 'last_error', 'locked_at', 'status', 'next_attempt_at'])
+
+
+def send_batch(batch_size=OUTBOX_BATCH_SIZE, throttle=OUTBOX_THROTTLE):
+    # Envía un lote por una única conexión. Devuelve (enviados, fallidos).
+    rows = claim_batch(batch_size)
+    if not rows:
+        return 0, 0
+
+    sent = failed = 0
+    connection = get_connection()
+    try:
+        connection.open()
+        for index, row in enumerate(rows):
+            if index and throttle:
+                time.sleep(throttle)
+            try:
+                try:
+                    connection.send_messages([build_message(row, connection)])
+                except smtplib.SMTPServerDisconnected:
+                    # El servidor cerró la sesión (timeout, límite por conexión): se reabre una vez y se reintenta.
+                    connection.close()
+                    connection.open()
+                    connection.send_messages([build_message(row, connection)])
+            except Exception as e:
+                failed += 1
+                _mark_failed(row, f'{type(e).__name__}: {e}')
+                continue
+            sent += 1
+            row.attempts += 1
+            row.status = 'sent'
+            row.sent_at = timezone.now()
+            row.locked_at = None
+            row.last_error = ''
+            row.body, row.alternatives, row.attachments = '', [], []
+            row.save(update_fields=['attempts', 'status', 'sent_at', 'locked_at', 'last_error', 'body', 'alternatives', 'attachments'])
+    except Exception as e:
+        # No se pudo ni abrir la conexión: todo el lote vuelve a la cola.
+        for row in rows:
+            if row.status == 'sending':
+                _mark_failed(row, f'{type(e).__name__}: {e}')
+                failed += 1
+    finally:
+        connection.close()
+    return sent, failed
@@ -0,0 +1,147 @@
+import re
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import connection, transaction
+
+from .analytics import invalidate_users_on_commit
+from .models import PlanTemplate, TemplateExercise, TemplateWorkout, TrainingPlan, Workout, WorkoutExercise, workout_date
+
+# ====================================================================================================================
+# Plantillas de Plan y Generación Masiva
+# ====================================================================================================================
+# Armar un plan de 12 semanas × 5 días × 6 ejercicios eran ~400 POST de add_workout/add_exercise, y cada Workout.save()
+# calculaba su fecha y cada WorkoutExercise.save() disparaba las señales de contadores y caché. Aquí una plantilla
+# (PlanTemplate → TemplateWorkout → TemplateExercise) se instancia para uno o varios clientes en una sola transacción:
+#   - Fechas, prescripción de cada semana (periodización) y contadores desnormalizados se calculan en Python.
+#   - Workouts y WorkoutExercise se insertan con bulk_create: un puñado de queries en vez de una (o varias) por fila.
+#   - bulk_create no dispara señales, así que aquí mismo se dejan los contadores correctos (exercise_count) y se invalida
+#     la caché de analíticas de los usuarios afectados.
+# MySQL no devuelve los ids de un INSERT múltiple; en ese caso se leen por la clave natural (plan, semana, día), que es
+# única en un plan recién generado.
+# ====================================================================================================================
+
+BULK_BATCH_SIZE = 500
+
+EXERCISE_FIELDS = ('exercise_id', 'sets', 'reps_target', 'rir_target', 'rpe_target', 'rest_period_seconds', 'notes', 'order', 'video_required')
+
+
+def _bulk_insert(model, objs, key_fields):
+    model.objects.bulk_create(objs, batch_size=BULK_BATCH_SIZE)
+    if not objs or objs[0].pk is not None:
+        return objs
+    parent = key_fields[0]
+    ids = {
+        tuple(row[:-1]): row[-1]
+        for row in model.objects.filter(**{f'{parent}__in': {getattr(obj, parent) for obj in objs}}).values_list(*key_fields, 'pk')
+    }
+    for obj in objs:
+        obj.pk = ids[tuple(getattr(obj, field) for field in key_fields)]
+    return objs
+
+
+def _shift_numbers(text, delta):
+    # "8-12" + 1 -> "9-13"; textos sin números ("AMRAP") quedan igual.
+    return re.sub(r'\d+', lambda match: str(max(int(match.group()) + delta, 1)), text)
+
+
+def week_prescription(template, values, week):
+    # Prescripción de un ejercicio para la semana `week` (1 = primera) según la periodización de la plantilla.
+    values = dict(values)
+    deload_every = template.deload_every
+    if deload_every and week % deload_every == 0:
+        # Semana de descarga: la mitad de las series y más margen (RIR/RPE), sin avanzar la progresión.
+        values['sets'] = max(values['sets'] // 2, 1)
+        if values['rir_target'] is not None:
+            values['rir_target'] += 2
+        if values['rpe_target'] is not None:
+            values['rpe_target'] = max(values['rpe_target'] - 2, 1)
+        values['notes'] = f"Semana de descarga. {values['notes']}".strip()
+        return values
+
+    # Semanas de progresión transcurridas (las de descarga no cuentan).
+    step = template.progression_step * (week - 1 - ((week - 1) // deload_every if deload_every else 0))
+    if not step:
+        return values
+    if template.progression == 'reps':
+        values['reps_target'] = _shift_numbers(values['reps_target'], step)
+    elif template.progression == 'load':
+        if values['rir_target'] is not None:
+            values['rir_target'] = max(values['rir_target'] - step, 0)
+        if values['rpe_target'] is not None:
+            values['rpe_target'] = min(values['rpe_target'] + step, 10)
+    elif template.progression == 'sets':
+        values['sets'] += step
+    return values
+
+
+def instantiate_template(template, clients, start_date, weeks=None, name=None):
+    # Crea un TrainingPlan por cliente a partir de la plantilla. weeks por defecto es la duración de la plantilla; si es
+    # mayor, sus semanas se repiten en ciclo (una plantilla de 1 semana sirve de microciclo) con la progresión aplicada.
+    template_workouts = list(template.workouts.prefetch_related('exercises'))
+    if not template_workouts:
+        raise ValueError('La plantilla no tiene entrenamientos')
+    by_week = defaultdict(list)
+    for template_workout in template_workouts:
+        by_week[template_workout.week_number].append(template_workout)
+    cycle = max(by_week)
+    weeks = weeks or cycle
+    layout = [(week, tw) for week in range(1, weeks + 1) for tw in by_week.get((week - 1) % cycle + 1, [])]
+    exercise_total = sum(len(tw.exercises.all()) for _, tw in layout)
+
+    with transaction.atomic():
+        plans = [
+            TrainingPlan(
+                trainer=template.trainer, client=client, name=name or template.name, notes=template.notes,
+                start_date=start_date, end_date=start_date + timedelta(days=weeks * 7 - 1), exercise_count=exercise_total,
+            )
+            for client in clients
+        ]
+        if connection.features.can_return_rows_from_bulk_insert:
+            TrainingPlan.objects.bulk_create(plans)
+        else:
+            for plan in plans:
+                plan.save()
+
+        workouts, prescriptions = [], []
+        for plan in plans:
+            for week, tw in layout:
+                exercises = tw.exercises.all()
+                workouts.append(Workout(
+                    plan=plan, week_number=week, day_of_week=tw.day_of_week, title=tw.title,
+                    date=workout_date(start_date, week, tw.day_of_week), exercise_count=len(exercises),
+                ))
+                prescriptions.append([
+                    week_prescription(template, {field: getattr(ex, field) for field in EXERCISE_FIELDS}, week) for ex in exercises
+                ])
+        _bulk_insert(Workout, workouts, ('plan_id', 'week_number', 'day_of_week'))
+
+        WorkoutExercise.objects.bulk_create([
+            WorkoutExercise(workout=workout, **values)
+            for workout, exercises in zip(workouts, prescriptions) for values in exercises
+        ], batch_size=BULK_BATCH_SIZE)
+        invalidate_users_on_commit(template.trainer_id, *(client.pk for client in clients))
+    return plans
+
+
+def template_from_plan(plan, name=None, weeks=None, **rules):
+    # Guarda un plan existente como plantilla. weeks limita a las primeras N semanas (p. ej. 1 para usarla de microciclo).
+    # Si el plan tiene dos workouts el mismo día, sus ejercicios se unen en uno (la plantilla admite uno por día).
+    workouts = plan.workouts.prefetch_related('exercises').order_by('week_number', 'day_of_week', 'pk')
+    if weeks:
+        workouts = workouts.filter(week_number__lte=weeks)
+    days = {}
+    for workout in workouts:
+        days.setdefault((workout.week_number, workout.day_of_week), (workout.title, []))[1].extend(workout.exercises.all())
+
+    with transaction.atomic():
+        template = PlanTemplate.objects.create(trainer=plan.trainer, name=name or plan.name, notes=plan.notes, **rules)
+        template_workouts = _bulk_insert(TemplateWorkout, [
+            TemplateWorkout(template=template, week_number=week, day_of_week=day, title=title)
+            for (week, day), (title, _) in days.items()
+        ], ('template_id', 'week_number', 'day_of_week'))
+        TemplateExercise.objects.bulk_create([
+            TemplateExercise(workout=template_workout, **{field: getattr(ex, field) for field in EXERCISE_FIELDS})
+            for template_workout, (_, exercises) in zip(template_workouts, days.values()) for ex in exercises
+        ], batch_size=BULK_BATCH_SIZE)
+    return template
@@ -0,0 +1,108 @@
+from itertools import groupby
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Exercise, ExerciseLog
+
+# ====================================================================================================================
+# Series de Progreso para progress_view
+# ====================================================================================================================
+# Antes: una query de ExerciseLog por cada ejercicio del plan y listas armadas fila a fila. Ahora: una sola query ordenada
+# por (ejercicio, fecha) con values_list (sin instanciar modelos) agrupada en una pasada con groupby.
+#
+# Derivados por ejercicio:
+#   - 1RM estimado (fórmula de Epley: peso × (1 + reps / 30)).
+#   - Volumen semanal (Σ peso × reps por semana ISO).
+# Historiales largos se reducen en el servidor con LTTB (Largest-Triangle-Three-Buckets) hasta el presupuesto de puntos,
+# que conserva los picos y la forma de la curva mejor que tomar cada n-ésimo punto; el payload del chart queda acotado.
+#
+# Sin pandas/NumPy a propósito, aunque pandas está en requeriments.txt (lo usa la exportación Parquet, ver export.py): las
+# filas ya llegan ordenadas de la base, agrupar es una sola pasada lineal, y convertir unos cientos de tuplas a un DataFrame
+# en cada request cuesta más (import, conversión de tipos, vuelta a listas para el JSON) de lo que ahorra.
+# ====================================================================================================================
+
+DEFAULT_MAX_POINTS = 120
+
+
+def max_chart_points(requested=None):
+    # Presupuesto configurable: settings.PROGRESS_CHART_MAX_POINTS, o ?points= acotado entre 10 y el máximo del setting.
+    limit = getattr(settings, 'PROGRESS_CHART_MAX_POINTS', DEFAULT_MAX_POINTS)
+    if requested and str(requested).isdigit():
+        return max(10, min(int(requested), limit))
+    return limit
+
+
+def estimated_1rm(weight, reps):
+    if not reps:
+        return 0.0
+    return round(weight * (1 + reps / 30), 1)
+
+
+def lttb_indices(xs, ys, threshold):
+    n = len(xs)
+    if threshold >= n or threshold < 3:
+        return list(range(n))
+
+    bucket_size = (n - 2) / (threshold - 2)
+    selected = [0]
+    anchor = 0
+    for bucket in range(threshold - 2):
+        # Promedio del bucket siguiente: el tercer vértice del triángulo.
+        avg_start = int((bucket + 1) * bucket_size) + 1
+        avg_end = min(int((bucket + 2) * bucket_size) + 1, n)
+        span = avg_end - avg_start
+        avg_x = sum(xs[avg_start:avg_end]) / span
+        avg_y = sum(ys[avg_start:avg_end]) / span
+
+        # Del bucket actual se queda el punto que forma el triángulo de mayor área con el anterior elegido.
+        start = int(bucket * bucket_size) + 1
+        end = int((bucket + 1) * bucket_size) + 1
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((xs[anchor] - avg_x) * (ys[j] - ys[anchor]) - (xs[anchor] - xs[j]) * (avg_y - ys[anchor]))
+            if area > best_area:
+                best, best_area = j, area
+        selected.append(best)
+        anchor = best
+    selected.append(n - 1)
+    return selected
+
+
+def _series(rows, max_points):
+    dates, weights, reps, e1rm, weekly = [], [], [], [], {}
+    for _, completed, weight, rep_count in rows:
+        local = timezone.localtime(completed)
+        dates.append(local)
+        weights.append(weight)
+        reps.append(rep_count)
+        e1rm.append(estimated_1rm(weight, rep_count))
+        year, week, _ = local.isocalendar()
+        key = f'{year}-S{week:02d}'
+        weekly[key] = weekly.get(key, 0) + weight * rep_count
+
+    keep = lttb_indices([d.timestamp() for d in dates], e1rm, max_points)
+    return {
+        'dates': [dates[i].strftime('%Y-%m-%d') for i in keep],
+        'weights': [weights[i] for i in keep],
+        'reps': [reps[i] for i in keep],
+        'e1rm': [e1rm[i] for i in keep],
+        'weekly_volume': {'weeks': list(weekly), 'volume': [round(v, 1) for v in weekly.values()]},
+        'total_points': len(dates),
+    }
+
+
+def build_progress_series(plan, max_points=DEFAULT_MAX_POINTS):
+    exercises = Exercise.objects.filter(workoutexercise__workout__plan=plan).distinct()
+    names = list(exercises.order_by('name').values_list('name', flat=True))
+    rows = ExerciseLog.objects.filter(
+        client=plan.client, workout_exercise__exercise__in=exercises
+    ).order_by('workout_exercise__exercise__name', 'date_completed', 'pk').values_list(
+        'workout_exercise__exercise__name', 'date_completed', 'weight_lifted_kg', 'reps_completed'
+    )
+
+    # Los ejercicios del plan sin logs también aparecen (con series vacías), igual que antes.
+    chart_data = {name: _series([], max_points) for name in names}
+    for name, group in groupby(rows.iterator(chunk_size=2000), key=lambda row: row[0]):
+        chart_data[name] = _series(group, max_points)
+    return chart_data
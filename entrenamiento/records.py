@@ -0,0 +1,175 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import Cast
+
+from .models import ExerciseLog, PersonalRecord
+from .progress import estimated_1rm
+
+# ====================================================================================================================
+# Récords Personales Materializados
+# ====================================================================================================================
+# log_exercise buscaba el "mejor log" recorriendo todos los logs del cliente para el ejercicio ordenados por peso y reps,
+# y solo sabía "el más pesado". PersonalRecord guarda por (cliente, ejercicio) los récords ya calculados:
+#   - 'e1rm': 1RM estimado (Epley, mismo cálculo que progress.py).
+#   - 'weight' + reps: mejor peso a exactamente N repeticiones (1..REP_MAX_LIMIT), de donde sale también el más pesado.
+#   - 'volume': mejor peso × reps de un solo registro.
+# Se mantiene incrementalmente desde las señales de ExerciseLog: al guardar se comparan las métricas del log contra las
+# ~20 filas de récords del ejercicio (bloqueadas con select_for_update) y solo si el log que tenía un récord empeora o se
+# borra se recalcula ese récord con una query ordenada. Leer los récords es una búsqueda por la clave única
+# (cliente, ejercicio, ...); detectar un récord nuevo sale gratis del mismo guardado. backfill_records reconstruye todo.
+#
+# Cuentan los logs 'completed' y 'half' con peso y reps > 0: una serie no completada no es un récord.
+# ====================================================================================================================
+
+REP_MAX_LIMIT = 20
+RECORD_STATUSES = ('completed', 'half')
+BACKFILL_CHUNK_SIZE = 5000
+
+
+def log_metrics(weight, reps, status):
+    # Métricas que el log aporta a cada récord: {(tipo, reps): valor}. Vacío si el log no cuenta.
+    if status not in RECORD_STATUSES or not weight or weight <= 0 or not reps:
+        return {}
+    metrics = {('e1rm', 0): estimated_1rm(weight, reps), ('volume', 0): round(weight * reps, 2)}
+    if reps <= REP_MAX_LIMIT:
+        metrics[('weight', reps)] = weight
+    return metrics
+
+
+def _record_from_log(record, value, log_pk, weight, reps, achieved_at):
+    record.value, record.log_id = value, log_pk
+    record.weight_lifted_kg, record.reps_completed, record.achieved_at = weight, reps, achieved_at
+    return record
+
+
+RECORD_FIELDS = ['value', 'log', 'weight_lifted_kg', 'reps_completed', 'achieved_at']
+
+
+def apply_log(log, exercise_id):
+    # Actualiza los récords con un log recién guardado. Devuelve las claves (tipo, reps) en las que superó un récord previo.
+    metrics = log_metrics(log.weight_lifted_kg, log.reps_completed, log.status)
+    with transaction.atomic():
+        existing = {
+            (record.record_type, record.reps): record
+            for record in PersonalRecord.objects.select_for_update().filter(client_id=log.client_id, exercise_id=exercise_id)
+        }
+        # Récords que este mismo log tenía y que tras la edición ya no alcanza: se recalculan desde los demás logs.
+        stale = [key for key, record in existing.items() if record.log_id == log.pk and metrics.get(key, -1) < record.value]
+
+        creates, updates, improved = [], [], []
+        for key, value in metrics.items():
+            record = existing.get(key)
+            if record is None:
+                creates.append(_record_from_log(
+                    PersonalRecord(client_id=log.client_id, exercise_id=exercise_id, record_type=key[0], reps=key[1]),
+                    value, log.pk, log.weight_lifted_kg, log.reps_completed, log.date_completed,
+                ))
+            elif value > record.value:
+                updates.append(_record_from_log(record, value, log.pk, log.weight_lifted_kg, log.reps_completed, log.date_completed))
+                improved.append(key)
+        if creates:
+            PersonalRecord.objects.bulk_create(creates)
+        if updates:
+            PersonalRecord.objects.bulk_update(updates, RECORD_FIELDS)
+        if stale:
+            recompute_records(log.client_id, exercise_id, stale)
+    return improved
+
+
+def _ranked_logs(client_id, exercise_id, record_type, reps):
+    logs = ExerciseLog.objects.filter(
+        client_id=client_id, workout_exercise__exercise_id=exercise_id, status__in=RECORD_STATUSES,
+        weight_lifted_kg__gt=0, reps_completed__gt=0,
+    )
+    # A igual valor gana el log más antiguo, igual que en la actualización incremental (solo reemplaza si supera).
+    if record_type == 'weight':
+        return logs.filter(reps_completed=reps).order_by('-weight_lifted_kg', 'date_completed', 'pk')
+    reps_f = Cast('reps_completed', FloatField())
+    if record_type == 'e1rm':
+        metric = F('weight_lifted_kg') * (Value(1.0) + reps_f / Value(30.0))
+    else:
+        metric = F('weight_lifted_kg') * reps_f
+    return logs.annotate(metric=metric).order_by('-metric', 'date_completed', 'pk')
+
+
+def recompute_records(client_id, exercise_id, keys):
+    # Recalcula récords puntuales (p. ej. tras borrar el log que los tenía) con una query ordenada por récord.
+    for record_type, reps in keys:
+        best = _ranked_logs(client_id, exercise_id, record_type, reps).only(
+            'pk', 'weight_lifted_kg', 'reps_completed', 'status', 'date_completed',
+        ).first()
+        lookup = {'client_id': client_id, 'exercise_id': exercise_id, 'record_type': record_type, 'reps': reps}
+        if best is None:
+            PersonalRecord.objects.filter(**lookup).delete()
+            continue
+        value = log_metrics(best.weight_lifted_kg, best.reps_completed, best.status)[(record_type, reps)]
+        PersonalRecord.objects.update_or_create(**lookup, defaults={
+            'value': value, 'log_id': best.pk, 'weight_lifted_kg': best.weight_lifted_kg,
+            'reps_completed': best.reps_completed, 'achieved_at': best.date_completed,
+        })
+
+
+def forget_deleted_logs(client_id):
+    # Tras borrar logs, los récords que apuntaban a ellos quedaron con log NULL (SET_NULL): se recalculan solo esos.
+    orphaned = defaultdict(list)
+    for exercise_id, record_type, reps in PersonalRecord.objects.filter(client_id=client_id, log__isnull=True).values_list(
+        'exercise_id', 'record_type', 'reps'
+    ):
+        orphaned[exercise_id].append((record_type, reps))
+    for exercise_id, keys in orphaned.items():
+        recompute_records(client_id, exercise_id, keys)
+
+
+def backfill_records(clients=None):
+    # Reconstruye todos los récords (o los de unos clientes) en una pasada por bloques sobre los logs. Devuelve cuántos quedaron.
+    logs = ExerciseLog.objects.filter(status__in=RECORD_STATUSES, weight_lifted_kg__gt=0, reps_completed__gt=0)
+    if clients is not None:
+        logs = logs.filter(client__in=clients)
+    logs = logs.order_by('pk').values_list(
+        'pk', 'client_id', 'workout_exercise__exercise_id', 'weight_lifted_kg', 'reps_completed', 'status', 'date_completed',
+    )
+
+    best = {}
+    last_pk = 0
+    while True:
+        batch = list(logs.filter(pk__gt=last_pk)[:BACKFILL_CHUNK_SIZE])
+        if not batch:
+            break
+        last_pk = batch[-1][0]
+        for pk, client_id, exercise_id, weight, reps, status, completed in batch:
+            for (record_type, record_reps), value in log_metrics(weight, reps, status).items():
+                key = (client_id, exercise_id, record_type, record_reps)
+                current = best.get(key)
+                # Logs en orden de id: a igual valor se queda el primero, como en el camino incremental.
+                if current is None or value > current[0] or (value == current[0] and completed < current[4]):
+                    best[key] = (value, pk, weight, reps, completed)
+
+    records = [
+        PersonalRecord(
+            client_id=client_id, exercise_id=exercise_id, record_type=record_type, reps=reps,
+            value=value, log_id=pk, weight_lifted_kg=weight, reps_completed=log_reps, achieved_at=completed,
+        )
+        for (client_id, exercise_id, record_type, reps), (value, pk, weight, log_reps, completed) in best.items()
+    ]
+    with transaction.atomic():
+        existing = PersonalRecord.objects.all() if clients is None else PersonalRecord.objects.filter(client__in=clients)
+        existing.delete()
+        PersonalRecord.objects.bulk_create(records, batch_size=1000)
+    return len(records)
+
+
+def exercise_records(client, exercise_ids):
+    # Récords de varios ejercicios en una query: {exercise_id: {'e1rm', 'volume', 'heaviest', 'rep_maxes'}}.
+    summary = defaultdict(lambda: {'e1rm': None, 'volume': None, 'heaviest': None, 'rep_maxes': []})
+    for record in PersonalRecord.objects.filter(client=client, exercise_id__in=exercise_ids).select_related('log').order_by('reps'):
+        entry = summary[record.exercise_id]
+        if record.record_type == 'weight':
+            entry['rep_maxes'].append(record)
+            heaviest = entry['heaviest']
+            if heaviest is None or (record.value, record.reps) > (heaviest.value, heaviest.reps):
+                entry['heaviest'] = record
+        else:
+            entry[record.record_type] = record
+    return summary
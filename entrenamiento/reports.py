@@ -0,0 +1,81 @@
+from django.conf import settings
+from django.core.mail import EmailMessage
+
+from .models import ExerciseLog
+from .outbox import queue_email
+from .xlsx import FILLS, Column, XlsxReport
+
+# ====================================================================================================================
+# Reporte Diario del Workout
+# ====================================================================================================================
+# Excel + email al entrenador cuando el cliente completa un workout. Se ejecuta en el worker de tareas (tarea
+# 'send_daily_report', ver tasks.py), nunca dentro del request de log_exercise.
+# ====================================================================================================================
+
+
+DAILY_COLUMNS = [
+    Column('Ejercicio'),
+    Column('Peso (kg)', '0.00'),
+    Column('Reps', '0'),
+    Column('RIR', '0'),
+    Column('RPE', '0'),
+    Column('Estado'),
+    Column('Notas'),
+    Column('Video URL'),
+]
+
+
+def daily_report_rows(workout):
+    logs = ExerciseLog.objects.filter(workout_exercise__workout=workout).select_related('workout_exercise__exercise')
+    for log in logs.iterator(chunk_size=2000):
+        video_url = log.video_playback_url  # 720p si ya se procesó (ver video.py)
+        row = [
+            log.workout_exercise.exercise.name,
+            log.weight_lifted_kg,
+            log.reps_completed,
+            log.rir_actual if log.rir_actual is not None else '',
+            log.rpe_actual if log.rpe_actual is not None else '',
+            log.get_status_display(),
+            log.notes,
+            '',
+        ]
+        # La fila se resalta según el estado; el video queda como enlace "Ver Video"
+        yield row, log.status, {7: (video_url, 'Ver Video')} if video_url else None
+
+
+def build_daily_workbook(workout, rows=None):
+    report = XlsxReport()
+    sheet = report.add_sheet(
+        f"Reporte Diario - {workout.title}", DAILY_COLUMNS,
+        banner=f"Reporte Diario Completado: {workout.title} por {workout.plan.client.username}",
+    )
+    for values, status, links in (daily_report_rows(workout) if rows is None else rows):
+        sheet.append(values, fill=status if status in FILLS else None, links=links)
+    return report.to_bytes()
+
+
+def send_daily_report(workout):
+    # Excel armado en streaming con estilos compartidos (ver xlsx.py)
+    workbook = build_daily_workbook(workout)
+
+    # Mejorar el email: usar HTML para un cuerpo más atractivo
+    trainer_email = workout.plan.trainer.email
+    subject = f"Reporte Diario Completado: {workout.title} por {workout.plan.client.username}"
+    
+    html_message = f"""
+    <html>
+        <body>
+            <h2>Reporte Diario Completado</h2>
+            <p>Estimado entrenador,</p>
+            <p>El cliente {workout.plan.client.username} ha completado el workout "{workout.title}" el {workout.date.strftime('%Y-%m-%d')}.</p>
+            <p>Adjunto encontrarás el reporte detallado en formato Excel, con los logs de ejercicios, incluyendo pesos, reps, RIR/RPE, estados, notas y enlaces a videos si están disponibles.</p>
+            <p>Gracias,</p>
+            <p>Equipo de la App</p>
+        </body>
+    </html>
+    """
+    
+    email = EmailMessage(subject, html_message, settings.EMAIL_HOST_USER, [trainer_email])
+    email.content_subtype = "html"  # Para que se envíe como HTML
+    email.attach(f'reporte_diario_{workout.date.strftime("%Y-%m-%d")}.xlsx', workbook, 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+    queue_email(email)  # Lo envía send_outbox por la conexión SMTP compartida (ver outbox.py)
@@ -0,0 +1,45 @@
+from django.core.paginator import Paginator
+from django.db.models import Count, F, Max, Prefetch, Q
+
+from core.models import User
+from .models import TrainingPlan
+
+# ====================================================================================================================
+# Roster de Clientes del Entrenador
+# ====================================================================================================================
+# Construye la lista de clientes del dashboard del entrenador con un único queryset anotado, en vez de 3 queries por cliente
+# (planes activos, último log y primer plan activo). La página cuesta lo mismo con 10 o con 500 clientes:
+#   - COUNT de la paginación + una query para la página + un prefetch de los planes activos de esa página.
+#
+# La "última sesión" se toma de TrainingPlan.last_log_at (contador desnormalizado, ver counters.py): es el mismo valor que
+# Max('exerciselog__date_completed') pero sin unir la tabla de logs, que multiplicaría filas por cada plan del cliente.
+# ====================================================================================================================
+
+ROSTER_PAGE_SIZE = 25
+
+# Orden del roster: clave del querystring -> ordering del queryset. 'recent' pone primero a quienes entrenaron hace poco.
+ROSTER_SORTS = {
+    'recent': (F('last_session').desc(nulls_last=True), 'username'),
+    'inactive': (F('last_session').asc(nulls_first=True), 'username'),
+    'name': ('username',),
+}
+DEFAULT_ROSTER_SORT = 'recent'
+
+
+def client_roster(trainer, sort=DEFAULT_ROSTER_SORT):
+    active_plans = TrainingPlan.objects.filter(status='active').order_by('start_date', 'pk')
+    ordering = ROSTER_SORTS.get(sort, ROSTER_SORTS[DEFAULT_ROSTER_SORT])
+    return User.objects.filter(role='CLIENTE', assigned_professional=trainer).annotate(
+        active_plans=Count('assigned_plans', filter=Q(assigned_plans__status='active')),
+        last_session=Max('assigned_plans__last_log_at'),
+    ).prefetch_related(
+        Prefetch('assigned_plans', queryset=active_plans, to_attr='active_plan_list')
+    ).order_by(*ordering)
+
+
+def paginate_roster(trainer, sort=DEFAULT_ROSTER_SORT, page=1, per_page=ROSTER_PAGE_SIZE):
+    page_obj = Paginator(client_roster(trainer, sort), per_page).get_page(page)
+    for client in page_obj:
+        # Primer plan activo, ya prefetcheado (lo usa el enlace de progreso de la plantilla).
+        client.active_plan = client.active_plan_list[0] if client.active_plan_list else None
+    return page_obj
@@ -0,0 +1,144 @@
+import random
+from datetime import datetime, time, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import User
+from .analytics import invalidate_users_on_commit
+from .counters import rebuild_progress
+from .models import Exercise, ExerciseLog, PlanTemplate, TemplateExercise, TemplateWorkout, TrainingPlan, WorkoutExercise
+from .plans import instantiate_template
+from .records import backfill_records
+
+# ====================================================================================================================
+# Datos de Carga Sintéticos
+# ====================================================================================================================
+# Genera un volumen realista para medir las vistas (ver bench_views): N entrenadores con M clientes cada uno, planes
+# consecutivos de `plan_weeks` semanas que cubren `history_weeks` de historial (el último sigue activo), y un ExerciseLog
+# por ejercicio de cada workout pasado con probabilidad `completion`. Los pesos siguen una progresión lenta con ruido
+# por (cliente, ejercicio), así los récords y los gráficos de progreso tienen forma.
+#
+# Reproducible: todo sale de random.Random(seed) en un orden fijo y los usernames llevan el prefijo, así que el mismo
+# comando genera los mismos datos (las fechas son relativas a hoy). Escribe con bulk_create / instantiate_template; como
+# eso no dispara señales, al final reconstruye contadores y récords e invalida la caché de analíticas de los usuarios.
+# ====================================================================================================================
+
+MUSCLE_GROUPS = ['Pecho', 'Espalda', 'Piernas', 'Hombro', 'Bíceps', 'Tríceps', 'Core', 'Glúteos']
+EQUIPMENT = ['Barra', 'Mancuernas', 'Máquina', 'Polea', 'Peso Corporal', 'Kettlebell']
+LOG_STATUSES = ['completed'] * 8 + ['half'] * 2 + ['not_completed']
+LOG_BATCH_SIZE = 1000
+
+
+def seed_catalog(size, rnd):
+    names = [f'Carga {i:03d}' for i in range(size)]
+    Exercise.objects.bulk_create([
+        Exercise(name=name, muscle_group=rnd.choice(MUSCLE_GROUPS), equipment=rnd.choice(EQUIPMENT)) for name in names
+    ], ignore_conflicts=True)
+    return list(Exercise.objects.filter(name__in=names).order_by('name').values_list('pk', flat=True))
+
+
+def seed_users(prefix, trainers, clients_per_trainer):
+    password = make_password(prefix)  # Un solo hash para todos: el hasher es deliberadamente lento
+    coaches = [
+        User(username=f'{prefix}_t{t}', rut=f'{prefix}-t{t}', role='ENTRENADOR', email=f'{prefix}_t{t}@example.com', password=password)
+        for t in range(trainers)
+    ]
+    User.objects.bulk_create(coaches)
+    coaches = list(User.objects.filter(username__in=[c.username for c in coaches]).order_by('pk'))
+    User.objects.bulk_create([
+        User(username=f'{coach.username}_c{c}', rut=f'{coach.username}-c{c}', role='CLIENTE', password=password,
+             email=f'{coach.username}_c{c}@example.com', assigned_professional=coach)
+        for coach in coaches for c in range(clients_per_trainer)
+    ])
+    clients = {coach.pk: [] for coach in coaches}
+    for client in User.objects.filter(assigned_professional__in=coaches).order_by('pk'):
+        clients[client.assigned_professional_id].append(client)
+    return [(coach, clients[coach.pk]) for coach in coaches]
+
+
+def seed_template(trainer, catalog, days, exercises, rnd):
+    template = PlanTemplate.objects.create(trainer=trainer, name=f'Bloque {trainer.username}', progression='reps')
+    workouts = [TemplateWorkout(template=template, week_number=1, day_of_week=day, title=f'Día {day}') for day in range(1, days + 1)]
+    TemplateWorkout.objects.bulk_create(workouts)
+    workouts = list(template.workouts.order_by('day_of_week'))
+    TemplateExercise.objects.bulk_create([
+        TemplateExercise(
+            workout=workout, exercise_id=exercise_id, sets=rnd.randint(3, 5), reps_target=rnd.choice(['5', '6-8', '8-12', '12-15']),
+            rir_target=rnd.randint(1, 3), rest_period_seconds=rnd.choice([60, 90, 120, 180]), order=order,
+        )
+        for workout in workouts for order, exercise_id in enumerate(rnd.sample(catalog, exercises), start=1)
+    ])
+    return template
+
+
+def seed_logs(client, today, completion, rnd):
+    rows = WorkoutExercise.objects.filter(workout__plan__client=client, workout__date__lt=today).order_by('pk').values_list(
+        'pk', 'exercise_id', 'workout__date', 'reps_target',
+    )
+    base = {}
+    logs = []
+    for pk, exercise_id, date, reps_target in rows:
+        if rnd.random() > completion:
+            continue
+        start_weight = base.setdefault(exercise_id, (rnd.uniform(20, 100), date))
+        weeks = (date - start_weight[1]).days / 7
+        reps = int(reps_target.split('-')[0]) + rnd.randint(0, 3)
+        logs.append(ExerciseLog(
+            client=client, workout_exercise_id=pk, status=rnd.choice(LOG_STATUSES), reps_completed=reps,
+            weight_lifted_kg=round(start_weight[0] * (1 + 0.004 * weeks) + rnd.uniform(-2.5, 2.5), 1),
+            rir_actual=rnd.randint(0, 4), rpe_actual=rnd.randint(6, 10),
+            date_completed=timezone.make_aware(datetime.combine(date, time(hour=rnd.randint(6, 21), minute=rnd.randint(0, 59)))),
+        ))
+    dates = {log.workout_exercise_id: log.date_completed for log in logs}
+    ExerciseLog.objects.bulk_create(logs, batch_size=LOG_BATCH_SIZE)
+    # date_completed es auto_now_add: bulk_create la pisó con "ahora". bulk_update no pasa por pre_save, así que restaura
+    # la fecha generada sin tocar el campo del modelo (un log por ejercicio de un cliente recién creado).
+    created = ExerciseLog.objects.filter(client=client).values_list('pk', 'workout_exercise_id')
+    ExerciseLog.objects.bulk_update(
+        [ExerciseLog(pk=pk, date_completed=dates[workout_exercise_id]) for pk, workout_exercise_id in created],
+        ['date_completed'], batch_size=LOG_BATCH_SIZE,
+    )
+    return len(logs)
+
+
+def seed_load(prefix='load', trainers=3, clients_per_trainer=20, history_weeks=104, plan_weeks=12, days=4, exercises=6,
+              completion=0.85, catalog_size=60, seed=42):
+    # Devuelve un resumen {'trainers', 'clients', 'plans', 'workout_exercises', 'logs'}.
+    rnd = random.Random(seed)
+    today = timezone.localdate()
+    catalog = seed_catalog(catalog_size, rnd)
+    blocks = history_weeks // plan_weeks + 1
+    # Lunes de la semana en que empieza el historial; el último bloque termina después de hoy.
+    first_start = today - timedelta(days=today.weekday(), weeks=history_weeks)
+
+    summary = {'trainers': 0, 'clients': 0, 'plans': 0, 'logs': 0}
+    users = seed_users(prefix, trainers, clients_per_trainer)
+    for coach, clients in users:
+        template = seed_template(coach, catalog, days, exercises, rnd)
+        for block in range(blocks):
+            start = first_start + timedelta(weeks=block * plan_weeks)
+            plans = instantiate_template(template, clients, start, weeks=plan_weeks, name=f'Bloque {block + 1}')
+            if block < blocks - 1:
+                TrainingPlan.objects.filter(pk__in=[plan.pk for plan in plans]).update(status='completed')
+            summary['plans'] += len(plans)
+        for client in clients:
+            summary['logs'] += seed_logs(client, today, completion, rnd)
+        summary['trainers'] += 1
+        summary['clients'] += len(clients)
+
+    seeded = User.objects.filter(username__startswith=f'{prefix}_t')
+    seeded_plans = TrainingPlan.objects.filter(trainer__in=seeded)
+    rebuild_progress(fix=True, plans=seeded_plans)
+    backfill_records(seeded.filter(role='CLIENTE'))
+    with transaction.atomic():
+        invalidate_users_on_commit(*seeded.values_list('pk', flat=True))
+    summary['workout_exercises'] = WorkoutExercise.objects.filter(workout__plan__in=seeded_plans).count()
+    return summary
+
+
+def flush_load(prefix):
+    # Borra lo generado con ese prefijo (planes, workouts y logs caen en cascada con los usuarios).
+    deleted, _ = User.objects.filter(username__startswith=f'{prefix}_t').delete()
+    return deleted
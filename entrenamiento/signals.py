@@ -0,0 +1,165 @@
+from django.db.models import F, QuerySet
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from core.models import User
+from .analytics import invalidate_users_on_commit
+from .catalog import invalidate_catalog_on_commit
+from .warmups import invalidate_warmups_on_commit
+from .counters import refresh_plan_progress, refresh_workout_progress
+from .records import apply_log, forget_deleted_logs
+from .models import Exercise, ExerciseLog, TrainingPlan, Warmup, Workout, WorkoutExercise
+
+
+# Borrados en cascada o masivos: Django borra todas las filas de cada modelo y después manda un post_delete por fila, todas
+# con el mismo `origin` (la instancia o queryset que se borró). Los receptores de abajo se saltan el trabajo de lo que
+# también desaparece (los contadores de un workout que se borra entero) y hacen una sola vez por workout, plan o cliente
+# lo que sí hay que recalcular; así borrar un plan no cuesta queries por cada log.
+def _origin_model(kwargs):
+    origin = kwargs.get('origin')
+    return origin.model if isinstance(origin, QuerySet) else type(origin)
+
+
+def _deleted_with(kwargs, *models):
+    return _origin_model(kwargs) in models
+
+
+def _first_time(kwargs, key):
+    origin = kwargs.get('origin')
+    if origin is None:
+        return True
+    done = origin.__dict__.setdefault('_signal_work_done', set())
+    if key in done:
+        return False
+    done.add(key)
+    return True
+
+
+def mark_done(origin, *keys):
+    # Para quien borra en bloque y hace él mismo el trabajo de las señales (editor.py): los receptores de esas claves se lo
+    # saltan. origin es el queryset al que se le llamará delete().
+    origin.__dict__.setdefault('_signal_work_done', set()).update(keys)
+    return origin
+
+
+# Una sola lectura del WorkoutExercise de un log por guardado/borrado, compartida por los receptores del log; en un borrado
+# masivo de logs, una por ejercicio y no por log.
+def _workout_exercise_row(log, kwargs):
+    holder = kwargs.get('origin')
+    rows = (log if holder is None else holder).__dict__.setdefault('_workout_exercise_rows', {})
+    if log.workout_exercise_id not in rows:
+        rows[log.workout_exercise_id] = WorkoutExercise.objects.filter(pk=log.workout_exercise_id).values(
+            'workout_id', 'exercise_id', 'workout__plan__trainer_id',
+        ).first()
+    return rows[log.workout_exercise_id]
+
+
+@receiver(pre_save, sender=ExerciseLog)
+@receiver(pre_delete, sender=ExerciseLog)
+def forget_workout_exercise_row(sender, instance, **kwargs):
+    instance.__dict__.pop('_workout_exercise_rows', None)
+
+
+# Contadores de progreso: cualquier cambio en logs o ejercicios del plan recalcula su workout (ver counters.py).
+@receiver(post_save, sender=ExerciseLog)
+@receiver(post_delete, sender=ExerciseLog)
+def update_progress_for_log(sender, instance, **kwargs):
+    # En cascada desde un ejercicio, workout, plan o usuario, la señal del que se borró recalcula lo que queda.
+    if kwargs.get('origin') is not None and not _deleted_with(kwargs, ExerciseLog):
+        return
+    row = _workout_exercise_row(instance, kwargs)
+    if row is not None and _first_time(kwargs, ('progress', row['workout_id'])):
+        refresh_workout_progress(row['workout_id'])
+
+
+@receiver(post_save, sender=WorkoutExercise)
+@receiver(post_delete, sender=WorkoutExercise)
+def update_progress_for_workout_exercise(sender, instance, **kwargs):
+    if _deleted_with(kwargs, Workout, TrainingPlan, User):
+        return
+    if _first_time(kwargs, ('progress', instance.workout_id)):
+        refresh_workout_progress(instance.workout_id)
+
+
+@receiver(post_delete, sender=Workout)
+def update_progress_for_workout(sender, instance, **kwargs):
+    # El workout ya no existe: el plan suma de nuevo los contadores de los que quedan, una vez por plan.
+    if not _deleted_with(kwargs, TrainingPlan, User) and _first_time(kwargs, ('plan', instance.plan_id)):
+        refresh_plan_progress(instance.plan_id)
+
+
+# Récords personales (ver records.py): el guardado deja en la instancia los récords superados, para avisar al cliente.
+@receiver(post_save, sender=ExerciseLog)
+def update_records_for_log(sender, instance, **kwargs):
+    row = _workout_exercise_row(instance, kwargs)
+    if row is not None:
+        instance.new_records = apply_log(instance, row['exercise_id'])
+
+
+@receiver(post_delete, sender=ExerciseLog)
+def update_records_for_deleted_log(sender, instance, **kwargs):
+    # Con el cliente se borran también sus récords; en el resto de los casos, una vez por cliente.
+    if not _deleted_with(kwargs, User) and _first_time(kwargs, ('records', instance.client_id)):
+        forget_deleted_logs(instance.client_id)
+
+
+# Concurrencia optimista del editor (ver editor.py): cualquier cambio de un ejercicio por otra vía invalida la versión cargada.
+@receiver(post_save, sender=WorkoutExercise)
+@receiver(post_delete, sender=WorkoutExercise)
+def bump_workout_version(sender, instance, **kwargs):
+    if _deleted_with(kwargs, Workout, TrainingPlan, User):
+        return
+    if _first_time(kwargs, ('version', instance.workout_id)):
+        Workout.objects.filter(pk=instance.workout_id).update(version=F('version') + 1)
+
+
+# Caché de analíticas: cualquier cambio invalida al cliente y al entrenador del plan afectado (ver analytics.py).
+@receiver(post_save, sender=ExerciseLog)
+@receiver(post_delete, sender=ExerciseLog)
+def invalidate_analytics_for_log(sender, instance, **kwargs):
+    # En cascada invalida la señal del que se borró (ejercicio, workout, plan); en borrados masivos, una vez por cliente.
+    if kwargs.get('origin') is not None and not _deleted_with(kwargs, ExerciseLog):
+        return
+    row = _workout_exercise_row(instance, kwargs)
+    if _first_time(kwargs, ('analytics', instance.client_id)):
+        invalidate_users_on_commit(instance.client_id, row and row['workout__plan__trainer_id'])
+
+
+@receiver(post_save, sender=WorkoutExercise)
+@receiver(post_delete, sender=WorkoutExercise)
+def invalidate_analytics_for_workout_exercise(sender, instance, **kwargs):
+    if _deleted_with(kwargs, Workout, TrainingPlan, User) or not _first_time(kwargs, ('analytics', instance.workout_id)):
+        return
+    users = Workout.objects.filter(pk=instance.workout_id).values_list('plan__client_id', 'plan__trainer_id').first()
+    if users:
+        invalidate_users_on_commit(*users)
+
+
+@receiver(post_save, sender=Workout)
+@receiver(post_delete, sender=Workout)
+def invalidate_analytics_for_workout(sender, instance, **kwargs):
+    if _deleted_with(kwargs, TrainingPlan, User) or not _first_time(kwargs, ('analytics', instance.plan_id)):
+        return
+    users = TrainingPlan.objects.filter(pk=instance.plan_id).values_list('client_id', 'trainer_id').first()
+    if users:
+        invalidate_users_on_commit(*users)
+
+
+@receiver(post_save, sender=TrainingPlan)
+@receiver(post_delete, sender=TrainingPlan)
+def invalidate_analytics_for_plan(sender, instance, **kwargs):
+    invalidate_users_on_commit(instance.client_id, instance.trainer_id)
+
+
+# Autocompletado del catálogo (ver catalog.py): crear, editar o borrar un ejercicio invalida las búsquedas en caché.
+@receiver(post_save, sender=Exercise)
+@receiver(post_delete, sender=Exercise)
+def invalidate_exercise_catalog(sender, instance, **kwargs):
+    invalidate_catalog_on_commit()
+
+
+# Catálogo de calentamientos de los dashboards (ver warmups.py): cualquier cambio publica una versión nueva.
+@receiver(post_save, sender=Warmup)
+@receiver(post_delete, sender=Warmup)
+def invalidate_warmup_catalog(sender, instance, **kwargs):
+    invalidate_warmups_on_commit()
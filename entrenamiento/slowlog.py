@@ -0,0 +1,164 @@
+import datetime
+import decimal
+import hashlib
+import logging
+import time
+import traceback
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DatabaseError, connections, transaction
+
+from .instrumentation import UNRESOLVED, fingerprint
+from .models import SlowQuery
+
+logger = logging.getLogger(__name__)
+
+# ====================================================================================================================
+# Registro de Queries Lentas
+# ====================================================================================================================
+# instrumentation.py da números por request; aquí se ve qué llamada concreta al ORM es lenta (los filtros por rango de
+# ExerciseLog del reporte semanal, el bucle de progress_view...). Con settings.SLOW_QUERY_LOG activo, un execute_wrapper
+# toma cada query que tarda SLOW_QUERY_THRESHOLD_MS o más y guarda en SlowQuery:
+#   - la huella (md5 del SQL normalizado, la misma normalización que instrumentation.fingerprint) y el SQL normalizado;
+#   - la forma de los parámetros, la duración y el origen (nombre de la vista o "manage.py <comando>"). De los parámetros
+#     solo quedan números, fechas y booleanos; textos y bytes se guardan como tipo y largo (str[88]): por aquí pasan hashes
+#     de contraseñas, claves de sesión y cuerpos de correo con contraseñas temporales. Los valores reales viven solo en
+#     memoria hasta correr el EXPLAIN;
+#   - la traza recortada a los frames del proyecto (sin Django ni librerías), que apunta a la línea de views.py, weekly.py...
+#   - el EXPLAIN, solo para SELECT y solo si la huella no tiene ya uno guardado (en la práctica, su primera aparición).
+# Las queries se acumulan en memoria durante el request/comando y se escriben al terminar, fuera del wrapper (así no se
+# registra a sí mismo) y fuera de las transacciones de la vista. La tabla funciona como buffer circular: se conservan las
+# últimas SLOW_QUERY_MAX_ROWS filas. Ver las peores: admin de SlowQuery o `python manage.py slow_queries`.
+# ====================================================================================================================
+
+PARAMS_MAX_LENGTH = 1000
+STACK_DEPTH = 8
+
+
+def _enabled():
+    return getattr(settings, 'SLOW_QUERY_LOG', False)
+
+
+def project_stack():
+    # Frames del proyecto (no site-packages ni este módulo), del más externo al más interno; se queda con los últimos.
+    base_dir = str(settings.BASE_DIR)
+    frames = [
+        frame for frame in traceback.extract_stack()
+        if frame.filename.startswith(base_dir) and 'site-packages' not in frame.filename and frame.filename != __file__
+    ]
+    return ''.join(traceback.format_list(frames[-STACK_DEPTH:]))
+
+
+def _param_shape(value):
+    if value is None or isinstance(value, (bool, int, float, decimal.Decimal, datetime.date, datetime.time)):
+        return repr(value)
+    if isinstance(value, (str, bytes, bytearray, memoryview)):
+        return f'{type(value).__name__}[{len(value)}]'
+    return type(value).__name__
+
+
+def params_summary(params, many=False):
+    # Lo que se guarda de los parámetros: ver el encabezado.
+    if params is None:
+        return ''
+    if many:
+        rows = list(params)
+        return f'{len(rows)} filas × {params_summary(rows[0]) if rows else "()"}'[:PARAMS_MAX_LENGTH]
+    if isinstance(params, dict):
+        return ('{' + ', '.join(f'{key!r}: {_param_shape(value)}' for key, value in params.items()) + '}')[:PARAMS_MAX_LENGTH]
+    return ('(' + ', '.join(_param_shape(value) for value in params) + ')')[:PARAMS_MAX_LENGTH]
+
+
+class SlowQueryRecorder:
+    def __init__(self, threshold_ms, origin=None):
+        self.threshold_ms = threshold_ms
+        self.origin = origin
+        self.entries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration_ms = (time.perf_counter() - start) * 1000
+            if duration_ms >= self.threshold_ms:
+                self.entries.append({
+                    'alias': context['connection'].alias, 'sql': sql, 'params': None if many else params,
+                    'params_repr': params_summary(params, many), 'duration_ms': duration_ms, 'stack': project_stack(),
+                })
+
+
+def explain(connection, sql, params):
+    if params is None or not sql.lstrip().upper().startswith('SELECT'):
+        return ''
+    try:
+        # Savepoint: en PostgreSQL un EXPLAIN fallido abortaría la transacción en curso.
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}', params)
+            return '\n'.join(' '.join(str(column) for column in row) for row in cursor.fetchall())
+    except DatabaseError as error:
+        return f'(EXPLAIN falló: {error})'
+
+
+def save_slow_queries(entries, origin):
+    normalized = [(entry, fingerprint(entry['sql'])) for entry in entries]
+    hashes = {sql: hashlib.md5(sql.encode()).hexdigest() for _, sql in normalized}
+    # Huellas que ya tienen EXPLAIN guardado (si la fila que lo tenía salió del buffer, se vuelve a capturar).
+    seen = set(
+        SlowQuery.objects.filter(fingerprint__in=hashes.values()).exclude(explain='').values_list('fingerprint', flat=True).distinct()
+    )
+
+    rows = []
+    for entry, sql in normalized:
+        digest = hashes[sql]
+        plan = ''
+        if digest not in seen and getattr(settings, 'SLOW_QUERY_EXPLAIN', True):
+            plan = explain(connections[entry['alias']], entry['sql'], entry['params'])
+        seen.add(digest)
+        rows.append(SlowQuery(
+            fingerprint=digest, sql=sql, params=entry['params_repr'], duration_ms=round(entry['duration_ms'], 2),
+            origin=(origin or UNRESOLVED)[:200], stack=entry['stack'], explain=plan,
+        ))
+    SlowQuery.objects.bulk_create(rows)
+
+    max_rows = getattr(settings, 'SLOW_QUERY_MAX_ROWS', 5000)
+    cutoff = SlowQuery.objects.order_by('-pk').values_list('pk', flat=True)[max_rows:max_rows + 1].first()
+    if cutoff is not None:
+        SlowQuery.objects.filter(pk__lte=cutoff).delete()
+
+
+@contextmanager
+def capture_slow_queries(origin=None):
+    # Contexto (o decorador de handle() en los comandos) que registra las queries lentas de lo que envuelve.
+    if not _enabled():
+        yield None
+        return
+    recorder = SlowQueryRecorder(getattr(settings, 'SLOW_QUERY_THRESHOLD_MS', 200), origin)
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            yield recorder
+    finally:
+        if recorder.entries:
+            try:
+                save_slow_queries(recorder.entries, recorder.origin)
+            except DatabaseError:
+                logger.exception('No se pudieron guardar %s queries lentas de %s', len(recorder.entries), recorder.origin)
+
+
+class SlowQueryMiddleware:
+    def __init__(self, get_response):
+        if not _enabled():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with capture_slow_queries() as recorder:
+            response = self.get_response(request)
+            if recorder is not None:
+                match = getattr(request, 'resolver_match', None)
+                recorder.origin = match.view_name if match else request.path
+        return response
@@ -0,0 +1,134 @@
+import threading
+
+import boto3
+from botocore.config import Config
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from storages.backends.s3boto3 import S3Boto3Storage
+
+# ====================================================================================================================
+# Cliente S3/B2 Compartido
+# ====================================================================================================================
+# Las vistas de subida (presigned simple y multipart) creaban un boto3.client('s3') nuevo en cada request: resolver sesión,
+# credenciales y endpoint cuesta decenas de ms y memoria, y un video de 100 partes lo pagaba 100+ veces, sin reutilizar
+# conexiones HTTP. Aquí se crea una sola vez por proceso:
+#   - Una boto3.Session (la resolución de credenciales ocurre una vez).
+#   - Un cliente S3 compartido. Los clientes de boto3 son thread-safe; las sesiones y los resources no, por eso su
+#     creación va bajo lock y los resources (que usa django-storages) se guardan por hilo.
+#   - Un pool de conexiones HTTP keep-alive de AWS_S3_MAX_POOL_CONNECTIONS, compartido por todos los hilos del proceso.
+# El backend SharedS3Storage hace que django-storages use la misma sesión y el mismo pool, respetando sus propias opciones
+# (endpoint, addressing_style, verify, proxies, credenciales...): los resources se comparten por combinación de opciones.
+# Cambiar los settings AWS_* (p. ej. override_settings en tests) descarta los objetos cacheados.
+# ====================================================================================================================
+
+_lock = threading.Lock()
+_local = threading.local()
+_sessions = {}  # Por credenciales
+_client = None
+_generation = 0  # Se incrementa en cada reset para que los resources por hilo creados antes se descarten
+
+
+def client_config_options():
+    # Los kwargs de Config del pool compartido. Se guardan explícitos porque también forman la clave de los resources.
+    return {
+        'region_name': getattr(settings, 'AWS_S3_REGION_NAME', None),
+        'signature_version': 's3v4',
+        'max_pool_connections': getattr(settings, 'AWS_S3_MAX_POOL_CONNECTIONS', 50),
+        'retries': {'max_attempts': 3, 'mode': 'standard'},
+        'tcp_keepalive': True,
+    }
+
+
+def client_config():
+    return Config(**client_config_options())
+
+
+def _default_credentials():
+    # (access key, secret, token, perfil), el mismo orden que usa SharedS3Storage.
+    return settings.AWS_ACCESS_KEY_ID, settings.AWS_SECRET_ACCESS_KEY, None, None
+
+
+def _get_session(credentials=None):
+    # Llamar siempre con _lock tomado.
+    credentials = credentials or _default_credentials()
+    if credentials not in _sessions:
+        access_key, secret_key, token, profile = credentials
+        if profile:
+            _sessions[credentials] = boto3.Session(profile_name=profile)
+        else:
+            _sessions[credentials] = boto3.Session(
+                aws_access_key_id=access_key, aws_secret_access_key=secret_key, aws_session_token=token,
+            )
+    return _sessions[credentials]
+
+
+def get_s3_client():
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                _client = _get_session().client('s3', endpoint_url=settings.AWS_S3_ENDPOINT_URL, config=client_config())
+    return _client
+
+
+def get_s3_resource(credentials=None, config_options=None, **resource_kwargs):
+    # Un resource por hilo y por combinación de opciones: dos storages con distinto endpoint, addressing_style, verify o
+    # proxies no se mezclan, pero sí comparten la sesión si usan las mismas credenciales. config_options (kwargs de Config)
+    # pisan a las del pool compartido.
+    credentials = credentials or _default_credentials()
+    options = {**client_config_options(), **(config_options or {})}
+    resource_kwargs.setdefault('endpoint_url', settings.AWS_S3_ENDPOINT_URL)
+    key = repr((credentials, sorted(resource_kwargs.items()), sorted(options.items())))
+    if getattr(_local, 'generation', None) != _generation:
+        _local.resources = {}
+        _local.generation = _generation
+    if key not in _local.resources:
+        with _lock:
+            _local.resources[key] = _get_session(credentials).resource('s3', config=Config(**options), **resource_kwargs)
+    return _local.resources[key]
+
+
+def reset_clients():
+    global _client, _generation
+    with _lock:
+        _sessions.clear()
+        _client = None
+        _generation += 1
+
+
+@receiver(setting_changed)
+def _reset_on_settings_change(setting, **kwargs):
+    if setting.startswith('AWS_'):
+        reset_clients()
+
+
+class SharedS3Storage(S3Boto3Storage):
+    # Backend de media: igual que S3Boto3Storage pero con la sesión y el pool de conexiones compartidos del proceso. Las
+    # opciones propias del storage (las mismas que S3Boto3Storage pone en su Config por defecto) pisan a las del pool
+    # compartido y forman parte de la clave. Con un AWS_S3_CLIENT_CONFIG propio no hay kwargs que comparar: se usa la
+    # conexión normal de django-storages.
+    def __init__(self, **settings_):
+        custom_config = settings_.get('client_config', getattr(settings, 'AWS_S3_CLIENT_CONFIG', None))
+        super().__init__(**settings_)
+        self._custom_client_config = custom_config is not None or self.config is not None
+
+    @property
+    def connection(self):
+        if self._custom_client_config:
+            return super().connection
+        if not hasattr(self, '_shared_options'):
+            config_options = {'s3': {'addressing_style': self.addressing_style}}
+            if self.signature_version is not None:
+                config_options['signature_version'] = self.signature_version
+            if self.proxies is not None:
+                config_options['proxies'] = self.proxies
+            self._shared_options = {
+                'credentials': (self.access_key, self.secret_key, self.security_token, self.session_profile),
+                'config_options': config_options,
+                'region_name': self.region_name,
+                'use_ssl': self.use_ssl,
+                'endpoint_url': self.endpoint_url,
+                'verify': self.verify,
+            }
+        return get_s3_resource(**self._shared_options)
@@ -0,0 +1,206 @@
+import logging
+import os
+import socket
+import threading
+import traceback
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import ExerciseLog, Task, Workout
+from .reports import send_daily_report
+from .video import VideoProcessingError, process_log_video
+
+logger = logging.getLogger(__name__)
+
+# ====================================================================================================================
+# Cola de Tareas en Base de Datos
+# ====================================================================================================================
+# Trabajo lento (generar el Excel del reporte diario y hablar con SMTP) fuera del request. La vista solo inserta una fila en
+# Task dentro de su misma transacción: si el log no se confirma, la tarea tampoco existe. El comando run_tasks la ejecuta.
+#
+#   - Reclamo: el worker toma una tarea con SELECT ... FOR UPDATE SKIP LOCKED (MySQL 8) y la marca 'running', así varios
+#     workers no ejecutan la misma tarea. Una tarea 'running' con locked_at más viejo que TASK_LOCK_TIMEOUT se considera
+#     huérfana (worker caído) y se vuelve a reclamar. Mientras el handler corre, un hilo renueva locked_at cada
+#     TASK_HEARTBEAT_SECONDS, así una tarea larga (un video) no se toma por huérfana ni la ejecutan dos workers a la vez.
+#     run_pending reclama de a una y no por lotes: una tarea reclamada que espera turno no tiene latido, y detrás de un
+#     video de 15 minutos otro worker la tomaría por huérfana y la ejecutaría dos veces.
+#   - Dueño del lock: antes de ejecutar y al guardar el resultado se filtra por locked_by. Un worker que perdió el reclamo
+#     (otro la tomó tras el timeout) no ejecuta la tarea ni pisa el resultado del otro.
+#   - Intentos: se cuentan al reclamar, en el mismo UPDATE. Si el worker muere a mitad de tarea (OOM, SIGKILL) el intento
+#     ya quedó contado; la tarea que agota max_attempts así se marca 'failed' sin volver a ejecutarla.
+#   - Reintentos: si el handler lanza una excepción se reprograma con backoff exponencial (base × 2^(intento-1), con tope)
+#     hasta max_attempts; luego queda 'failed' con el traceback en last_error.
+#   - Idempotencia: enqueue con la misma idempotency_key devuelve la tarea existente en vez de crear otra.
+# ====================================================================================================================
+
+TASK_RETRY_BASE = getattr(settings, 'TASK_RETRY_BASE_SECONDS', 30)
+TASK_RETRY_MAX = getattr(settings, 'TASK_RETRY_MAX_SECONDS', 3600)
+TASK_LOCK_TIMEOUT = getattr(settings, 'TASK_LOCK_TIMEOUT_SECONDS', 600)
+
+
+def heartbeat_interval():
+    return getattr(settings, 'TASK_HEARTBEAT_SECONDS', TASK_LOCK_TIMEOUT / 3)
+
+HANDLERS = {}
+
+
+def task(name):
+    # Registra un handler: recibe el payload (dict) de la tarea.
+    def register(func):
+        HANDLERS[name] = func
+        return func
+    return register
+
+
+def enqueue(name, payload=None, idempotency_key=None, delay=0, max_attempts=5):
+    if name not in HANDLERS:
+        raise ValueError(f'Tarea no registrada: {name}')
+    fields = {
+        'name': name,
+        'payload': payload or {},
+        'run_at': timezone.now() + timedelta(seconds=delay),
+        'max_attempts': max_attempts,
+    }
+    if idempotency_key is None:
+        return Task.objects.create(**fields)
+    # El savepoint permite recuperar la fila existente si otro request la insertó a la vez (clave única).
+    try:
+        with transaction.atomic():
+            return Task.objects.create(idempotency_key=idempotency_key, **fields)
+    except IntegrityError:
+        return Task.objects.get(idempotency_key=idempotency_key)
+
+
+def retry_delay(attempts):
+    return min(TASK_RETRY_BASE * 2 ** max(attempts - 1, 0), TASK_RETRY_MAX)
+
+
+def worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def claim_tasks(worker, limit=10):
+    now = timezone.now()
+    stale = now - timedelta(seconds=TASK_LOCK_TIMEOUT)
+    with transaction.atomic():
+        ready = Task.objects.filter(Q(status='pending', run_at__lte=now) | Q(status='running', locked_at__lt=stale))
+        tasks = list(ready.select_for_update(skip_locked=True).order_by('run_at', 'pk')[:limit])
+        if tasks:
+            Task.objects.filter(pk__in=[t.pk for t in tasks]).update(
+                status='running', locked_at=now, locked_by=worker, attempts=F('attempts') + 1,
+            )
+    for task_obj in tasks:
+        task_obj.status, task_obj.locked_at, task_obj.locked_by = 'running', now, worker
+        task_obj.attempts += 1
+    return tasks
+
+
+@contextmanager
+def heartbeat(task_obj):
+    # Renueva locked_at desde otro hilo (con su propia conexión) mientras dura el handler. Solo si el lock sigue siendo de
+    # este worker: si otro la reclamó, no se le pisa.
+    stop = threading.Event()
+
+    def beat():
+        try:
+            while not stop.wait(heartbeat_interval()):
+                try:
+                    Task.objects.filter(pk=task_obj.pk, locked_by=task_obj.locked_by).update(locked_at=timezone.now())
+                except DatabaseError:
+                    logger.warning('No se pudo renovar el lock de la tarea #%s', task_obj.pk, exc_info=True)
+        finally:
+            connections.close_all()  # Solo las conexiones de este hilo
+
+    thread = threading.Thread(target=beat, name=f'task-heartbeat-{task_obj.pk}', daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def run_task(task_obj):
+    worker = task_obj.locked_by
+    owned = Task.objects.filter(pk=task_obj.pk, status='running', locked_by=worker)
+    if not owned.exists():
+        logger.warning('Tarea %s #%s ya no es de %s: no se ejecuta', task_obj.name, task_obj.pk, worker)
+        return None
+    if task_obj.attempts > task_obj.max_attempts:
+        # Intentos agotados por workers que murieron a mitad de tarea: no se vuelve a ejecutar.
+        task_obj.status = 'failed'
+        task_obj.finished_at = timezone.now()
+        task_obj.last_error = task_obj.last_error or 'El worker terminó sin completar la tarea en todos los intentos'
+        logger.error('Tarea %s #%s abandonada tras %s intentos sin terminar', task_obj.name, task_obj.pk, task_obj.max_attempts)
+    else:
+        try:
+            handler = HANDLERS[task_obj.name]
+            with heartbeat(task_obj):
+                handler(task_obj.payload)
+        except Exception:
+            task_obj.last_error = traceback.format_exc()
+            if task_obj.attempts >= task_obj.max_attempts:
+                task_obj.status = 'failed'
+                task_obj.finished_at = timezone.now()
+                logger.error('Tarea %s #%s fallida tras %s intentos', task_obj.name, task_obj.pk, task_obj.attempts)
+            else:
+                task_obj.status = 'pending'
+                task_obj.run_at = timezone.now() + timedelta(seconds=retry_delay(task_obj.attempts))
+                logger.warning('Tarea %s #%s falló (intento %s), se reintenta', task_obj.name, task_obj.pk, task_obj.attempts)
+        else:
+            task_obj.status = 'done'
+            task_obj.finished_at = timezone.now()
+            task_obj.last_error = ''
+    task_obj.locked_at = None
+    task_obj.locked_by = ''
+    saved = owned.update(
+        status=task_obj.status, run_at=task_obj.run_at, finished_at=task_obj.finished_at, last_error=task_obj.last_error,
+        locked_at=None, locked_by='',
+    )
+    if not saved:
+        logger.warning('Tarea %s #%s reclamada por otro worker mientras corría: se descarta el resultado', task_obj.name, task_obj.pk)
+    return task_obj.status
+
+
+def run_pending(worker=None, limit=10):
+    # Una vuelta del worker: hasta `limit` tareas, reclamadas y ejecutadas de a una. Devuelve cuántas se procesaron.
+    worker = worker or worker_id()
+    processed = 0
+    while processed < limit:
+        tasks = claim_tasks(worker, 1)
+        if not tasks:
+            break
+        run_task(tasks[0])
+        processed += 1
+    return processed
+
+
+# --------------------------------------------------------------------------------------------------------------------
+# Handlers
+# --------------------------------------------------------------------------------------------------------------------
+
+@task('send_daily_report')
+def send_daily_report_task(payload):
+    workout = Workout.objects.select_related('plan__client', 'plan__trainer').filter(pk=payload['workout_id']).first()
+    if workout is None:
+        return  # El workout se borró antes de que corriera la tarea: no hay nada que reportar.
+    send_daily_report(workout)
+
+
+@task('process_video')
+def process_video_task(payload):
+    log = ExerciseLog.objects.filter(pk=payload['log_id']).first()
+    if log is None or not log.video_log:
+        return
+    try:
+        process_log_video(log)
+    except VideoProcessingError:
+        # ffmpeg rechazó el archivo (corrupto, códec desconocido): reintentar no cambia nada. Se sigue sirviendo el original.
+        # Los errores de red/almacenamiento sí se propagan para que la cola reintente con backoff.
+        ExerciseLog.objects.filter(pk=log.pk).update(video_status='failed')
+        logger.exception('No se pudo procesar el video del log #%s', log.pk)
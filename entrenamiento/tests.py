@@ -1,3 +1,1504 @@
-from django.test import TestCase
+import csv
+import datetime
+import json
+import multiprocessing
+import os
+import shutil
+import socket
+import subprocess
+import tempfile
+import unittest
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.mime.text import MIMEText
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+import openpyxl
+from botocore.config import Config
+from botocore.exceptions import EndpointConnectionError
+from botocore.stub import Stubber
+from django.core import mail
+from django.core.mail import EmailMessage, EmailMultiAlternatives
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError, OperationalError, connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core.models import User
+from .analytics import client_metrics, get_or_compute, trainer_metrics
+from .completion import annotate_completion, completion_summary
+from .counters import rebuild_progress
+from .management.commands.weekly_reports import workbook_pool
+from .export import export_chunks, export_queryset, parquet_available, stream_xlsx
+from .history import history_page
+from .loadtest import Phase, plan_sessions
+from . import checks, instrumentation
+from .outbox import queue_email, send_batch
+from .plans import instantiate_template, template_from_plan, week_prescription
+from .progress import build_progress_series, lttb_indices
+from .records import backfill_records, exercise_records
+from .reports import build_daily_workbook
+from .roster import paginate_roster
+from .slowlog import capture_slow_queries
+from .storage import SharedS3Storage, get_s3_client, get_s3_resource
+from .tasks import HANDLERS, claim_tasks, enqueue, run_pending, run_task, task
+from . import warmups
+from .weekly import build_weekly_workbook, previous_week, weekly_data
+from .xlsx import Column, XlsxReport
+from .models import (
+    Exercise, ExerciseLog, Outbox, PersonalRecord, PlanTemplate, SlowQuery, Task, TemplateExercise, TemplateWorkout, TrainingPlan, UploadSession, Warmup, Workout,
+    WorkoutExercise,
+)
+
+
+class EntrenamientoTestMixin:
+    # Datos base: un entrenador, un cliente asignado y un catálogo mínimo de ejercicios.
+    @classmethod
+    def setUpTestData(cls):
+        cls.trainer = User.objects.create_user(username='coach', password='x', rut='1-9', role='ENTRENADOR', email='coach@example.com')
+        cls.client_user = User.objects.create_user(
+            username='cliente', password='x', rut='2-7', role='CLIENTE', email='cliente@example.com',
+            assigned_professional=cls.trainer,
+        )
+        cls.exercises = [Exercise.objects.create(name=f'Ejercicio {i}') for i in range(3)]
+
+    def make_plan(self, weeks=1, days=3, exercises_per_workout=3, client=None):
+        client = client or self.client_user
+        plan = TrainingPlan.objects.create(
+            trainer=self.trainer, client=client, name=f'Plan {weeks} semanas',
+            start_date=datetime.date.today(), end_date=datetime.date.today() + datetime.timedelta(weeks=weeks),
+        )
+        for week in range(1, weeks + 1):
+            for day in range(1, days + 1):
+                workout = Workout.objects.create(plan=plan, week_number=week, day_of_week=day, title=f'S{week}D{day}')
+                for order in range(exercises_per_workout):
+                    WorkoutExercise.objects.create(
+                        workout=workout, exercise=self.exercises[order % len(self.exercises)],
+                        sets=3, reps_target='8-12', order=order + 1,
+                    )
+        return plan
+
+    def log(self, workout_exercise, status='completed', weight=50, reps=10, client=None):
+        return ExerciseLog.objects.create(
+            client=client or self.client_user, workout_exercise=workout_exercise,
+            weight_lifted_kg=weight, reps_completed=reps, status=status,
+        )
+
+    def count_queries(self, url):
+        # Se mide el camino sin caché: las métricas de los dashboards quedan cacheadas entre requests (ver analytics.py).
+        cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+
+class CompletionTests(EntrenamientoTestMixin, TestCase):
+    def test_status_per_workout(self):
+        plan = self.make_plan(weeks=1, days=3)
+        done, partial, pending = plan.workouts.order_by('day_of_week')
+        for ex in done.exercises.all():
+            self.log(ex)
+            self.log(ex)  # Logs repetidos no deben inflar el conteo.
+        self.log(partial.exercises.first(), status='half')
+
+        statuses = dict(annotate_completion(plan.workouts.all()).values_list('pk', 'completion_status'))
+        self.assertEqual(statuses, {done.pk: 'completed', partial.pk: 'partial', pending.pk: 'pending'})
+
+        summary = completion_summary(plan.workouts.all())
+        self.assertEqual((summary['total'], summary['completed'], summary['partial'], summary['pending']), (3, 1, 1, 1))
+        self.assertEqual(summary['logged'], 1)
+        self.assertTrue(done.is_complete())
+        self.assertFalse(partial.is_complete())
+
+    def test_is_complete_single_query(self):
+        plan = self.make_plan(weeks=1, days=1, exercises_per_workout=6)
+        workout = plan.workouts.get()
+        with self.assertNumQueries(1):
+            workout.is_complete()
+
+
+class CompletionQueryCountTests(EntrenamientoTestMixin, TestCase):
+    # Regresión: el número de queries de las páginas no debe depender del número de workouts del plan.
+    def setUp(self):
+        self.client.force_login(self.client_user)
+
+    def test_client_dashboard_constant_queries(self):
+        self.make_plan(weeks=1)
+        small = self.count_queries(reverse('client_dashboard'))
+        self.make_plan(weeks=12)
+        self.assertEqual(self.count_queries(reverse('client_dashboard')), small)
+
+    def test_view_plan_constant_queries(self):
+        small_plan = self.make_plan(weeks=1)
+        big_plan = self.make_plan(weeks=12)
+        for workout in big_plan.workouts.all()[:10]:
+            self.log(workout.exercises.first())
+        small = self.count_queries(reverse('view_plan', args=[small_plan.id]))
+        self.assertEqual(self.count_queries(reverse('view_plan', args=[big_plan.id])), small)
+
+
+class ProgressCounterTests(EntrenamientoTestMixin, TestCase):
+    def assertCounters(self, obj, exercises, logged, completed):
+        obj.refresh_from_db()
+        self.assertEqual((obj.exercise_count, obj.logged_count, obj.completed_count), (exercises, logged, completed))
+
+    def test_counters_follow_log_lifecycle(self):
+        plan = self.make_plan(weeks=1, days=2)
+        workout = plan.workouts.order_by('day_of_week').first()
+        first, second, _ = workout.exercises.all()
+        self.assertCounters(plan, 6, 0, 0)
+
+        log = self.log(first, status='half')
+        self.log(first)
+        self.assertCounters(workout, 3, 1, 1)
+        self.assertEqual(workout.last_log_at, ExerciseLog.objects.latest('date_completed').date_completed)
+
+        log.status = 'completed'
+        log.save()
+        other = self.log(second, status='not_completed')
+        self.assertCounters(plan, 6, 2, 1)
+
+        other.delete()
+        self.assertCounters(plan, 6, 1, 1)
+        first.delete()
+        self.assertCounters(plan, 5, 0, 0)
+        plan.refresh_from_db()
+        self.assertIsNone(plan.last_log_at)
+
+        workout.delete()
+        self.assertCounters(plan, 3, 0, 0)
+        self.assertEqual(rebuild_progress(fix=False), (0, 0))
+
+    def test_cascade_deletes_do_not_scale_with_logs(self):
+        plan = self.make_plan(weeks=3, days=1)
+        few, many, bulk = plan.workouts.order_by('date')
+        for workout, sets in ((few, 1), (many, 4), (bulk, 4)):
+            for exercise in workout.exercises.all():
+                for _ in range(sets):
+                    self.log(exercise)
+        with CaptureQueriesContext(connection) as small:
+            few.delete()
+        with CaptureQueriesContext(connection) as big:
+            many.delete()
+        self.assertEqual(len(big), len(small))  # Un log o cuatro por ejercicio: mismas queries
+        self.assertCounters(plan, 3, 3, 3)
+
+        ExerciseLog.objects.filter(workout_exercise__workout=bulk).delete()
+        self.assertCounters(plan, 3, 0, 0)
+        self.assertEqual(rebuild_progress(fix=False), (0, 0))
+
+    def test_rebuild_repairs_drift(self):
+        plan = self.make_plan(weeks=1, days=1)
+        self.log(plan.workouts.get().exercises.first())
+        Workout.objects.update(logged_count=0)
+        TrainingPlan.objects.update(exercise_count=99)
+        self.assertEqual(rebuild_progress(fix=True), (1, 1))
+        self.assertCounters(plan, 3, 1, 1)
+        self.assertEqual(rebuild_progress(fix=False), (0, 0))
+
+    def test_plan_detail_constant_queries(self):
+        self.client.force_login(self.trainer)
+        small = self.make_plan(weeks=1)
+        big = self.make_plan(weeks=12)
+        self.log(big.workouts.first().exercises.first())
+        baseline = self.count_queries(reverse('trainer_plan_detail', args=[small.id]))
+        self.assertEqual(self.count_queries(reverse('trainer_plan_detail', args=[big.id])), baseline)
+
+
+class TrainerRosterTests(EntrenamientoTestMixin, TestCase):
+    def add_clients(self, count, start=0):
+        return [
+            User.objects.create_user(username=f'c{i}', password='x', rut=f'9{i}', role='CLIENTE', assigned_professional=self.trainer)
+            for i in range(start, start + count)
+        ]
+
+    def test_roster_sorted_by_recency(self):
+        idle, recent = self.add_clients(2)
+        for client in (self.client_user, recent):
+            plan = self.make_plan(weeks=1, days=1, client=client)
+            self.log(plan.workouts.get().exercises.first(), client=client)
+        page = paginate_roster(self.trainer, sort='recent')
+        self.assertEqual([c.username for c in page], ['c1', 'cliente', 'c0'])
+        self.assertEqual(page[0].active_plans, 1)
+        self.assertEqual(page[0].active_plan.client, recent)
+        self.assertIsNone(page[2].active_plan)
+
+    def test_trainer_dashboard_constant_queries(self):
+        self.client.force_login(self.trainer)
+        for client in self.add_clients(3):
+            self.make_plan(weeks=1, days=1, client=client)
+        small = self.count_queries(reverse('trainer_dashboard'))
+        for client in self.add_clients(40, start=3):
+            self.make_plan(weeks=1, days=1, client=client)
+        self.assertEqual(self.count_queries(reverse('trainer_dashboard') + '?clients_page=2'), small)
+
+
+class IndexAuditTests(EntrenamientoTestMixin, TestCase):
+    def test_hot_paths_use_indexes(self):
+        plan = self.make_plan(weeks=1, days=1)
+        self.log(plan.workouts.get().exercises.first())
+        out = StringIO()
+        call_command('audit_indexes', '--fail-on-scan', stdout=out)
+        self.assertIn('0 queries con full table scan', out.getvalue())
+
+
+class LogHistoryTests(EntrenamientoTestMixin, TestCase):
+    def setUp(self):
+        plan = self.make_plan(weeks=1, days=1)
+        self.w_exercises = list(plan.workouts.get().exercises.all())
+        self.logs = [self.log(self.w_exercises[i % 3], weight=i) for i in range(7)]
+        # Fechas repetidas: el desempate por id debe evitar saltos o duplicados entre páginas.
+        ExerciseLog.objects.filter(pk__in=[log.pk for log in self.logs[2:5]]).update(date_completed=self.logs[2].date_completed)
+
+    def test_cursor_walks_every_log_once(self):
+        seen, params = [], {}
+        while True:
+            page, cursor = history_page(self.client_user, params, page_size=3)
+            seen.extend(log.pk for log in page)
+            if not cursor:
+                break
+            params = {'cursor': cursor}
+        self.assertEqual(sorted(seen), sorted(log.pk for log in self.logs))
+        self.assertEqual(len(seen), len(set(seen)))
+
+    def test_exercise_filter_and_json_endpoint(self):
+        self.client.force_login(self.trainer)
+        url = reverse('client_log_history', args=[self.client_user.id])
+        data = self.client.get(url, {'exercise': self.w_exercises[0].exercise_id}).json()
+        self.assertEqual(len(data['logs']), 3)
+        self.assertIsNone(data['next_cursor'])
+        self.assertEqual({row['exercise'] for row in data['logs']}, {self.w_exercises[0].exercise.name})
+
+        other = User.objects.create_user(username='otro', password='x', rut='3-5', role='CLIENTE')
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+    def test_client_logs_page_renders(self):
+        self.client.force_login(self.trainer)
+        response = self.client.get(reverse('client_logs', args=[self.client_user.id]), {'date_from': 'x'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['logs']), 7)
+
+
+class ProgressSeriesTests(EntrenamientoTestMixin, TestCase):
+    def test_lttb_respects_budget_and_keeps_extremes(self):
+        xs = list(range(1000))
+        ys = [float(x % 97) for x in xs]
+        ys[500] = 1000.0  # Pico aislado: LTTB debe conservarlo.
+        keep = lttb_indices(xs, ys, 50)
+        self.assertEqual(len(keep), 50)
+        self.assertEqual((keep[0], keep[-1]), (0, 999))
+        self.assertIn(500, keep)
+        self.assertEqual(lttb_indices(xs[:10], ys[:10], 50), list(range(10)))
+
+    def test_series_and_constant_queries(self):
+        plan = self.make_plan(weeks=1, days=1)
+        w_exercise = plan.workouts.get().exercises.first()
+        self.log(w_exercise, weight=100, reps=10)
+        self.log(w_exercise, weight=100, reps=5)
+        series = build_progress_series(plan)
+        self.assertEqual(set(series), {ex.name for ex in self.exercises})
+        data = series[w_exercise.exercise.name]
+        self.assertEqual(data['e1rm'], [133.3, 116.7])
+        self.assertEqual(data['weekly_volume']['volume'], [1500])
+
+        self.client.force_login(self.trainer)
+        baseline = self.count_queries(reverse('progress_view', args=[plan.id]))
+        extra = Exercise.objects.create(name='Extra')
+        WorkoutExercise.objects.create(workout=plan.workouts.get(), exercise=extra, sets=3, reps_target='5')
+        self.assertEqual(self.count_queries(reverse('progress_view', args=[plan.id])), baseline)
+
+
+class AnalyticsCacheTests(EntrenamientoTestMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_metrics_cached_until_invalidated(self):
+        plan = self.make_plan(weeks=1, days=1)
+        first = client_metrics(self.client_user)
+        with self.assertNumQueries(0):
+            self.assertEqual(client_metrics(self.client_user), first)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.log(plan.workouts.get().exercises.first())
+        self.assertEqual(client_metrics(self.client_user)['completed_exercises'], first['completed_exercises'] + 1)
+        self.assertEqual(trainer_metrics(self.trainer)['exercises_count'], 3)
+
+    def test_evicted_version_never_reuses_an_old_entry(self):
+        plan = self.make_plan(weeks=1, days=1)
+        stale = client_metrics(self.client_user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.log(plan.workouts.get().exercises.first())
+        cache.delete(f'analytics:version:{self.client_user.pk}')  # Desalojada; la entrada de la primera versión sigue viva
+        self.assertEqual(client_metrics(self.client_user)['completed_exercises'], stale['completed_exercises'] + 1)
+
+    def test_concurrent_misses_compute_once(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return {'value': 42}
+
+        with ThreadPoolExecutor(max_workers=5) as pool:
+            results = list(pool.map(lambda _: get_or_compute('analytics:test', compute), range(5)))
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{'value': 42}] * 5)
+
+
+class TaskQueueTests(EntrenamientoTestMixin, TestCase):
+    def test_log_exercise_enqueues_report_instead_of_sending(self):
+        plan = self.make_plan(weeks=1, days=1, exercises_per_workout=1)
+        w_exercise = plan.workouts.get().exercises.get()
+        self.client.force_login(self.client_user)
+        data = {'weight_lifted_kg': 60, 'reps_completed': 8, 'status': 'completed', 'notes': ''}
+        for _ in range(2):
+            response = self.client.post(reverse('log_exercise', args=[w_exercise.pk]), data)
+            self.assertEqual(response.status_code, 302)
+        # Nada se envía dentro del request y el segundo log del workout completo no duplica la tarea.
+        self.assertEqual(len(mail.outbox), 0)
+        queued = Task.objects.get()
+        self.assertEqual((queued.name, queued.status), ('send_daily_report', 'pending'))
+
+        call_command('run_tasks', '--once', stdout=StringIO())
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, 'done')
+        self.assertEqual(len(mail.outbox), 0)  # El reporte queda en la bandeja de salida
+        call_command('send_outbox', stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['coach@example.com'])
+        self.assertEqual(len(mail.outbox[0].attachments), 1)
+
+    def test_failing_task_retries_with_backoff_then_fails(self):
+        @task('test_boom')
+        def boom(payload):
+            raise RuntimeError('SMTP caído')
+        self.addCleanup(HANDLERS.pop, 'test_boom')
+
+        queued = enqueue('test_boom', max_attempts=2)
+        with self.assertLogs('entrenamiento.tasks', 'WARNING'):
+            self.assertEqual(run_pending(), 1)
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.attempts), ('pending', 1))
+        self.assertGreater(queued.run_at, timezone.now())
+        self.assertIn('SMTP caído', queued.last_error)
+        self.assertEqual(run_pending(), 0)  # Aún en backoff
+
+        Task.objects.filter(pk=queued.pk).update(run_at=timezone.now())
+        with self.assertLogs('entrenamiento.tasks', 'ERROR'):
+            run_pending()
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.attempts), ('failed', 2))
+
+    def test_worker_crashes_count_as_attempts(self):
+        calls = []
+        task('test_crash')(calls.append)
+        self.addCleanup(HANDLERS.pop, 'test_crash')
+
+        queued = enqueue('test_crash', max_attempts=2)
+        stale = timezone.now() - datetime.timedelta(hours=1)
+        for attempt in (1, 2):
+            claim_tasks('worker-que-muere')  # El worker reclama y muere sin terminar
+            queued.refresh_from_db()
+            self.assertEqual((queued.status, queued.attempts), ('running', attempt))
+            Task.objects.filter(pk=queued.pk).update(locked_at=stale)
+
+        with self.assertLogs('entrenamiento.tasks', 'ERROR'):
+            self.assertEqual(run_pending(), 1)
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, 'failed')
+        self.assertEqual(calls, [])  # Agotó los intentos: no se vuelve a ejecutar
+
+    def test_claims_one_task_at_a_time(self):
+        running = []
+        task('test_count')(lambda payload: running.append(Task.objects.filter(status='running').count()))
+        self.addCleanup(HANDLERS.pop, 'test_count')
+        for _ in range(3):
+            enqueue('test_count')
+        self.assertEqual(run_pending(limit=10), 3)
+        self.assertEqual(running, [1, 1, 1])  # Las que esperan turno siguen 'pending', no reclamadas sin latido
+
+    def test_lost_claim_neither_runs_nor_overwrites(self):
+        calls = []
+        task('test_lost')(calls.append)
+        self.addCleanup(HANDLERS.pop, 'test_lost')
+
+        enqueue('test_lost')
+        claimed = claim_tasks('worker-lento', 1)[0]
+        Task.objects.filter(pk=claimed.pk).update(locked_by='otro-worker')  # Otro la reclamó tras el timeout
+        with self.assertLogs('entrenamiento.tasks', 'WARNING'):
+            self.assertIsNone(run_task(claimed))
+        self.assertEqual(calls, [])
+
+        def steal(payload):
+            Task.objects.filter(name='test_steal').update(locked_by='otro-worker')
+        task('test_steal')(steal)
+        self.addCleanup(HANDLERS.pop, 'test_steal')
+        enqueue('test_steal')
+        with self.assertLogs('entrenamiento.tasks', 'WARNING'):
+            run_task(claim_tasks('worker-lento', 1)[0])
+        self.assertEqual(Task.objects.filter(name='test_steal').values_list('status', 'locked_by').get(), ('running', 'otro-worker'))
+
+    def test_enqueue_is_idempotent(self):
+        first = enqueue('send_daily_report', {'workout_id': 1}, idempotency_key='daily_report:1')
+        second = enqueue('send_daily_report', {'workout_id': 1}, idempotency_key='daily_report:1')
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(Task.objects.count(), 1)
+
+
+class TaskHeartbeatTests(TransactionTestCase):
+    # TransactionTestCase: el latido escribe desde su propio hilo y conexión.
+    @override_settings(TASK_HEARTBEAT_SECONDS=0.05)
+    def test_long_task_keeps_renewing_its_lock(self):
+        seen = []
+
+        @task('test_slow')
+        def slow(payload):
+            claimed = Task.objects.get(name='test_slow').locked_at
+            time.sleep(0.3)
+            seen.append(Task.objects.get(name='test_slow').locked_at > claimed)
+        self.addCleanup(HANDLERS.pop, 'test_slow')
+
+        enqueue('test_slow')
+        run_pending()
+        self.assertEqual(seen, [True])
+        self.assertEqual(Task.objects.get().status, 'done')
+
+
+S3_TEST_SETTINGS = dict(
+    AWS_ACCESS_KEY_ID='test', AWS_SECRET_ACCESS_KEY='test', AWS_STORAGE_BUCKET_NAME='videos',
+    AWS_S3_ENDPOINT_URL='http://s3.test.local', AWS_S3_REGION_NAME='us-east-1',
+)
+
+
+@override_settings(**S3_TEST_SETTINGS)
+class SharedStorageClientTests(EntrenamientoTestMixin, TestCase):
+    def test_one_client_per_process_across_threads(self):
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            clients = set(map(id, pool.map(lambda _: get_s3_client(), range(32))))
+        self.assertEqual(len(clients), 1)
+        with override_settings(AWS_S3_ENDPOINT_URL='http://otro.test.local'):
+            self.assertEqual(get_s3_client().meta.endpoint_url, 'http://otro.test.local')
+        self.assertEqual(get_s3_client().meta.endpoint_url, 'http://s3.test.local')
+
+    def test_presign_part_view_reuses_shared_client(self):
+        self.client.force_login(self.client_user)
+        shared = get_s3_client()
+        for number in (1, 2):
+            response = self.client.post(reverse('generate_presigned_part'), {
+                'key': 'logs/videos/a.mp4', 'upload_id': 'abc', 'part_number': number,
+            })
+            self.assertEqual(response.status_code, 200)
+            self.assertIn(f'partNumber={number}', response.json()['url'])
+        self.assertIs(get_s3_client(), shared)
+
+    def test_storage_backend_shares_resources_per_options(self):
+        storage = SharedS3Storage()
+        self.assertIs(storage.connection, SharedS3Storage().connection)
+        self.assertEqual(storage.connection.meta.client.meta.endpoint_url, 'http://s3.test.local')
+        self.assertEqual(storage.connection.meta.client.meta.config.max_pool_connections, 50)
+
+        path_style = SharedS3Storage(addressing_style='path', endpoint_url='http://otro.test.local', verify=False)
+        self.assertIsNot(path_style.connection, storage.connection)
+        self.assertEqual(path_style.connection.meta.client.meta.config.s3['addressing_style'], 'path')
+        self.assertEqual(path_style.connection.meta.client.meta.endpoint_url, 'http://otro.test.local')
+        self.assertIs(get_s3_resource(), get_s3_resource())
+
+    def test_storage_with_its_own_client_config_is_not_shared(self):
+        config = Config(max_pool_connections=7)
+        storage = SharedS3Storage(client_config=config)
+        self.assertIsNot(storage.connection, SharedS3Storage().connection)
+        self.assertEqual(storage.connection.meta.client.meta.config.max_pool_connections, 7)
+        # La Config del pool compartido mantiene sus kwargs aunque el storage no defina signature_version.
+        self.assertEqual(SharedS3Storage().connection.meta.client.meta.config.signature_version, 's3v4')
+
+
+@override_settings(**S3_TEST_SETTINGS, VIDEO_UPLOAD_CONCURRENCY=6)
+class PresignedPartsBatchTests(EntrenamientoTestMixin, TestCase):
+    def setUp(self):
+        self.client.force_login(self.client_user)
+
+    def test_one_request_signs_a_range_of_parts(self):
+        UploadSession.objects.create(
+            user=self.client_user, key='logs/videos/a.mp4', upload_id='abc', file_name='a.mp4',
+            file_size=500 * 1024 * 1024, part_size=5 * 1024 * 1024,
+        )
+        with self.assertNumQueries(3):  # Sesión de Django, usuario y UploadSession; firmar no toca la BD
+            response = self.client.post(reverse('generate_presigned_parts'), {
+                'key': 'logs/videos/a.mp4', 'upload_id': 'abc', 'first_part': 1, 'part_count': 100,
+            })
+        parts = response.json()['parts']
+        self.assertEqual([p['part_number'] for p in parts], list(range(1, 101)))
+        self.assertIn('partNumber=100', parts[-1]['url'])
+
+    def test_rejects_foreign_keys_and_bad_ranges(self):
+        url = reverse('generate_presigned_parts')
+        for data in (
+            {'key': 'otro/archivo.mp4', 'upload_id': 'abc', 'part_count': 1},
+            {'key': 'logs/videos/a.mp4', 'upload_id': 'abc', 'first_part': 0},
+            {'key': 'logs/videos/a.mp4', 'upload_id': 'abc', 'part_count': 1001},
+            {'key': 'logs/videos/a.mp4', 'upload_id': 'abc', 'first_part': 9990, 'part_count': 20},
+        ):
+            self.assertEqual(self.client.post(url, data).status_code, 400)
+
+    def test_report_page_exposes_upload_parallelism(self):
+        plan = self.make_plan(weeks=1, days=1, exercises_per_workout=1)
+        w_exercise = plan.workouts.get().exercises.get()
+        response = self.client.get(reverse('log_exercise', args=[w_exercise.pk]))
+        self.assertContains(response, 'const uploadConcurrency = 6;')
+        self.assertContains(response, reverse('generate_presigned_parts'))
+
+
+@override_settings(**S3_TEST_SETTINGS, VIDEO_UPLOAD_PART_SIZE=5 * 1024 * 1024)
+class UploadSessionTests(EntrenamientoTestMixin, TestCase):
+    MB = 1024 * 1024
+
+    def setUp(self):
+        self.client.force_login(self.client_user)
+        self.stubber = Stubber(get_s3_client())
+        self.stubber.activate()
+        self.addCleanup(self.stubber.deactivate)
+
+    file_info = {'file_name': 'tecnica.mp4', 'file_size': 12 * MB, 'file_fingerprint': '1700:abc'}
+
+    def make_session(self, **kwargs):
+        fields = dict(user=self.client_user, key='logs/videos/x_tecnica.mp4', upload_id='up-1',
+                      file_name='tecnica.mp4', file_size=12 * self.MB, part_size=5 * self.MB, fingerprint='1700:abc')
+        fields.update(kwargs)
+        return UploadSession.objects.create(**fields)
+
+    def test_initiate_records_session(self):
+        self.stubber.add_response('create_multipart_upload', {'UploadId': 'up-1'})
+        response = self.client.post(reverse('initiate_multipart_upload'), {
+            'file_name': 'tecnica.mp4', 'file_size': 12 * self.MB, 'file_fingerprint': '1700:abc',
+        })
+        session = UploadSession.objects.get()
+        self.assertEqual(response.json(), {'upload_id': 'up-1', 'key': session.key, 'part_size': 5 * self.MB})
+        self.assertEqual((session.status, session.part_count, session.fingerprint), ('active', 3, '1700:abc'))
+
+    def test_resume_returns_parts_already_in_bucket(self):
+        session = self.make_session()
+        self.stubber.add_response('list_parts', {'Parts': [
+            {'PartNumber': 1, 'ETag': '"e1"', 'Size': 5 * self.MB},
+            {'PartNumber': 2, 'ETag': '"e2"', 'Size': 1024},  # Parte truncada: se vuelve a subir
+            {'PartNumber': 3, 'ETag': '"e3"', 'Size': 2 * self.MB},
+        ]})
+        data = self.client.post(reverse('resume_multipart_upload'), self.file_info).json()
+        self.assertTrue(data['resumable'])
+        self.assertEqual(data['upload_id'], 'up-1')
+        self.assertEqual([p['PartNumber'] for p in data['parts']], [1, 3])
+        session.refresh_from_db()
+        self.assertEqual(session.confirmed_parts[0]['ETag'], 'e1')
+
+    def test_resume_requires_the_same_content(self):
+        self.make_session()
+        # Mismo nombre y tamaño pero otro contenido (o un navegador que no manda huella): se empieza de cero.
+        for fingerprint in ('1800:def', ''):
+            data = self.client.post(reverse('resume_multipart_upload'), {**self.file_info, 'file_fingerprint': fingerprint}).json()
+            self.assertEqual(data, {'resumable': False})
+        self.stubber.assert_no_pending_responses()
+
+    def test_resume_discards_session_unknown_to_bucket(self):
+        session = self.make_session()
+        self.stubber.add_client_error('list_parts', service_error_code='NoSuchUpload', http_status_code=404)
+        data = self.client.post(reverse('resume_multipart_upload'), self.file_info).json()
+        self.assertEqual(data, {'resumable': False})
+        session.refresh_from_db()
+        self.assertEqual(session.status, 'aborted')
+
+    def test_signing_parts_keeps_session_alive(self):
+        session = self.make_session()
+        UploadSession.objects.filter(pk=session.pk).update(updated_at=timezone.now() - datetime.timedelta(hours=3))
+        response = self.client.post(reverse('generate_presigned_parts'), {
+            'key': session.key, 'upload_id': 'up-1', 'first_part': 1, 'part_count': 2,
+        })
+        self.assertEqual(len(response.json()['parts']), 2)
+        call_command('purge_upload_sessions', '--hours=1', stdout=StringIO())
+        session.refresh_from_db()
+        self.assertEqual(session.status, 'active')
+        self.assertGreater(session.updated_at, timezone.now() - datetime.timedelta(minutes=1))
+
+    def test_purge_aborts_stale_sessions(self):
+        stale = self.make_session()
+        fresh = self.make_session(key='logs/videos/y.mp4', upload_id='up-2')
+        UploadSession.objects.filter(pk=stale.pk).update(updated_at=timezone.now() - datetime.timedelta(days=2))
+        self.stubber.add_response('abort_multipart_upload', {}, {'Bucket': 'videos', 'Key': stale.key, 'UploadId': 'up-1'})
+        call_command('purge_upload_sessions', stdout=StringIO())
+        self.stubber.assert_no_pending_responses()
+        self.assertEqual(list(UploadSession.objects.values_list('pk', flat=True)), [fresh.pk])
+
+    def test_purge_continues_after_network_error(self):
+        unreachable = self.make_session()
+        other = self.make_session(key='logs/videos/y.mp4', upload_id='up-2')
+        UploadSession.objects.update(updated_at=timezone.now() - datetime.timedelta(days=2))
+
+        def abort(Bucket, Key, UploadId):
+            if Key == unreachable.key:
+                raise EndpointConnectionError(endpoint_url='https://s3.example.com')
+            return {}
+
+        with mock.patch.object(get_s3_client(), 'abort_multipart_upload', side_effect=abort):
+            call_command('purge_upload_sessions', stdout=StringIO(), stderr=StringIO())
+        # La que falló sigue activa para el próximo intento; la otra se abortó y se borró.
+        self.assertEqual(list(UploadSession.objects.values_list('pk', 'status')), [(unreachable.pk, 'active')])
+        self.assertFalse(UploadSession.objects.filter(pk=other.pk).exists())
+
+
+class VideoProcessingTests(EntrenamientoTestMixin, TestCase):
+    def setUp(self):
+        # Archivos en un directorio temporal: nunca contra el bucket de settings (sin credenciales falla, con ellas sube).
+        media = tempfile.mkdtemp(prefix='videos-')
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        storages = override_settings(STORAGES={
+            'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage', 'OPTIONS': {'location': media, 'base_url': '/media/'}},
+            'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+        })
+        storages.enable()
+        self.addCleanup(storages.disable)
+        plan = self.make_plan(weeks=1, days=1, exercises_per_workout=2)
+        self.w_exercise = plan.workouts.get().exercises.first()
+        self.client.force_login(self.client_user)
+
+    def post_log_with_video(self, key):
+        data = {'weight_lifted_kg': 60, 'reps_completed': 8, 'status': 'completed', 'notes': '', 'video_key': key}
+        self.client.post(reverse('log_exercise', args=[self.w_exercise.pk]), data)
+        return ExerciseLog.objects.get()
+
+    def test_log_with_video_queues_processing_and_serves_original_meanwhile(self):
+        log = self.post_log_with_video('logs/videos/abc_sentadilla.mp4')
+        self.assertEqual(log.video_status, 'pending')
+        self.assertEqual(Task.objects.get(name='process_video').payload, {'log_id': log.pk})
+        self.assertEqual(log.video_playback_url, log.video_log.url)
+        self.assertEqual(log.video_poster_url, '')
+
+    @override_settings(FFPROBE_BINARY='false')
+    def test_unprocessable_video_is_marked_failed_without_retry(self):
+        name = default_storage.save('logs/videos/roto.mp4', ContentFile(b'no es un video'))
+        log = self.post_log_with_video(name)
+        with self.assertLogs('entrenamiento.tasks', 'ERROR'):
+            run_pending()
+        log.refresh_from_db()
+        self.assertEqual(log.video_status, 'failed')
+        self.assertEqual(Task.objects.get(name='process_video').status, 'done')
+        self.assertEqual(log.video_playback_url, log.video_log.url)
+
+    @unittest.skipUnless(shutil.which('ffmpeg') and shutil.which('ffprobe'), 'ffmpeg no está instalado')
+    def test_generates_rendition_poster_and_duration(self):
+        with tempfile.NamedTemporaryFile(suffix='.mp4') as tmp:
+            subprocess.run(['ffmpeg', '-y', '-v', 'error', '-f', 'lavfi', '-i', 'testsrc=duration=3:size=1920x1080:rate=30',
+                            '-c:v', 'libx264', tmp.name], check=True)
+            name = default_storage.save('logs/videos/clip.mp4', ContentFile(open(tmp.name, 'rb').read()))
+        log = self.post_log_with_video(name)
+        run_pending()
+        log.refresh_from_db()
+        self.assertEqual(log.video_status, 'ready')
+        self.assertEqual(log.video_rendition.name, 'logs/videos/clip_720p.mp4')
+        self.assertTrue(default_storage.exists('logs/videos/clip_poster.jpg'))
+        self.assertAlmostEqual(log.video_duration, 3, delta=0.2)
+        response = self.client.get(reverse('view_log', args=[log.pk]))
+        self.assertContains(response, log.video_rendition.url)
+
+
+class WeeklyReportTests(EntrenamientoTestMixin, TestCase):
+    def setUp(self):
+        self.start, self.end = previous_week()
+        self.other = User.objects.create_user(username='otro', password='x', rut='3-5', role='CLIENTE', assigned_professional=self.trainer)
+
+    def make_week_plan(self, client=None):
+        plan = self.make_plan(weeks=1, days=2, exercises_per_workout=2, client=client)
+        TrainingPlan.objects.filter(pk=plan.pk).update(start_date=self.start)
+        Workout.objects.filter(plan=plan).update(date=self.start)
+        return plan
+
+    def log_last_week(self, workout_exercise, weight, client=None):
+        log = self.log(workout_exercise, weight=weight, client=client)
+        when = timezone.make_aware(datetime.datetime.combine(self.start, datetime.time(18)))
+        ExerciseLog.objects.filter(pk=log.pk).update(date_completed=when)
+
+    def test_single_grouped_pass_filtered_by_client(self):
+        plan = self.make_week_plan()
+        other_plan = self.make_week_plan(client=self.other)
+        for _ in range(5):
+            self.make_week_plan()
+        workout = plan.workouts.first()
+        for w_exercise in workout.exercises.all():
+            self.log_last_week(w_exercise, weight=100)
+        # Otro cliente con el mismo ejercicio: antes contaminaba los promedios de todos los planes.
+        self.log_last_week(other_plan.workouts.first().exercises.first(), weight=10, client=self.other)
+
+        with self.assertNumQueries(3):
+            reports = {r['plan_id']: r for r in weekly_data(self.start, self.end)}
+        self.assertEqual(len(reports), 7)
+        report = reports[plan.pk]
+        self.assertEqual(report['consistency'], 50.0)  # 1 de 2 workouts completo
+        self.assertEqual([row[1] for row in report['rows']], [100, 100])
+        self.assertEqual(reports[other_plan.pk]['rows'][0][1], 10)
+
+    def test_command_shards_and_builds_in_process_pool(self):
+        plans = [self.make_week_plan() for _ in range(4)]
+        call_command('weekly_reports', '--workers', '2', '--shard', '1/2', stdout=StringIO())
+        call_command('send_outbox', stdout=StringIO())
+        self.assertEqual(len(mail.outbox), sum(1 for p in plans if p.pk % 2 == 1))
+        self.assertTrue(all(m.attachments for m in mail.outbox))
+
+    def test_workbook_pool_sets_up_django_in_spawned_children(self):
+        self.make_week_plan()
+        reports = weekly_data(self.start, self.end)
+        with workbook_pool(1, multiprocessing.get_context('spawn')) as pool:
+            workbooks = dict(pool.map(build_weekly_workbook, reports))
+        self.assertEqual(set(workbooks), {r['plan_id'] for r in reports})
+
+
+class XlsxReportTests(EntrenamientoTestMixin, TestCase):
+    def test_streaming_sheet_shares_styles_and_sizes_columns(self):
+        report = XlsxReport()
+        sheet = report.add_sheet('Prueba', [Column('Ejercicio'), Column('Peso', '0.00'), Column('Video')], banner='Titulo')
+        for i in range(300):
+            status = ['completed', 'half', 'not_completed'][i % 3]
+            sheet.append([f'Ejercicio {i}', 50 + i, ''], fill=status, links={2: ('https://x.test/v.mp4', 'Ver Video')} if i % 2 else None)
+        wb = openpyxl.load_workbook(BytesIO(report.to_bytes()))
+        ws = wb['Prueba']
+
+        self.assertEqual(ws['A3'].value, 'Ejercicio')
+        self.assertEqual(ws.freeze_panes, 'A4')
+        self.assertEqual(ws.max_row, 303)
+        self.assertEqual(ws['C5'].hyperlink.target, 'https://x.test/v.mp4')
+        self.assertEqual(ws['B4'].number_format, '0.00')
+        self.assertEqual(ws['A4'].fill.fgColor.rgb, '00C6EFCE')
+        self.assertGreater(ws.column_dimensions['A'].width, len('Ejercicio 299'))
+        # Un estilo por combinación (título, header, 3 rellenos × {celda, celda 0.00, link}), no uno por celda.
+        self.assertLessEqual(len(wb.named_styles), 12 + 1)
+
+    def test_daily_workbook_from_logs(self):
+        plan = self.make_plan(weeks=1, days=1, exercises_per_workout=3)
+        workout = plan.workouts.first()
+        for w_exercise in workout.exercises.all():
+            self.log(w_exercise, weight=80)
+        ws = openpyxl.load_workbook(BytesIO(build_daily_workbook(workout))).active
+        self.assertEqual([cell.value for cell in ws[3]][:2], ['Ejercicio', 'Peso (kg)'])
+        self.assertEqual([row[1] for row in ws.iter_rows(min_row=4, values_only=True)], [80, 80, 80])
+
+
+class ExportTests(EntrenamientoTestMixin, TestCase):
+    def setUp(self):
+        plan = self.make_plan(weeks=1, days=2)
+        self.w_exercises = list(WorkoutExercise.objects.filter(workout__plan=plan))
+        self.logs = [self.log(self.w_exercises[i % len(self.w_exercises)], weight=40 + i) for i in range(25)]
+        ExerciseLog.objects.filter(pk=self.logs[0].pk).update(rir_actual=2, notes='Rodilla, ok')
+        other = User.objects.create_user(username='otro', password='x', rut='3-5', role='ENTRENADOR')
+        foreign = TrainingPlan.objects.create(trainer=other, client=self.client_user, name='Ajeno',
+                                              start_date=datetime.date.today(), end_date=datetime.date.today())
+        self.log(WorkoutExercise.objects.create(workout=Workout.objects.create(plan=foreign, week_number=1, day_of_week=1),
+                                                exercise=self.exercises[0], sets=1, reps_target='5'))
+        self.client.force_login(self.trainer)
+
+    def export(self, **params):
+        response = self.client.get(reverse('export_logs'), params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content)
+
+    def test_chunks_are_bounded_queries(self):
+        logs = export_queryset(self.trainer)
+        with self.assertNumQueries(3):  # 10 + 10 + 5: cada bloque es un LIMIT por keyset
+            chunks = list(export_chunks(logs, chunk_size=10))
+        self.assertEqual([len(chunk) for chunk in chunks], [10, 10, 5])
+        self.assertEqual([row[0] for chunk in chunks for row in chunk], [log.pk for log in self.logs])
+
+    def test_csv_streams_only_trainer_logs(self):
+        rows = list(csv.reader(self.export(client=self.client_user.id).decode('utf-8-sig').splitlines()))
+        self.assertEqual(rows[0][:2], ['ID', 'Cliente'])
+        self.assertEqual(len(rows), 26)  # El log del plan de otro entrenador no se exporta
+        self.assertEqual(rows[1][9], '2')
+        self.assertEqual(rows[1][12], 'Rodilla, ok')
+
+    def test_xlsx_and_plan_scope(self):
+        plan = TrainingPlan.objects.get(trainer=self.trainer)
+        ws = openpyxl.load_workbook(BytesIO(self.export(plan=plan.id, format='xlsx'))).active
+        self.assertEqual(ws.max_row, 26)
+        self.assertEqual(ws['H2'].value, 40)
+
+    def test_formulas_are_escaped(self):
+        ExerciseLog.objects.filter(pk=self.logs[0].pk).update(notes='=HYPERLINK("http://x","clic")')
+        ExerciseLog.objects.filter(pk=self.logs[1].pk).update(notes='-5 kg')
+        rows = list(csv.reader(self.export().decode('utf-8-sig').splitlines()))
+        self.assertEqual([rows[1][12], rows[2][12]], ['\'=HYPERLINK("http://x","clic")', "'-5 kg"])
+        ws = openpyxl.load_workbook(BytesIO(self.export(format='xlsx'))).active
+        self.assertEqual(ws['M2'].data_type, 's')
+        self.assertEqual(ws['M2'].value, '\'=HYPERLINK("http://x","clic")')
+        self.assertEqual(ws['H2'].value, 40)  # Los números no se tocan
+
+    def test_xlsx_splits_sheets_at_row_limit(self):
+        chunks = export_chunks(export_queryset(self.trainer), chunk_size=10)
+        workbook = openpyxl.load_workbook(BytesIO(b''.join(stream_xlsx(chunks, sheet_rows=10))))
+        self.assertEqual(workbook.sheetnames, ['Historial', 'Historial 2', 'Historial 3'])
+        self.assertEqual([ws.max_row for ws in workbook.worksheets], [11, 11, 6])
+        self.assertEqual(workbook['Historial 3']['A6'].value, self.logs[-1].pk)
+
+    @unittest.skipUnless(parquet_available(), 'pandas/pyarrow no instalados')
+    def test_parquet_export(self):
+        import pyarrow.parquet as pq
+        parquet = pq.ParquetFile(BytesIO(self.export(format='parquet')))
+        self.assertEqual(parquet.metadata.num_rows, 25)
+        table = parquet.read()
+        self.assertEqual(table.column('rir').to_pylist()[:2], [2, None])
+
+    def test_permissions_and_bad_format(self):
+        self.assertEqual(self.client.get(reverse('export_logs'), {'format': 'pdf'}).status_code, 400)
+        self.client.force_login(self.client_user)
+        self.assertEqual(self.client.get(reverse('export_logs')).status_code, 403)
+
+    def test_command_writes_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, 'export.csv')
+            call_command('export_logs', 'coach', '--client', 'cliente', '--output', output, stdout=StringIO())
+            with open(output, encoding='utf-8-sig') as f:
+                self.assertEqual(len(f.read().splitlines()), 26)
+
+
+class PlanTemplateTests(EntrenamientoTestMixin, TestCase):
+    def make_template(self, days=5, exercises=6, **rules):
+        template = PlanTemplate.objects.create(trainer=self.trainer, name='Hipertrofia', **rules)
+        for day in range(1, days + 1):
+            workout = TemplateWorkout.objects.create(template=template, day_of_week=day, title=f'Día {day}')
+            TemplateExercise.objects.bulk_create([
+                TemplateExercise(workout=workout, exercise=self.exercises[i % 3], sets=4, reps_target='8-12', rir_target=3, order=i + 1)
+                for i in range(exercises)
+            ])
+        return template
+
+    def test_twelve_week_plan_in_a_handful_of_queries(self):
+        template = self.make_template()
+        start = datetime.date(2024, 1, 1)
+        with CaptureQueriesContext(connection) as ctx:
+            plan, = instantiate_template(template, [self.client_user], start, weeks=12)
+        # 2 lecturas de la plantilla + savepoints + 1 INSERT por tabla (SQLite parte los 360 ejercicios en 4 por su límite de
+        # parámetros por query; en MySQL/PostgreSQL es uno por cada BULK_BATCH_SIZE filas).
+        self.assertLessEqual(len(ctx.captured_queries), 10)
+
+        self.assertEqual(plan.workouts.count(), 60)
+        self.assertEqual(WorkoutExercise.objects.filter(workout__plan=plan).count(), 360)
+        last = plan.workouts.get(week_number=12, day_of_week=5)
+        self.assertEqual(last.date, start + datetime.timedelta(days=11 * 7 + 4))
+        self.assertEqual(plan.end_date, start + datetime.timedelta(days=83))
+        # bulk_create no dispara señales: los contadores quedan correctos igual.
+        self.assertEqual(rebuild_progress(fix=False, plans=TrainingPlan.objects.filter(pk=plan.pk)), (0, 0))
+
+    def test_periodization_with_deload(self):
+        template = PlanTemplate(progression='reps', progression_step=1, deload_every=4)
+        base = {'sets': 4, 'reps_target': '8-12', 'rir_target': 3, 'rpe_target': None, 'notes': ''}
+        self.assertEqual(week_prescription(template, base, 1)['reps_target'], '8-12')
+        self.assertEqual(week_prescription(template, base, 3)['reps_target'], '10-14')
+        deload = week_prescription(template, base, 4)
+        self.assertEqual((deload['sets'], deload['reps_target'], deload['rir_target']), (2, '8-12', 5))
+        self.assertEqual(week_prescription(template, base, 5)['reps_target'], '11-15')
+
+        template.progression = 'load'
+        self.assertEqual(week_prescription(template, base, 3)['rir_target'], 1)
+        self.assertEqual(week_prescription(template, base, 7)['rir_target'], 0)
+
+    def test_clone_plan_and_instantiate_for_many_clients_from_view(self):
+        source = self.make_plan(weeks=2, days=3)
+        other = User.objects.create_user(username='otro', password='x', rut='3-5', role='CLIENTE', assigned_professional=self.trainer)
+        self.client.force_login(self.trainer)
+        response = self.client.post(reverse('save_plan_as_template', args=[source.id]), {
+            'name': 'Base', 'weeks': 1, 'progression': 'sets', 'progression_step': 1, 'deload_every': 0,
+        })
+        self.assertRedirects(response, reverse('plan_templates'))
+        template = PlanTemplate.objects.get(name='Base')
+        self.assertEqual(template.workouts.count(), 3)
+
+        response = self.client.post(reverse('plan_templates'), {
+            'template': template.id, 'clients': [self.client_user.id, other.id], 'start_date': '2024-03-04', 'weeks': 4,
+        })
+        self.assertRedirects(response, reverse('trainer_dashboard'), fetch_redirect_response=False)
+        plans = TrainingPlan.objects.filter(name='Base')
+        self.assertEqual(sorted(plans.values_list('client__username', flat=True)), ['cliente', 'otro'])
+        week4 = WorkoutExercise.objects.filter(workout__plan=plans[0], workout__week_number=4).first()
+        self.assertEqual(week4.sets, 6)  # 3 series + 1 por semana
+        self.assertEqual(self.client.get(reverse('plan_templates')).status_code, 200)
+
+    def test_template_from_plan_merges_same_day_workouts(self):
+        plan = self.make_plan(weeks=2, days=2, exercises_per_workout=2)
+        extra = Workout.objects.create(plan=plan, week_number=1, day_of_week=1, title='Extra')
+        WorkoutExercise.objects.create(workout=extra, exercise=self.exercises[2], sets=5, reps_target='5', order=3)
+        template = template_from_plan(plan, weeks=1)
+        self.assertEqual(template.name, plan.name)
+        days = {w.day_of_week: w for w in template.workouts.prefetch_related('exercises')}
+        self.assertEqual(sorted(days), [1, 2])  # Solo la semana 1; el workout extra del día 1 no duplica el día
+        self.assertEqual([(e.order, e.sets) for e in days[1].exercises.order_by('order')], [(1, 3), (2, 3), (3, 5)])
+        self.assertEqual(days[2].exercises.count(), 2)
+
+
+class WorkoutEditorTests(EntrenamientoTestMixin, TestCase):
+    def setUp(self):
+        self.plan = self.make_plan(weeks=1, days=1)
+        self.workout = self.plan.workouts.get()
+        self.rows = list(self.workout.exercises.order_by('order'))
+        self.url = reverse('workout_editor', args=[self.workout.id])
+        self.client.force_login(self.trainer)
+
+    def post_data(self, rows, version):
+        # rows: dicts con los campos de cada fila; 'id' solo en las existentes.
+        data = {'version': version, 'exercises-TOTAL_FORMS': len(rows), 'exercises-INITIAL_FORMS': len(self.rows),
+                'exercises-MIN_NUM_FORMS': 0, 'exercises-MAX_NUM_FORMS': 1000}
+        for i, row in enumerate(rows):
+            for field, value in row.items():
+                data[f'exercises-{i}-{field}'] = value
+        return data
+
+    def row(self, w_exercise, **changes):
+        values = {'id': w_exercise.id, 'exercise': w_exercise.exercise_id, 'sets': w_exercise.sets,
+                  'reps_target': w_exercise.reps_target, 'rest_period_seconds': w_exercise.rest_period_seconds,
+                  'order': w_exercise.order, 'workout': self.workout.id}
+        values.update(changes)
+        return values
+
+    def test_one_post_creates_updates_reorders_and_deletes(self):
+        first, second, third = self.rows
+        self.log(first)
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        rows = [
+            self.row(first, order=2, sets=5),
+            self.row(second, DELETE='on'),
+            self.row(third, order=1),
+            {'exercise': self.exercises[1].id, 'sets': 2, 'reps_target': '15', 'rest_period_seconds': 30, 'order': 3},
+        ]
+        response = self.client.post(self.url, self.post_data(rows, self.workout.version))
+        self.assertRedirects(response, reverse('workout_detail', args=[self.workout.id]), fetch_redirect_response=False)
+
+        saved = list(self.workout.exercises.order_by('order').values_list('pk', 'sets', 'order'))
+        self.assertEqual(saved[:2], [(third.pk, 3, 1), (first.pk, 5, 2)])
+        self.assertEqual(saved[2][1:], (2, 3))
+        self.assertFalse(WorkoutExercise.objects.filter(pk=second.pk).exists())
+        self.workout.refresh_from_db()
+        self.assertEqual((self.workout.exercise_count, self.workout.logged_count), (3, 1))
+        self.assertEqual(rebuild_progress(fix=False, plans=TrainingPlan.objects.filter(pk=self.plan.pk)), (0, 0))
+
+    def test_consecutive_saves_with_the_new_version(self):
+        first, second, third = self.rows
+        self.log(second)
+        version = self.workout.version
+        rows = [self.row(first), self.row(second, DELETE='on'), self.row(third)]
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.post(self.url, self.post_data(rows, version))
+        self.workout.refresh_from_db()
+        self.assertEqual(self.workout.version, version + 1)  # Una sola subida, aunque se borró una fila con logs
+        self.assertEqual(len([q for q in ctx.captured_queries if 'SET "version"' in q['sql']]), 1)
+        self.assertEqual(self.client.get(self.url).context['version'], version + 1)
+
+        self.rows = [first, third]
+        response = self.client.post(self.url, self.post_data([self.row(first, sets=4), self.row(third)], version + 1))
+        self.assertRedirects(response, reverse('workout_detail', args=[self.workout.id]), fetch_redirect_response=False)
+        self.assertEqual(WorkoutExercise.objects.get(pk=first.pk).sets, 4)
+        self.workout.refresh_from_db()
+        self.assertEqual((self.workout.exercise_count, self.workout.logged_count), (2, 0))
+
+    def test_stale_version_is_rejected(self):
+        version = self.workout.version
+        # Otro entrenador cambia un ejercicio por la vista de una fila: la versión cargada queda vieja.
+        self.client.post(reverse('edit_workout_exercise', args=[self.rows[0].id]), {
+            'exercise': self.rows[0].exercise_id, 'sets': 9, 'reps_target': '5', 'rest_period_seconds': 90, 'order': 1,
+        })
+        response = self.client.post(self.url, self.post_data([self.row(r, sets=1) for r in self.rows], version))
+        self.assertRedirects(response, self.url, fetch_redirect_response=False)
+        self.assertEqual(sorted(self.workout.exercises.values_list('sets', flat=True)), [3, 3, 9])
+
+    def test_concurrent_delete_reports_stale_version(self):
+        version = self.workout.version
+        self.client.post(reverse('delete_workout_exercise', args=[self.rows[0].id]))
+        response = self.client.post(self.url, self.post_data([self.row(r, sets=1) for r in self.rows], version), follow=True)
+        self.assertRedirects(response, self.url)
+        self.assertIn('Otro usuario modificó', ' '.join(str(m) for m in response.context['messages']))
+        self.assertEqual(sorted(self.workout.exercises.values_list('sets', flat=True)), [3, 3])
+
+
+class PersonalRecordTests(EntrenamientoTestMixin, TestCase):
+    def setUp(self):
+        plan = self.make_plan(weeks=1, days=2, exercises_per_workout=1)
+        self.first, self.second = WorkoutExercise.objects.filter(workout__plan=plan).order_by('workout__day_of_week')
+        self.exercise_id = self.first.exercise_id  # Ambos workouts usan el mismo ejercicio
+
+    def records(self):
+        return {
+            (r.record_type, r.reps): (r.value, r.log_id)
+            for r in PersonalRecord.objects.filter(client=self.client_user, exercise_id=self.exercise_id)
+        }
+
+    def test_incremental_updates_on_save_edit_and_delete(self):
+        base = self.log(self.first, weight=100, reps=5)
+        self.assertEqual(self.records(), {('e1rm', 0): (116.7, base.pk), ('volume', 0): (500, base.pk), ('weight', 5): (100, base.pk)})
+        self.assertEqual(base.new_records, [])  # El primer log no "supera" nada
+
+        heavy = self.log(self.second, weight=110, reps=3)
+        self.assertEqual(heavy.new_records, [('e1rm', 0)])
+        self.assertEqual(self.records()[('e1rm', 0)], (121.0, heavy.pk))
+        self.assertEqual(self.records()[('volume', 0)], (500, base.pk))
+
+        heavy.delete()
+        self.assertEqual(self.records()[('e1rm', 0)], (116.7, base.pk))
+        self.assertNotIn(('weight', 3), self.records())
+
+        # Editar el log para que deje de contar (serie no completada) borra sus récords.
+        base.status = 'not_completed'
+        base.save()
+        self.assertEqual(self.records(), {})
+
+    def test_backfill_matches_incremental(self):
+        for weight, reps, status in [(80, 10, 'completed'), (100, 5, 'half'), (100, 5, 'completed'), (120, 1, 'not_completed'), (90, 8, 'completed')]:
+            self.log(self.first, weight=weight, reps=reps, status=status)
+        incremental = self.records()
+        PersonalRecord.objects.all().delete()
+        call_command('backfill_records', stdout=StringIO())
+        self.assertEqual(self.records(), incremental)
+        self.assertNotIn(('weight', 1), incremental)
+
+    def test_backfill_limited_to_clients(self):
+        other = User.objects.create_user(username='otro', password='x', rut='3-5', role='CLIENTE', assigned_professional=self.trainer)
+        self.log(self.first, weight=100, reps=5)
+        self.log(self.first, weight=60, reps=5, client=other)
+        PersonalRecord.objects.filter(client=other).update(value=1)
+        PersonalRecord.objects.filter(client=self.client_user).delete()
+        self.assertEqual(backfill_records(User.objects.filter(pk=self.client_user.pk)), 3)
+        self.assertEqual(self.records()[('weight', 5)][0], 100)
+        # Los récords de otros clientes no se tocan.
+        self.assertEqual(set(PersonalRecord.objects.filter(client=other).values_list('value', flat=True)), {1})
+
+    def test_log_exercise_reads_records_and_announces_new_ones(self):
+        self.log(self.first, weight=100, reps=5)
+        self.client.force_login(self.client_user)
+        url = reverse('log_exercise', args=[self.second.pk])
+        response = self.client.get(url)
+        self.assertEqual(response.context['records']['heaviest'].value, 100)
+        response = self.client.post(url, {'weight_lifted_kg': 105, 'reps_completed': 5, 'status': 'completed'}, follow=True)
+        self.assertIn('Nuevo récord', ' '.join(str(m) for m in response.context['messages']))
+        self.assertEqual(exercise_records(self.client_user, [self.exercise_id])[self.exercise_id]['heaviest'].value, 105)
+
+
+class ExerciseCatalogTests(EntrenamientoTestMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        for name, muscle, equipment in [
+            ('Press de banca', 'Pecho', 'Barra'), ('Press militar', 'Hombro', 'Barra'),
+            ('Press de banca con mancuernas', 'Pecho', 'Mancuernas'), ('Sentadilla', 'Piernas', 'Barra'),
+        ]:
+            Exercise.objects.create(name=name, muscle_group=muscle, equipment=equipment)
+        self.client.force_login(self.trainer)
+        self.url = reverse('exercise_autocomplete')
+
+    def names(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return [row['name'] for row in response.json()['results']]
+
+    def test_prefix_search_with_filters(self):
+        self.assertEqual(self.names(q='press'), ['Press de banca', 'Press de banca con mancuernas', 'Press militar'])
+        self.assertEqual(self.names(q='press', muscle_group='Pecho', equipment='Barra'), ['Press de banca'])
+        self.assertEqual(self.names(q='banca'), [])  # Prefijo, no subcadena: así usa el índice
+        self.client.force_login(self.client_user)
+        self.assertEqual(self.client.get(self.url, {'q': 'press'}).status_code, 403)
+
+    def test_results_are_cached_until_an_exercise_is_created(self):
+        self.names(q='press')
+        with CaptureQueriesContext(connection) as ctx:
+            self.names(q='PRESS')
+        self.assertFalse([q for q in ctx.captured_queries if 'entrenamiento_exercise' in q['sql']])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('create_exercise'), {'name': 'Press inclinado', 'muscle_group': 'Pecho'})
+        self.assertIn('Press inclinado', self.names(q='press'))
+
+    def test_evicted_version_never_reuses_an_old_entry(self):
+        self.names(q='press')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('create_exercise'), {'name': 'Press inclinado', 'muscle_group': 'Pecho'})
+        cache.delete('catalog:version')  # Desalojada; la búsqueda de la primera versión sigue en caché
+        self.assertIn('Press inclinado', self.names(q='press'))
+
+    def test_forms_do_not_load_the_catalog(self):
+        plan = self.make_plan(weeks=1, days=1, exercises_per_workout=2)
+        w_exercise = plan.workouts.get().exercises.order_by('order').first()
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('edit_workout_exercise', args=[w_exercise.id]))
+        self.assertContains(response, f'value="{w_exercise.exercise_id}"')
+        self.assertContains(response, w_exercise.exercise.name)
+        self.assertNotContains(response, '<option value="%d"' % self.exercises[2].id)
+        self.assertFalse([q for q in ctx.captured_queries if 'FROM "entrenamiento_exercise" ORDER BY' in q['sql']])
+
+        response = self.client.post(reverse('edit_workout_exercise', args=[w_exercise.id]), {
+            'exercise': self.exercises[2].id, 'sets': 4, 'reps_target': '5', 'rest_period_seconds': 90, 'order': 1,
+        })
+        self.assertEqual(response.status_code, 302)
+        w_exercise.refresh_from_db()
+        self.assertEqual(w_exercise.exercise_id, self.exercises[2].id)
+
+
+class WarmupCatalogTests(EntrenamientoTestMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        warmups._local = None
+        Warmup.objects.create(name='Movilidad de cadera', series_reps='2x10', type='inferior')
+        Warmup.objects.create(name='Rotaciones de hombro', series_reps='2x15', type='superior')
+
+    def warmup_queries(self, url, user):
+        self.client.force_login(user)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, [q for q in ctx.captured_queries if 'entrenamiento_warmup' in q['sql']]
+
+    def test_dashboards_share_one_snapshot(self):
+        response, queries = self.warmup_queries(reverse('trainer_dashboard'), self.trainer)
+        self.assertEqual(len(queries), 1)
+        self.assertContains(response, 'Rotaciones de hombro')
+        response, queries = self.warmup_queries(reverse('client_dashboard'), self.client_user)
+        self.assertEqual(queries, [])
+        self.assertContains(response, 'Movilidad de cadera')
+
+    def test_save_publishes_a_new_version(self):
+        self.warmup_queries(reverse('client_dashboard'), self.client_user)
+        self.client.force_login(self.trainer)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('create_warmup'), {'name': 'Puente de glúteo', 'series_reps': '2x12', 'type': 'inferior'})
+        response, queries = self.warmup_queries(reverse('client_dashboard'), self.client_user)
+        self.assertEqual(len(queries), 1)
+        self.assertContains(response, 'Puente de glúteo')
+
+    def test_other_process_reuses_the_shared_snapshot(self):
+        snapshot = warmups.warmup_catalog()
+        warmups._local = ('versión vieja', snapshot)  # Como un worker que quedó con la versión anterior en memoria
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(warmups.warmup_catalog(), snapshot)
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+    @override_settings(CACHE_VERSION_LOCAL_TTL=0.1)
+    def test_process_local_cache_expires_the_version(self):
+        warmups.warmup_catalog()
+        # Otro worker con LocMemCache guarda un calentamiento: la versión de este proceso no se entera...
+        Warmup.objects.create(name='Puente de glúteo', series_reps='2x12', type='inferior')
+        self.assertEqual(len(warmups.warmup_catalog().lower_body), 1)
+        time.sleep(0.15)
+        # ...hasta que caduca y renace desde el reloj.
+        self.assertEqual(len(warmups.warmup_catalog().lower_body), 2)
+        self.assertEqual([w.id for w in checks.check_shared_cache(None)], ['entrenamiento.W001'])
+
+
+@override_settings(PERFORMANCE_INSTRUMENTATION=True)
+class InstrumentationTests(EntrenamientoTestMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        instrumentation.STATS.clear()
+        self.plan = self.make_plan(weeks=1, days=2)
+
+    def test_server_timing_header(self):
+        self.client.force_login(self.trainer)
+        response = self.client.get(reverse('trainer_dashboard'))
+        timing = response['Server-Timing']
+        self.assertRegex(timing, r'db;dur=[\d.]+;desc="\d+ queries"')
+        self.assertIn('desc="trainer_dashboard"', timing)
+
+    def test_duplicate_queries_are_fingerprinted(self):
+        self.assertEqual(
+            instrumentation.fingerprint('SELECT * FROM t WHERE id IN (%s, %s, %s) LIMIT 21'),
+            instrumentation.fingerprint('SELECT * FROM t WHERE id IN (%s) LIMIT 1'),
+        )
+        recorder = instrumentation.QueryRecorder()
+        with connection.execute_wrapper(recorder):
+            for exercise in self.exercises:
+                Exercise.objects.get(pk=exercise.pk)
+            list(Workout.objects.all())
+        duplicated, (sql, times) = recorder.duplicates()
+        self.assertEqual((recorder.count, duplicated, times), (4, 2, 3))
+        self.assertIn('entrenamiento_exercise', sql)
+
+    def test_admin_page_shows_percentiles_per_view(self):
+        self.client.force_login(self.client_user)
+        for _ in range(3):
+            self.client.get(reverse('view_plan', args=[self.plan.id]))
+        self.assertEqual(self.client.get(reverse('performance_dashboard')).status_code, 302)  # Solo staff
+
+        self.client_user.is_staff = True
+        self.client_user.save()
+        response = self.client.get(reverse('performance_dashboard'))
+        row = next(row for row in response.context['rows'] if row['view'] == 'view_plan')
+        self.assertEqual(row['requests'], 3)
+        self.assertLessEqual(row['p50'], row['p95'])
+
+    def test_nearest_rank_percentile(self):
+        samples = list(range(20, 0, -1))  # Sin ordenar
+        self.assertEqual([instrumentation.percentile(samples, pct) for pct in (50, 95, 99, 100)], [10, 19, 20, 20])
+        self.assertEqual(instrumentation.percentile([7], 95), 7)
+        self.assertIsNone(instrumentation.percentile([], 95))
+
+    @override_settings(PERFORMANCE_INSTRUMENTATION=False)
+    def test_disabled_by_default(self):
+        self.client.force_login(self.trainer)
+        self.assertNotIn('Server-Timing', self.client.get(reverse('trainer_dashboard')))
+
+
+@override_settings(SLOW_QUERY_LOG=True, SLOW_QUERY_THRESHOLD_MS=0)
+class SlowQueryLogTests(EntrenamientoTestMixin, TestCase):
+    def setUp(self):
+        self.plan = self.make_plan(weeks=1, days=2)
+
+    def test_view_queries_are_recorded_with_stack_and_first_explain(self):
+        self.client.force_login(self.client_user)
+        self.client.get(reverse('view_plan', args=[self.plan.id]))
+        self.client.get(reverse('view_plan', args=[self.plan.id]))
+        rows = SlowQuery.objects.filter(origin='view_plan')
+        self.assertTrue(rows.exists())
+        self.assertTrue(any('entrenamiento/views.py' in row.stack for row in rows))
+        self.assertTrue(rows.exclude(explain='').exists())
+        for fp in rows.values_list('fingerprint', flat=True).distinct():
+            self.assertLessEqual(rows.filter(fingerprint=fp).exclude(explain='').count(), 1)
+
+    @override_settings(SLOW_QUERY_MAX_ROWS=5)
+    def test_commands_are_recorded_and_the_table_is_a_ring_buffer(self):
+        call_command('rebuild_progress', stdout=StringIO())
+        self.assertEqual(set(SlowQuery.objects.values_list('origin', flat=True)), {'manage.py rebuild_progress'})
+        self.assertLessEqual(SlowQuery.objects.count(), 5)
+
+        out = StringIO()
+        call_command('slow_queries', '--details', '--limit', '3', stdout=out)
+        self.assertIn('#1 ', out.getvalue())
+        self.assertIn('manage.py rebuild_progress', out.getvalue())
+
+    def test_text_parameters_are_not_stored(self):
+        with capture_slow_queries('prueba'):
+            queue_email(EmailMessage('Cuenta', 'Contraseña temporal: s3creta-123', 'app@example.com', ['x@example.com']))
+            ExerciseLog.objects.filter(client=self.client_user, weight_lifted_kg__gt=42.5).exists()
+        stored = ' '.join(SlowQuery.objects.values_list('params', flat=True))
+        self.assertNotIn('s3creta', stored)
+        self.assertIn('str[', stored)
+        self.assertIn('42.5', stored)  # Los números sí, para reproducir el caso
+        self.assertTrue(SlowQuery.objects.filter(sql__startswith='SELECT').exclude(explain='').exists())
+
+    @override_settings(SLOW_QUERY_LOG=False)
+    def test_disabled_records_nothing(self):
+        self.client.force_login(self.client_user)
+        self.client.get(reverse('view_plan', args=[self.plan.id]))
+        call_command('rebuild_progress', stdout=StringIO())
+        self.assertFalse(SlowQuery.objects.exists())
+
+
+class LoadBenchmarkTests(TestCase):
+    SEED = {'trainers': 1, 'clients': 2, 'history_weeks': 3, 'plan_weeks': 2, 'days': 2, 'exercises': 2, 'catalog': 6}
+
+    def seed(self, *extra):
+        args = [f'--{key.replace("_", "-")}={value}' for key, value in self.SEED.items()]
+        call_command('seed_load', '--prefix=bench', *args, *extra, stdout=StringIO())
+        return list(ExerciseLog.objects.filter(client__username__startswith='bench_t').order_by(
+            'client__username', 'workout_exercise__workout__date', 'workout_exercise__order',
+        ).values_list('weight_lifted_kg', 'reps_completed', 'status', 'date_completed'))
+
+    def test_seed_is_reproducible(self):
+        first = self.seed()
+        self.assertTrue(first)
+        self.assertEqual(TrainingPlan.objects.filter(client__username='bench_t0_c0').count(), 2)
+        self.assertEqual(TrainingPlan.objects.filter(client__username='bench_t0_c0', status='active').count(), 1)
+        self.assertTrue(PersonalRecord.objects.filter(client__username='bench_t0_c0').exists())
+        self.assertLess(timezone.localtime(max(row[3] for row in first)).date(), timezone.localdate())  # Fechas generadas, no "ahora"
+        self.assertTrue(ExerciseLog._meta.get_field('date_completed').auto_now_add)
+        self.assertEqual(self.seed('--flush'), first)
+
+    def test_benchmark_writes_json_and_compares(self):
+        self.seed()
+        with tempfile.TemporaryDirectory() as tmp:
+            baseline = os.path.join(tmp, 'base.json')
+            call_command('bench_views', '--prefix=bench', '--repeat=1', f'--output={baseline}', stdout=StringIO())
+            with open(baseline, encoding='utf-8') as f:
+                report = json.load(f)
+            self.assertEqual(set(report['results']), {
+                'trainer_dashboard', 'client_dashboard', 'view_plan', 'trainer_plan_detail', 'progress_view', 'client_logs',
+                'send_daily_report', 'weekly_reports',
+            })
+            self.assertGreater(report['results']['view_plan']['cold']['queries'], 0)
+
+            out = StringIO()
+            call_command('bench_views', '--prefix=bench', '--repeat=1', '--only=view_plan', f'--output={os.path.join(tmp, "new.json")}',
+                         f'--compare={baseline}', '--tolerance=100000', '--fail-on-regression', stdout=out)
+            self.assertIn('view_plan', out.getvalue())
+        self.assertFalse(Outbox.objects.exists())  # Cada medición se deshace
+
+
+class LoadTestHarnessTests(TransactionTestCase):
+    # TransactionTestCase: los hilos del harness usan sus propias conexiones y deben ver los datos sembrados.
+    def setUp(self):
+        call_command('seed_load', '--prefix=peak', '--trainers=1', '--clients=2', '--history-weeks=0', '--plan-weeks=2',
+                     '--days=2', '--exercises=2', '--catalog=6', '--completion=1', stdout=StringIO())
+        self.logs = ExerciseLog.objects.count()
+
+    def test_phases_report_scaling_and_clean_up(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, 'peak.json')
+            out = StringIO()
+            # Un worker por fase: con SQLite en memoria varios hilos escribiendo chocan con "database table is locked"
+            # según el scheduler, y la prueba dejaría de ser determinista.
+            call_command('loadtest_logs', '--prefix=peak', '--workers=1,1', '--clients=2', '--reports=inline',
+                         f'--output={output}', stdout=out, stderr=StringIO())
+            with open(output, encoding='utf-8') as f:
+                report = json.load(f)
+        self.assertIn('escala', out.getvalue())
+        self.assertEqual([phase['workers'] for phase in report['phases']], [1, 1])
+        self.assertEqual([phase['errors'] for phase in report['phases']], [{}, {}])
+        first = report['phases'][0]
+        self.assertEqual(first['errors'], {})
+        self.assertEqual(first['reports_queued'], 2)  # Un workout completo por cliente: un reporte cada uno
+        self.assertEqual(first['reports_done'], 2)
+        self.assertIsNotNone(first['log_p99_ms'])
+        self.assertGreater(first['throughput_rps'], 0)
+        # Lo registrado se deshace: logs y contadores vuelven a como los dejó seed_load.
+        self.assertEqual(ExerciseLog.objects.count(), self.logs)
+        self.assertFalse(Task.objects.exists())
+        self.assertFalse(Workout.objects.filter(plan__client__username__startswith='peak_t', date__gt=timezone.localdate(),
+                                                logged_count__gt=0).exists())
+
+    def test_login_failure_is_a_sample_error(self):
+        def locked(user):
+            raise OperationalError('database is locked')
+
+        sessions = plan_sessions(list(User.objects.filter(username__startswith='peak_t', role='CLIENTE')), 0)
+        result = Phase(1, sessions, locked, 'queue', 0, 42).run()
+        self.assertEqual(result['errors'], {'OperationalError: database is locked': 2})
+        self.assertEqual((result['requests'], result['error_rate']), (2, 1))
+
+    def test_requires_seeded_clients(self):
+        with self.assertRaisesMessage(CommandError, 'seed_load'):
+            call_command('loadtest_logs', '--prefix=nadie', stdout=StringIO())
+
+
+class OutboxTests(EntrenamientoTestMixin, TestCase):
+    def queue(self, count, to='coach@example.com'):
+        for i in range(count):
+            message = EmailMessage(f'Reporte {i}', 'cuerpo', 'app@example.com', [to])
+            message.attach('reporte.xlsx', bytes(range(256)), 'application/vnd.ms-excel')
+            queue_email(message)
+
+    def test_create_client_queues_instead_of_sending(self):
+        self.client.force_login(self.trainer)
+        self.client.post(reverse('create_client'), {
+            'username': 'nuevo', 'email': 'nuevo@example.com', 'rut': '4-3', 'first_name': 'N', 'last_name': 'C',
+        })
+        self.assertTrue(User.objects.filter(username='nuevo').exists())
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(Outbox.objects.get().to, ['nuevo@example.com', 'coach@example.com'])
+        send_batch()
+        self.assertIn('Contraseña temporal', mail.outbox[0].body)
+        # Enviado: la contraseña temporal no queda guardada en la tabla.
+        self.assertEqual(Outbox.objects.values_list('status', 'body').get(), ('sent', ''))
+
+    def test_batch_preserves_attachments(self):
+        self.queue(3)
+        self.assertEqual(send_batch(batch_size=10), (3, 0))
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(mail.outbox[0].attachments[0][1], bytes(range(256)))
+        self.assertFalse(Outbox.objects.exclude(status='sent').exists())
+
+    def test_batch_preserves_envelope_and_alternatives(self):
+        message = EmailMultiAlternatives(
+            'Reporte', 'texto', 'app@example.com', ['coach@example.com'], bcc=['archivo@example.com'],
+            cc=['jefe@example.com'], reply_to=['soporte@example.com'], headers={'X-Reporte': 'semanal'},
+        )
+        message.attach_alternative('<p>html</p>', 'text/html')
+        queue_email(message)
+        send_batch()
+        sent = mail.outbox[0]
+        self.assertEqual((sent.cc, sent.bcc, sent.reply_to), (['jefe@example.com'], ['archivo@example.com'], ['soporte@example.com']))
+        self.assertEqual(sent.extra_headers, {'X-Reporte': 'semanal'})
+        self.assertEqual([tuple(alternative) for alternative in sent.alternatives], [('<p>html</p>', 'text/html')])
+        self.assertIn('archivo@example.com', sent.recipients())
+
+    def test_rejects_mime_attachments(self):
+        message = EmailMessage('Reporte', 'cuerpo', 'app@example.com', ['coach@example.com'])
+        message.attach(MIMEText('hola'))
+        with self.assertRaises(ValueError):
+            queue_email(message)
+        self.assertFalse(Outbox.objects.exists())
+
+    def test_create_client_shows_password_if_queueing_fails(self):
+        self.client.force_login(self.trainer)
+        with mock.patch('entrenamiento.views.queue_email', side_effect=DatabaseError('sin base')):
+            response = self.client.post(reverse('create_client'), {
+                'username': 'nuevo', 'email': 'nuevo@example.com', 'rut': '4-3', 'first_name': 'N', 'last_name': 'C',
+            }, follow=True)
+        shown = [str(m) for m in response.context['messages']]
+        self.assertTrue(any('Contraseña temporal' in m for m in shown))
+        password = shown[0].rsplit(' ', 1)[-1]
+        self.assertTrue(User.objects.get(username='nuevo').check_password(password))
+
+    @override_settings(EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend', EMAIL_HOST='127.0.0.1', EMAIL_PORT=1,
+                       EMAIL_USE_TLS=False, EMAIL_USE_SSL=False, EMAIL_TIMEOUT=2)
+    def test_unreachable_server_requeues_whole_batch(self):
+        self.queue(2)
+        self.assertEqual(send_batch(), (0, 2))
+        self.assertEqual(set(Outbox.objects.values_list('status', 'attempts')), {('pending', 1)})
+
+
+try:
+    from aiosmtpd.controller import Controller
+except ImportError:
+    Controller = None
+
+
+@unittest.skipIf(Controller is None, 'aiosmtpd no está instalado')
+class OutboxSMTPTests(EntrenamientoTestMixin, TestCase):
+    # Servidor SMTP local (aiosmtpd) que cuenta sesiones y rechaza a un destinatario.
+    class Handler:
+        def __init__(self):
+            self.sessions = 0
+            self.messages = []
+
+        async def handle_EHLO(self, server, session, envelope, hostname, responses):
+            self.sessions += 1
+            session.host_name = hostname
+            return responses
+
+        async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+            if address.startswith('rebota@'):
+                return '550 buzón inexistente'
+            envelope.rcpt_tos.append(address)
+            return '250 OK'
+
+        async def handle_DATA(self, server, session, envelope):
+            self.messages.append(envelope.content)
+            return '250 OK'
+
+    def setUp(self):
+        self.handler = self.Handler()
+        with socket.socket() as probe:  # Puerto libre para el servidor de prueba
+            probe.bind(('127.0.0.1', 0))
+            port = probe.getsockname()[1]
+        self.controller = Controller(self.handler, hostname='127.0.0.1', port=port)
+        self.controller.start()
+        self.addCleanup(self.controller.stop)
+        smtp = override_settings(
+            EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend', EMAIL_HOST='127.0.0.1',
+            EMAIL_PORT=port, EMAIL_USE_TLS=False, EMAIL_USE_SSL=False,
+            EMAIL_HOST_USER='', EMAIL_HOST_PASSWORD='',
+        )
+        smtp.enable()
+        self.addCleanup(smtp.disable)
+
+    def queue(self, to):
+        message = EmailMessage('Reporte', 'cuerpo', 'app@example.com', [to])
+        message.attach('reporte.xlsx', b'xlsx-bytes', 'application/vnd.ms-excel')
+        return queue_email(message)
+
+    def test_one_connection_per_batch_and_retry_only_failed(self):
+        for i in range(5):
+            self.queue(f'coach{i}@example.com')
+        bounced = self.queue('rebota@example.com')
+
+        self.assertEqual(send_batch(batch_size=10), (5, 1))
+        self.assertEqual(self.handler.sessions, 1)
+        self.assertEqual(len(self.handler.messages), 5)
+        bounced.refresh_from_db()
+        self.assertEqual((bounced.status, bounced.attempts), ('pending', 1))
+        self.assertIn('550', bounced.last_error)
@@ -0,0 +1,70 @@
+from datetime import timedelta
+
+from botocore.exceptions import ClientError
+from django.conf import settings
+from django.utils import timezone
+
+from .models import UploadSession
+from .storage import get_s3_client
+
+# ====================================================================================================================
+# Sesiones de Subida Multipart Reanudables
+# ====================================================================================================================
+# Antes, el estado de una subida multipart (qué partes ya se enviaron) vivía solo en el array `parts` del navegador: un corte
+# de red o recargar la página a mitad de un video de 400 MB obligaba a reenviarlo entero. Ahora cada subida tiene una
+# UploadSession (key, upload_id, tamaño de parte) y, al reintentar el mismo archivo, el navegador pide las partes que S3 ya
+# tiene (ListParts, fuente de verdad) y sube solo las que faltan. "El mismo archivo" es nombre + tamaño + una huella del
+# contenido calculada en el navegador (lastModified y SHA-256 del primer y último bloque).
+#
+# Las sesiones abandonadas dejan partes cobradas en el bucket hasta que se aborta el upload: purge_upload_sessions lo hace.
+# ====================================================================================================================
+
+UPLOAD_SESSION_TTL = timedelta(hours=getattr(settings, 'UPLOAD_SESSION_TTL_HOURS', 24))
+
+
+def find_resumable_session(user, file_name, file_size, part_size, fingerprint):
+    # Misma persona, mismo archivo (nombre + tamaño + huella del contenido) y mismo tamaño de parte: si cambió, las partes no
+    # coinciden. Sin huella no se reanuda: otro video con el mismo nombre y tamaño terminaría mezclando partes de ambos.
+    if not fingerprint:
+        return None
+    return UploadSession.objects.filter(
+        user=user, status='active', file_name=file_name, file_size=file_size, part_size=part_size, fingerprint=fingerprint,
+        updated_at__gte=timezone.now() - UPLOAD_SESSION_TTL,
+    ).order_by('-updated_at').first()
+
+
+def list_uploaded_parts(session):
+    parts = []
+    paginator = get_s3_client().get_paginator('list_parts')
+    for page in paginator.paginate(Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=session.key, UploadId=session.upload_id):
+        for part in page.get('Parts', []):
+            parts.append({'PartNumber': part['PartNumber'], 'ETag': part['ETag'].strip('"'), 'Size': part['Size']})
+    return parts
+
+
+def confirm_parts(session):
+    # Sincroniza confirmed_parts con S3. Solo cuentan las partes completas (la última puede ser más corta).
+    parts = list_uploaded_parts(session)
+    last = session.part_count
+    expected = {n: session.part_size for n in range(1, last)}
+    expected[last] = session.file_size - session.part_size * (last - 1)
+    session.confirmed_parts = [p for p in parts if expected.get(p['PartNumber']) == p['Size']]
+    session.save(update_fields=['confirmed_parts', 'updated_at'])
+    return session.confirmed_parts
+
+
+def abort_session(session):
+    try:
+        get_s3_client().abort_multipart_upload(
+            Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=session.key, UploadId=session.upload_id
+        )
+    except ClientError as e:
+        # Ya completado/abortado del lado de S3: no queda nada que liberar.
+        if e.response.get('Error', {}).get('Code') != 'NoSuchUpload':
+            raise
+    session.status = 'aborted'
+    session.save(update_fields=['status', 'updated_at'])
+
+
+def stale_sessions(older_than=UPLOAD_SESSION_TTL):
+    return UploadSession.objects.filter(updated_at__lt=timezone.now() - older_than)
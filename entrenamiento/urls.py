@@ -3,9 +3,9 @@ from django.urls import path
 from .views import (
     trainer_dashboard, create_plan, add_workout, add_exercise, client_dashboard,
     view_plan, log_exercise, update_warmup, create_client, trainer_plan_detail,
-    workout_detail, edit_plan, edit_workout, edit_workout_exercise, delete_workout_exercise,
-    client_statistics, view_log,client_logs,create_exercise,progress_view,
-    generate_presigned_url,initiate_multipart_upload,generate_presigned_part,complete_multipart_upload,delete_workout,delete_plan,delete_workout
+    workout_detail, workout_editor, edit_plan, edit_workout, edit_workout_exercise, delete_workout_exercise,
+    client_statistics, view_log,client_logs,plan_templates,save_plan_as_template,client_log_history,export_logs,create_exercise,exercise_autocomplete,progress_view,
+    generate_presigned_url,initiate_multipart_upload,resume_multipart_upload,generate_presigned_part,generate_presigned_parts,complete_multipart_upload,delete_workout,delete_plan,delete_workout
 
 )
 
@@ -19,6 +19,8 @@ urlpatterns = [
     path('client/', client_dashboard, name='client_dashboard'),
     path('view_plan/<int:plan_id>/', view_plan, name='view_plan'),
     path('client/<int:client_id>/logs/', client_logs, name='client_logs'),
+    path('client/<int:client_id>/logs/history/', client_log_history, name='client_log_history'),
+    path('export/logs/', export_logs, name='export_logs'),
 
     # Training Plan Management
     path('create_plan/', create_plan, name='create_plan'),
@@ -26,16 +28,20 @@ urlpatterns = [
     path('trainer_plan/<int:plan_id>/', trainer_plan_detail, name='trainer_plan_detail'),
     path('edit_plan/<int:plan_id>/', edit_plan, name='edit_plan'),
     path('entrenamiento/delete_plan/<int:plan_id>/', delete_plan, name='delete_plan'),
+    path('plan/<int:plan_id>/save_template/', save_plan_as_template, name='save_plan_as_template'),
+    path('plan_templates/', plan_templates, name='plan_templates'),
 
     # Workout Management
     path('add_workout/<int:plan_id>/', add_workout, name='add_workout'),
     path('workout/<int:workout_id>/', workout_detail, name='workout_detail'),
     path('edit_workout/<int:workout_id>/', edit_workout, name='edit_workout'),
+    path('workout/<int:workout_id>/editor/', workout_editor, name='workout_editor'),
     path('entrenamiento/delete_workout/<int:workout_id>/', delete_workout, name='delete_workout'),
 
     # Exercise Management
     path('add_exercise/<int:workout_id>/', add_exercise, name='add_exercise'),
     path('create_exercise/', create_exercise, name='create_exercise'),
+    path('exercises/autocomplete/', exercise_autocomplete, name='exercise_autocomplete'),
     path('edit_workout_exercise/<int:exercise_id>/', edit_workout_exercise, name='edit_workout_exercise'),
     path('delete_workout_exercise/<int:exercise_id>/', delete_workout_exercise, name='delete_workout_exercise'),
 
@@ -53,6 +59,8 @@ urlpatterns = [
     # File Upload Management
     path('generate-presigned/', generate_presigned_url, name='generate_presigned'),
     path('initiate_multipart/', initiate_multipart_upload, name='initiate_multipart_upload'),
+    path('resume_multipart/', resume_multipart_upload, name='resume_multipart_upload'),
     path('generate_presigned_part/', generate_presigned_part, name='generate_presigned_part'),
+    path('generate_presigned_parts/', generate_presigned_parts, name='generate_presigned_parts'),
     path('complete_multipart/', complete_multipart_upload, name='complete_multipart_upload'),
 ]
\ No newline at end of file
@@ -0,0 +1,116 @@
+import os
+import shutil
+import subprocess
+import tempfile
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+
+# ====================================================================================================================
+# Procesamiento de Videos en el Servidor
+# ====================================================================================================================
+# Reemplaza la compresión con ffmpeg.wasm en el navegador (report.html), que en móviles tardaba minutos en un solo hilo y
+# se saltaba en silencio sin SharedArrayBuffer. Ahora el navegador sube el original y el worker de tareas (tarea
+# 'process_video', ver tasks.py) usa el ffmpeg local para generar, junto al original en el bucket:
+#   - <nombre>_720p.mp4: H.264 720p (nunca escala hacia arriba), faststart para empezar a reproducir sin bajarlo entero.
+#   - <nombre>_poster.jpg: miniatura para el <video poster> y los listados.
+#   - La duración (ffprobe) en ExerciseLog.video_duration.
+# view_log, el historial y el reporte diario usan la versión liviana cuando está lista y el original mientras tanto.
+# ====================================================================================================================
+
+# Tope por llamada a ffmpeg/ffprobe. Puede superar TASK_LOCK_TIMEOUT_SECONDS: mientras corre la tarea, run_task renueva su
+# lock (ver tasks.heartbeat), así ningún otro worker la reclama como huérfana ni transcodifica el mismo log a la vez.
+FFMPEG_TIMEOUT = getattr(settings, 'FFMPEG_TIMEOUT_SECONDS', 15 * 60)
+
+
+class VideoProcessingError(Exception):
+    pass
+
+
+def ffmpeg_binary():
+    return getattr(settings, 'FFMPEG_BINARY', 'ffmpeg')
+
+
+def ffprobe_binary():
+    return getattr(settings, 'FFPROBE_BINARY', 'ffprobe')
+
+
+def _run(args):
+    try:
+        result = subprocess.run(args, capture_output=True, timeout=FFMPEG_TIMEOUT, check=False)
+    except subprocess.TimeoutExpired as e:
+        raise VideoProcessingError(f'{args[0]}: {e}') from e
+    if result.returncode != 0:
+        # Las últimas líneas de stderr son las que explican el error; el resto es el banner de ffmpeg.
+        stderr = result.stderr.decode(errors='replace').strip().splitlines()[-5:]
+        raise VideoProcessingError(f'{args[0]} terminó con código {result.returncode}: ' + ' | '.join(stderr))
+    return result.stdout.decode(errors='replace')
+
+
+def probe_duration(path):
+    output = _run([ffprobe_binary(), '-v', 'error', '-show_entries', 'format=duration', '-of', 'csv=p=0', path])
+    try:
+        return round(float(output.strip()), 2)
+    except ValueError:
+        return None
+
+
+def transcode_720p(source, target):
+    _run([
+        ffmpeg_binary(), '-y', '-v', 'error', '-i', source,
+        '-vf', "scale=-2:'min(720,ih)'",
+        '-c:v', 'libx264', '-preset', 'veryfast', '-crf', '26', '-pix_fmt', 'yuv420p',
+        '-c:a', 'aac', '-b:a', '128k',
+        '-movflags', '+faststart',
+        target,
+    ])
+
+
+def extract_poster(source, target, duration=None):
+    # Un fotograma a ~1s (o al inicio si el clip es más corto) para evitar la pantalla negra del primer frame.
+    offset = '1' if duration is None or duration > 2 else '0'
+    _run([ffmpeg_binary(), '-y', '-v', 'error', '-ss', offset, '-i', source, '-frames:v', '1', '-vf', 'scale=-2:360', target])
+
+
+def rendition_names(original_name):
+    base, _ = os.path.splitext(original_name)
+    return f'{base}_720p.mp4', f'{base}_poster.jpg'
+
+
+def process_log_video(log):
+    if not log.video_log:
+        return
+    rendition_name, poster_name = rendition_names(log.video_log.name)
+    workdir = tempfile.mkdtemp(prefix='video-')
+    try:
+        source = os.path.join(workdir, 'original' + os.path.splitext(log.video_log.name)[1])
+        with default_storage.open(log.video_log.name, 'rb') as remote, open(source, 'wb') as local:
+            shutil.copyfileobj(remote, local, 1024 * 1024)
+
+        duration = probe_duration(source)
+        rendition = os.path.join(workdir, 'rendition.mp4')
+        poster = os.path.join(workdir, 'poster.jpg')
+        transcode_720p(source, rendition)
+        extract_poster(rendition, poster, duration)
+
+        # Se reemplazan versiones previas (reintento de la tarea) en vez de acumular sufijos aleatorios.
+        for name, path in ((rendition_name, rendition), (poster_name, poster)):
+            if default_storage.exists(name):
+                default_storage.delete(name)
+            with open(path, 'rb') as fh:
+                saved = default_storage.save(name, File(fh))
+            if name == rendition_name:
+                log.video_rendition.name = saved
+            else:
+                log.video_poster.name = saved
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    log.video_duration = duration
+    log.video_status = 'ready'
+    # update() y no save(): son metadatos del archivo, no deben disparar las señales de progreso/analíticas del log.
+    type(log).objects.filter(pk=log.pk).update(
+        video_rendition=log.video_rendition.name, video_poster=log.video_poster.name,
+        video_duration=duration, video_status='ready',
+    )
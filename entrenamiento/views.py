@@ -1,26 +1,39 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
 from django.contrib.auth.decorators import login_required
-from django.core.mail import send_mail
+from django.contrib import admin
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.mail import EmailMessage
 from django.conf import settings
-from .models import ExerciseLog, TrainingPlan, Workout, WorkoutExercise, Warmup,Exercise
-from .forms import TrainingPlanForm, WorkoutForm, WorkoutExerciseForm, ExerciseLogForm, WarmupForm
+from .models import ExerciseLog, TrainingPlan, Workout, WorkoutExercise, Warmup,Exercise, UploadSession, PlanTemplate
+from .completion import prefetch_exercises
+from .roster import paginate_roster, ROSTER_SORTS, DEFAULT_ROSTER_SORT
+from .history import history_page, history_filters, logged_exercises, log_row
+from .progress import build_progress_series, max_chart_points
+from .analytics import client_metrics, trainer_metrics
+from .export import EXPORT_FORMATS, export_chunks, export_filename, export_queryset, parquet_available
+from .tasks import enqueue
+from .outbox import queue_email
+from .storage import get_s3_client
+from .uploads import confirm_parts, find_resumable_session
+from .plans import instantiate_template, template_from_plan
+from .editor import StaleWorkout, WorkoutEditorFormSet, save_workout_exercises
+from .records import exercise_records
+from .catalog import search_exercises
+from .warmups import warmup_catalog
+from .instrumentation import WINDOW_SECONDS, performance_summary
+from .forms import TrainingPlanForm, WorkoutForm, WorkoutExerciseForm, ExerciseLogForm, WarmupForm, PlanTemplateForm, PlanFromTemplateForm
 from core.models import User
 from django.utils import timezone
-from datetime import timedelta
 from django.contrib import messages
 from .forms import ClientCreationForm,ExerciseForm
 from django.utils.crypto import get_random_string
 import mimetypes
-from io import BytesIO
-import openpyxl
 import json
-from django.core.mail import EmailMessage
-from django.db.models import Avg
-from openpyxl.styles import Font, Border, Side, Alignment, PatternFill
-from openpyxl.utils import get_column_letter
-from django.http import JsonResponse
+from django.db import DatabaseError, transaction
+from django.db.models import Count
+from django.http import JsonResponse, StreamingHttpResponse
 from django.views.decorators.http import require_POST
-import boto3
 from botocore.exceptions import ClientError
 import uuid 
 from django.core.validators import FileExtensionValidator
@@ -50,50 +63,39 @@ from django.core.validators import FileExtensionValidator
 # accesos indebidos y mejorando la seguridad.
 #
 # Por qué: Un dashboard centralizado facilita la gestión diaria. Calculo conteos como active_plans_count usando .filter().count() para eficiencia,
-# ya que evita cargar objetos completos en memoria. Para clientes, agrego atributos dinámicos (active_plans y last_session) en un loop simple; esto es
-# aceptable porque el número de clientes por entrenador es bajo (asumiendo <100). Si escala, consideraría prefetch_related para optimizar.
+# ya que evita cargar objetos completos en memoria. Los clientes vienen de roster.paginate_roster: un queryset anotado (planes activos y
+# última sesión) con el plan activo prefetcheado, paginado y ordenado en el servidor, así un entrenador con cientos de clientes no paga
+# 3 queries por cliente.
 #
-# Los calentamientos se dividen por tipo para una presentación más organizada en la plantilla, permitiendo al entrenador recomendarlos fácilmente.
+# Los calentamientos se dividen por tipo para una presentación más organizada en la plantilla, permitiendo al entrenador recomendarlos fácilmente;
+# vienen ya agrupados del snapshot de warmups.py, compartido con client_dashboard.
 # El contexto es un diccionario rico que pasa todos los datos necesarios a la plantilla 'entrenador/entrenador.html', promoviendo separación de concerns.
 @login_required
 def trainer_dashboard(request):
     if request.user.role != 'ENTRENADOR':
         return redirect('inicio')
 
-    plans = TrainingPlan.objects.filter(trainer=request.user)
-    active_plans_count = plans.filter(status='active').count()
-
-    clients = User.objects.filter(role='CLIENTE', assigned_professional=request.user)
-    clients_count = clients.count()
-
-    weekly_sessions = Workout.objects.filter(
-        plan__in=plans,
-        date__range=[timezone.now().date(), timezone.now().date() + timedelta(days=7)]
-    ).exclude(date__isnull=True).count()
+    plans = TrainingPlan.objects.filter(trainer=request.user).select_related('client')
+    # Conteos globales del entrenador desde la caché de analíticas (se invalida con señales al cambiar planes/logs).
+    metrics = trainer_metrics(request.user)
 
-    exercises_count = WorkoutExercise.objects.filter(workout__plan__in=plans).count()
-
-    warmups = Warmup.objects.all()
-    warmups_upper_body = warmups.filter(type='superior')
-    warmups_lower_body = warmups.filter(type='inferior')
-
-    for client in clients:
-        client.active_plans = client.assigned_plans.filter(status='active').count()
-        last_log = ExerciseLog.objects.filter(client=client).order_by('-date_completed').first()
-        client.last_session = last_log.date_completed if last_log else None
-        client.active_plan = client.assigned_plans.filter(status='active').first()  # NUEVA LÍNEA: Calcula aquí el plan activo
+    # Roster paginado y ordenado en el servidor: el coste de la página no crece con el número de clientes.
+    clients_sort = request.GET.get('clients_sort', DEFAULT_ROSTER_SORT)
+    if clients_sort not in ROSTER_SORTS:
+        clients_sort = DEFAULT_ROSTER_SORT
+    clients = paginate_roster(request.user, sort=clients_sort, page=request.GET.get('clients_page'))
+    clients_count = clients.paginator.count
 
     context = {
         'plans': plans,
-        'active_plans_count': active_plans_count,
+        'active_plans_count': metrics['active_plans_count'],
         'clients_count': clients_count,
-        'weekly_sessions': weekly_sessions,
-        'exercises_count': exercises_count,
+        'weekly_sessions': metrics['weekly_sessions'],
+        'exercises_count': metrics['exercises_count'],
         'clients': clients,
-        'warmups': {
-            'upper_body': warmups_upper_body,
-            'lower_body': warmups_lower_body,
-        }
+        'clients_sort': clients_sort,
+        # Snapshot en memoria del catálogo de calentamientos, agrupado por tipo (ver warmups.py): sin queries.
+        'warmups': warmup_catalog(),
     }
     return render(request, 'entrenador/entrenador.html', context)
 
@@ -167,10 +169,13 @@ def create_client(request):
             from_email = 'no-reply@tu-dominio.com'  # Configura esto en settings.py preferiblemente
             recipient_list = [client.email, request.user.email]
 
+            # Se encola en la bandeja de salida (send_outbox la envía por la conexión SMTP compartida, con reintentos). Si
+            # ni siquiera se puede encolar, la contraseña se muestra al profesional para que no se pierda.
             try:
-                send_mail(subject, message, from_email, recipient_list)
-                messages.success(request, f"Cliente {client.username} creado exitosamente. Contraseña temporal enviada por email a {client.email} y {request.user.email}.")
-            except Exception as e:
+                with transaction.atomic():
+                    queue_email(EmailMessage(subject, message, from_email, recipient_list))
+                messages.success(request, f"Cliente {client.username} creado exitosamente. La contraseña temporal se enviará por email a {client.email} y {request.user.email}.")
+            except DatabaseError as e:
                 messages.error(request, f"Cliente creado, pero error al enviar email: {str(e)}. Contraseña temporal: {temp_password}")
 
             return redirect('trainer_dashboard')
@@ -214,16 +219,16 @@ def create_plan(request):
 # Detalle de plan para entrenador. Calcula progreso basado en logs (cualquier log cuenta como completado para flexibilidad).
 #
 # Por qué: Proporciona insights como progreso porcentual. Usamos round para 2 decimales en progress. Ordenamos workouts por semana/día para lógica temporal.
+# El progreso se lee de los contadores del plan, así que la página no escanea la tabla de logs.
 @login_required
 def trainer_plan_detail(request, plan_id):
     if request.user.role != 'ENTRENADOR':
         return redirect('inicio')
     plan = get_object_or_404(TrainingPlan, id=plan_id, trainer=request.user)
-    workouts = plan.workouts.all().order_by('week_number', 'day_of_week')  # Orden lógico.
-    total_exercises = WorkoutExercise.objects.filter(workout__plan=plan).count()
-    completed_exercises = ExerciseLog.objects.filter(
-        workout_exercise__workout__plan=plan
-    ).count()  # Cuenta cualquier log; ajustable si se quiere solo 'completed'.
+    workouts = plan.workouts.prefetch_related(prefetch_exercises()).order_by('week_number', 'day_of_week')  # Orden lógico.
+    # Contadores desnormalizados del plan (ver counters.py): el progreso sale de esta misma fila, sin recorrer los logs.
+    total_exercises = plan.exercise_count
+    completed_exercises = plan.logged_count  # Ejercicios con cualquier log; plan.completed_count si se quiere solo 'completed'.
     progress = round((completed_exercises / total_exercises * 100), 2) if total_exercises > 0 else 0  # Evitar división por cero.
     context = {
         'plan': plan,
@@ -231,9 +236,54 @@ def trainer_plan_detail(request, plan_id):
         'progress': progress,
         'total_exercises': total_exercises,
         'completed_exercises': completed_exercises,
+        'template_form': PlanTemplateForm(initial={'name': plan.name}),
     }
     return render(request, 'entrenador/plan_detail.html', context)
 
+
+# Plantillas de plan (ver plans.py): guardar un plan como plantilla e instanciarla para uno o varios clientes.
+#
+# Por qué: armar un plan largo eran cientos de POST a add_workout/add_exercise. Instanciar una plantilla es una sola transacción
+# con bulk_create (fechas y periodización calculadas en Python), sin importar cuántas semanas o clientes.
+@login_required
+@require_POST
+def save_plan_as_template(request, plan_id):
+    if request.user.role != 'ENTRENADOR':
+        return redirect('inicio')
+    plan = get_object_or_404(TrainingPlan, id=plan_id, trainer=request.user)
+    form = PlanTemplateForm(request.POST)
+    if not form.is_valid():
+        messages.error(request, "Error al guardar la plantilla. Revisa los datos ingresados.")
+        return redirect('trainer_plan_detail', plan_id=plan.id)
+    rules = {field: form.cleaned_data[field] for field in ('progression', 'progression_step', 'deload_every')}
+    template = template_from_plan(plan, name=form.cleaned_data['name'], weeks=form.cleaned_data['weeks'], **rules)
+    messages.success(request, f"Plantilla '{template.name}' guardada.")
+    return redirect('plan_templates')
+
+
+@login_required
+def plan_templates(request):
+    if request.user.role != 'ENTRENADOR':
+        return redirect('inicio')
+    form = PlanFromTemplateForm(request.user, request.POST or None)
+    if request.method == 'POST':
+        if form.is_valid():
+            data = form.cleaned_data
+            try:
+                plans = instantiate_template(data['template'], list(data['clients']), data['start_date'],
+                                             weeks=data['weeks'], name=data['name'])
+            except ValueError as e:
+                messages.error(request, str(e))
+            else:
+                messages.success(request, f"{len(plans)} plan(es) creados desde '{data['template'].name}'.")
+                return redirect('trainer_dashboard')
+        else:
+            messages.error(request, "Error al crear los planes. Revisa los datos ingresados.")
+    templates = PlanTemplate.objects.filter(trainer=request.user).annotate(
+        workout_total=Count('workouts', distinct=True), exercise_total=Count('workouts__exercises'),
+    ).order_by('name')
+    return render(request, 'entrenador/plan_templates.html', {'form': form, 'templates': templates})
+
 @login_required
 def delete_plan(request, plan_id):
     if request.user.role != 'ENTRENADOR':
@@ -362,6 +412,39 @@ def add_exercise(request, workout_id):
     return render(request, 'entrenador/add_ejercicio.html', {'form': form, 'workout': workout})
 
 
+# Editor de todos los ejercicios de un workout en un solo POST (ver editor.py).
+#
+# Por qué: agregar, editar, reordenar y borrar eran una página y un redirect por ejercicio. Aquí es un formset: un envío, una
+# transacción con escrituras en bloque, y la versión del workout evita pisar cambios guardados por otro mientras tanto.
+@login_required
+def workout_editor(request, workout_id):
+    if request.user.role != 'ENTRENADOR':
+        return redirect('inicio')
+    workout = get_object_or_404(Workout.objects.select_related('plan'), id=workout_id, plan__trainer=request.user)
+    if request.method == 'POST':
+        stale = "Otro usuario modificó este entrenamiento mientras lo editabas. Revisa los cambios y vuelve a guardar."
+        version = request.POST.get('version', '')
+        # La versión se compara antes de validar: si otro borró una fila, el formset ya no la encuentra y fallaría con un
+        # error genérico en vez de avisar del conflicto. save_workout_exercises la vuelve a comprobar al escribir.
+        if version.isdigit() and int(version) != workout.version:
+            messages.error(request, stale)
+            return redirect('workout_editor', workout_id=workout.id)
+        formset = WorkoutEditorFormSet(request.POST, instance=workout)
+        if formset.is_valid() and version.isdigit():
+            try:
+                created, updated, deleted = save_workout_exercises(workout, formset, int(version))
+            except StaleWorkout:
+                messages.error(request, stale)
+                return redirect('workout_editor', workout_id=workout.id)
+            messages.success(request, f"Ejercicios guardados: {created} nuevos, {updated} modificados, {deleted} eliminados.")
+            return redirect('workout_detail', workout_id=workout.id)
+        messages.error(request, "Error al guardar los ejercicios. Revisa los datos ingresados.")
+    else:
+        formset = WorkoutEditorFormSet(instance=workout)
+        version = workout.version
+    return render(request, 'entrenador/workout_editor.html', {'workout': workout, 'formset': formset, 'version': version})
+
+
 # Eliminar ejercicio de workout.
 #
 # Por qué: Completa CRUD. Redirige a detail.
@@ -407,93 +490,54 @@ def update_warmup(request, warmup_id=None):
 
 # Dashboard para clientes. Calcula métricas personalizadas como consistencia (basada en workouts completos).
 #
-# Por qué: Vista personalizada para motivación. Loop para completed_workouts es aceptable por bajo volumen.
+# Por qué: Vista personalizada para motivación. La consistencia sale de completion_summary (una sola query agregada),
+# así el coste no crece con la duración del plan; y todas las métricas se sirven desde la caché de analytics.py.
 
 @login_required
 def client_dashboard(request):
     if request.user.role != 'CLIENTE':
         return redirect('inicio')
 
-    plans = TrainingPlan.objects.filter(client=request.user)
-    active_plans_count = plans.filter(status='active').count()
-    weekly_sessions = Workout.objects.filter(
-        plan__in=plans,
-        date__range=[timezone.now().date(), timezone.now().date() + timedelta(days=7)]
-    ).exclude(date__isnull=True).count()
-    completed_exercises = ExerciseLog.objects.filter(
-        client=request.user, status='completed'
-    ).count()
-    next_session = Workout.objects.filter(
-        plan__in=plans,
-        date__gte=timezone.now().date()
-    ).exclude(date__isnull=True).order_by('date').first()
-    upcoming_sessions = Workout.objects.filter(
-        plan__in=plans,
-        date__gte=timezone.now().date()
-    ).exclude(date__isnull=True).order_by('date')[:5]
-    total_workouts = Workout.objects.filter(plan__in=plans).count()
-    total_exercises = WorkoutExercise.objects.filter(workout__plan__in=plans).count()
-    completed_workouts = 0
-    for workout in Workout.objects.filter(plan__in=plans):
-        workout_exercises_count = workout.exercises.count()
-        completed_logs = ExerciseLog.objects.filter(
-            workout_exercise__workout=workout,
-            status='completed'
-        ).count()
-        if workout_exercises_count > 0 and completed_logs == workout_exercises_count:
-            completed_workouts += 1
-    consistency = round((completed_workouts / total_workouts * 100), 2) if total_workouts > 0 else 0
-    warmups = Warmup.objects.all()
-    warmups_upper_body = warmups.filter(type='superior')
-    warmups_lower_body = warmups.filter(type='inferior')
+    plans = TrainingPlan.objects.filter(client=request.user).select_related('trainer')
+    # Métricas del cliente desde la caché de analíticas (analytics.py); solo se recalculan tras una invalidación.
+    metrics = client_metrics(request.user)
     context = {
         'plans': plans,
-        'active_plans_count': active_plans_count,
-        'weekly_sessions': weekly_sessions,
-        'completed_exercises': completed_exercises,
-        'next_session': next_session,
-        'upcoming_sessions': upcoming_sessions,
-        'total_workouts': total_workouts,
-        'total_exercises': total_exercises,
-        'consistency': consistency,
-        'warmups': {
-            'upper_body': warmups_upper_body,
-            'lower_body': warmups_lower_body,
-        }
+        **metrics,
+        # Snapshot en memoria del catálogo de calentamientos, agrupado por tipo (ver warmups.py): sin queries.
+        'warmups': warmup_catalog(),
     }
     return render(request, 'clientes/cliente.html', context)
 
 
-# Estadísticas de cliente: Lista logs ordenados.
+# Estadísticas de cliente: Lista logs ordenados, paginados por cursor (ver history.py) y con filtros de fecha/ejercicio.
 
 @login_required
 def client_statistics(request):
     if request.user.role != 'CLIENTE':
         return redirect('inicio')
-    logs = ExerciseLog.objects.filter(client=request.user).order_by('-date_completed')
-    context = {'logs': logs}
+    logs, next_cursor = history_page(request.user, request.GET)
+    context = {
+        'logs': logs,
+        'next_cursor': next_cursor,
+        'filters': history_filters(request.GET),
+        'exercises': logged_exercises(request.user),
+        'history_url': reverse('client_log_history', args=[request.user.id]),
+    }
     return render(request, 'clientes/estadisticas.html', context)
 
 
-# Ver plan para cliente. Calcula progreso similar al trainer.
+# Ver plan para cliente. Lee el progreso de los contadores del plan, igual que el trainer.
 
 @login_required
 def view_plan(request, plan_id):
     plan = get_object_or_404(TrainingPlan, id=plan_id, client=request.user)
-    workouts = plan.workouts.all().order_by('week_number', 'day_of_week')
-    total_exercises = WorkoutExercise.objects.filter(workout__plan=plan).count()
-    completed_exercises = ExerciseLog.objects.filter(
-        workout_exercise__workout__plan=plan
-    ).count()
+    workouts = plan.workouts.prefetch_related(prefetch_exercises()).order_by('week_number', 'day_of_week')
+    total_exercises = plan.exercise_count
+    completed_exercises = plan.logged_count
     progress = round((completed_exercises / total_exercises * 100), 2) if total_exercises > 0 else 0
-    completed_workouts = 0
-    for workout in workouts:
-        workout_exercises = workout.exercises.count()
-        completed_workout_exercises = ExerciseLog.objects.filter(
-            workout_exercise__workout=workout, status='completed'
-        ).count()
-        if workout_exercises > 0 and completed_workout_exercises == workout_exercises:
-            completed_workouts += 1
+    # Reutiliza los contadores de cada workout (la plantilla consume la misma caché de resultados).
+    completed_workouts = sum(1 for workout in workouts if workout.exercise_count and workout.completed_count == workout.exercise_count)
     context = {
         'plan': plan,
         'workouts': workouts,
@@ -506,20 +550,26 @@ def view_plan(request, plan_id):
 
 
 # Registrar log de ejercicio. Envía email al trainer con detalles.
+def video_upload_config():
+    # Parámetros de la subida multipart en el navegador (report.html): tamaño de parte y partes en paralelo.
+    return {
+        'upload_part_size': getattr(settings, 'VIDEO_UPLOAD_PART_SIZE', 5 * 1024 * 1024),
+        'upload_concurrency': getattr(settings, 'VIDEO_UPLOAD_CONCURRENCY', 4),
+    }
+
+
 @login_required
 def log_exercise(request, workout_exercise_id):
     workout_exercise = get_object_or_404(WorkoutExercise, id=workout_exercise_id, workout__plan__client=request.user)
-    best_log = ExerciseLog.objects.filter(
-        client=request.user,
-        workout_exercise__exercise=workout_exercise.exercise
-    ).order_by('-weight_lifted_kg', '-reps_completed').first()
+    # Récords materializados (ver records.py): una búsqueda por (cliente, ejercicio) en vez de recorrer todos sus logs.
+    records = exercise_records(request.user, [workout_exercise.exercise_id])[workout_exercise.exercise_id]
     
     if request.method == 'POST':
         form = ExerciseLogForm(request.POST, request.FILES)
         if form.is_valid():
             if workout_exercise.video_required and ('video_log' not in request.FILES and 'video_key' not in request.POST):
                 messages.error(request, "Este ejercicio requiere un video.")
-                return render(request, 'clientes/report.html', {'form': form, 'workout_exercise': workout_exercise, 'best_log': best_log})
+                return render(request, 'clientes/report.html', {'form': form, 'workout_exercise': workout_exercise, 'records': records, **video_upload_config()})
             
             log = form.save(commit=False)
             log.client = request.user
@@ -532,13 +582,26 @@ def log_exercise(request, workout_exercise_id):
                 mime_type, _ = mimetypes.guess_type(video_file.name)
                 if not mime_type or not mime_type.startswith('video/'):
                     messages.error(request, "El archivo subido no es un video válido.")
-                    return render(request, 'clientes/report.html', {'form': form, 'workout_exercise': workout_exercise, 'best_log': best_log})
-            
-            log.save()  # Sube a B2 si aplica (pero ahora es direct desde client)
+                    return render(request, 'clientes/report.html', {'form': form, 'workout_exercise': workout_exercise, 'records': records, **video_upload_config()})
             
-            workout = workout_exercise.workout
-            if workout.is_complete():
-                send_daily_report(workout)
+            with transaction.atomic():
+                if log.video_log:
+                    log.video_status = 'pending'
+                log.save()  # Sube a B2 si aplica (pero ahora es direct desde client)
+
+                # La versión 720p, el póster y la duración los genera el worker con ffmpeg (ver video.py)
+                if log.video_log:
+                    enqueue('process_video', {'log_id': log.pk}, idempotency_key=f'process_video:{log.pk}')
+
+                # El reporte (Excel + SMTP) lo genera el worker de tareas; aquí solo se encola en la misma transacción.
+                # La clave de idempotencia evita un segundo reporte si el cliente vuelve a registrar un workout ya completo.
+                workout = workout_exercise.workout
+                if workout.is_complete():
+                    enqueue('send_daily_report', {'workout_id': workout.pk}, idempotency_key=f'daily_report:{workout.pk}')
+
+            # La señal de récords ya comparó este log contra los récords guardados: detectar uno nuevo no cuesta queries.
+            if getattr(log, 'new_records', None):
+                messages.success(request, f"¡Nuevo récord personal en {workout_exercise.exercise.name}!")
             
             return redirect('view_plan', plan_id=workout_exercise.workout.plan.id)
     else:
@@ -547,7 +610,8 @@ def log_exercise(request, workout_exercise_id):
     context = {
         'form': form,
         'workout_exercise': workout_exercise,
-        'best_log': best_log,
+        'records': records,
+        **video_upload_config(),
     }
     return render(request, 'clientes/report.html', context)
 
@@ -570,12 +634,7 @@ def generate_presigned_url(request):
     
     unique_key = f'logs/videos/{uuid.uuid4()}_{file_name}'
     
-    s3_client = boto3.client(
-        's3',
-        endpoint_url=settings.AWS_S3_ENDPOINT_URL,
-        aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY
-    )
+    s3_client = get_s3_client()  # Cliente compartido del proceso (ver storage.py)
     
     try:
         presigned_url = s3_client.generate_presigned_url(
@@ -608,14 +667,14 @@ def initiate_multipart_upload(request):
     if not mime_type or not mime_type.startswith('video/'):
         return JsonResponse({'error': 'Invalid file type'}, status=400)
     
+    file_size = request.POST.get('file_size', '')
+    if not file_size.isdigit() or int(file_size) == 0:
+        return JsonResponse({'error': 'Invalid file size'}, status=400)
+    
     unique_key = f'logs/videos/{uuid.uuid4()}_{file_name}'
+    part_size = video_upload_config()['upload_part_size']
     
-    s3_client = boto3.client(
-        's3',
-        endpoint_url=settings.AWS_S3_ENDPOINT_URL,
-        aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY
-    )
+    s3_client = get_s3_client()  # Cliente compartido del proceso (ver storage.py)
     
     try:
         multipart = s3_client.create_multipart_upload(
@@ -623,9 +682,49 @@ def initiate_multipart_upload(request):
             Key=unique_key,
             ContentType=mime_type
         )
-        return JsonResponse({'upload_id': multipart['UploadId'], 'key': unique_key})
     except ClientError as e:
         return JsonResponse({'error': str(e)}, status=500)
+    # Sesión en BD para poder reanudar si la subida se corta (ver uploads.py)
+    UploadSession.objects.create(
+        user=request.user, key=unique_key, upload_id=multipart['UploadId'],
+        file_name=file_name, file_size=int(file_size), part_size=part_size,
+        fingerprint=request.POST.get('file_fingerprint', '')[:128],
+    )
+    return JsonResponse({'upload_id': multipart['UploadId'], 'key': unique_key, 'part_size': part_size})
+
+
+# Reanudar: si el usuario ya empezó a subir este mismo archivo, devuelve la sesión y las partes que S3 ya confirmó para que
+# el navegador suba solo las que faltan.
+@require_POST
+@login_required
+def resume_multipart_upload(request):
+    file_name = request.POST.get('file_name', '')
+    file_size = request.POST.get('file_size', '')
+    if not file_name or not file_size.isdigit():
+        return JsonResponse({'error': 'Invalid file'}, status=400)
+    
+    session = find_resumable_session(
+        request.user, file_name, int(file_size), video_upload_config()['upload_part_size'],
+        request.POST.get('file_fingerprint', '')[:128],
+    )
+    if session is None:
+        return JsonResponse({'resumable': False})
+    try:
+        parts = confirm_parts(session)
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') == 'NoSuchUpload':
+            # S3 ya no tiene el upload (expiró o se abortó): se descarta la sesión y se empieza de cero.
+            session.status = 'aborted'
+            session.save(update_fields=['status', 'updated_at'])
+            return JsonResponse({'resumable': False})
+        return JsonResponse({'error': str(e)}, status=500)
+    return JsonResponse({
+        'resumable': True,
+        'key': session.key,
+        'upload_id': session.upload_id,
+        'part_size': session.part_size,
+        'parts': parts,
+    })
 
 @require_POST
 @login_required
@@ -634,12 +733,7 @@ def generate_presigned_part(request):
     upload_id = request.POST.get('upload_id')
     part_number = int(request.POST.get('part_number'))
     
-    s3_client = boto3.client(
-        's3',
-        endpoint_url=settings.AWS_S3_ENDPOINT_URL,
-        aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY
-    )
+    s3_client = get_s3_client()  # Cliente compartido del proceso (ver storage.py)
     
     try:
         url = s3_client.generate_presigned_url(
@@ -656,6 +750,51 @@ def generate_presigned_part(request):
     except ClientError as e:
         return JsonResponse({'error': str(e)}, status=500)
 
+# Lote de URLs firmadas: una sola llamada entrega las URLs de un rango de partes (en vez de un request por parte), y el JS
+# sube varias partes en paralelo. Firmar es local (sin red): 100 URLs cuestan unos ms con el cliente compartido.
+MAX_PARTS_PER_BATCH = 1000  # S3 admite hasta 10000 partes; el cliente pide por tramos si el archivo tiene más
+
+
+@require_POST
+@login_required
+def generate_presigned_parts(request):
+    key = request.POST.get('key', '')
+    upload_id = request.POST.get('upload_id')
+    try:
+        first_part = int(request.POST.get('first_part', 1))
+        part_count = int(request.POST.get('part_count', 1))
+    except ValueError:
+        return JsonResponse({'error': 'Invalid part range'}, status=400)
+    if first_part < 1 or not 1 <= part_count <= MAX_PARTS_PER_BATCH or first_part + part_count - 1 > 10000:
+        return JsonResponse({'error': 'Invalid part range'}, status=400)
+    # Solo se firman partes de una subida en curso del propio usuario. Firmar cuenta como actividad (updated_at): así
+    # purge_upload_sessions no aborta una subida larga que sigue avanzando.
+    active = UploadSession.objects.filter(user=request.user, key=key, upload_id=upload_id, status='active')
+    if not active.update(updated_at=timezone.now()):
+        return JsonResponse({'error': 'Invalid upload'}, status=400)
+
+    s3_client = get_s3_client()
+    try:
+        urls = [
+            {
+                'part_number': number,
+                'url': s3_client.generate_presigned_url(
+                    'upload_part',
+                    Params={
+                        'Bucket': settings.AWS_STORAGE_BUCKET_NAME,
+                        'Key': key,
+                        'UploadId': upload_id,
+                        'PartNumber': number
+                    },
+                    ExpiresIn=7200  # 2 horas
+                ),
+            }
+            for number in range(first_part, first_part + part_count)
+        ]
+        return JsonResponse({'parts': urls})
+    except ClientError as e:
+        return JsonResponse({'error': str(e)}, status=500)
+
 @require_POST
 @login_required
 def complete_multipart_upload(request):
@@ -663,12 +802,7 @@ def complete_multipart_upload(request):
     upload_id = request.POST.get('upload_id')
     parts = json.loads(request.POST.get('parts'))  # Lista de {'ETag': etag, 'PartNumber': num}
     
-    s3_client = boto3.client(
-        's3',
-        endpoint_url=settings.AWS_S3_ENDPOINT_URL,
-        aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY
-    )
+    s3_client = get_s3_client()  # Cliente compartido del proceso (ver storage.py)
     
     try:
         s3_client.complete_multipart_upload(
@@ -677,137 +811,13 @@ def complete_multipart_upload(request):
             UploadId=upload_id,
             MultipartUpload={'Parts': parts}
         )
+        UploadSession.objects.filter(user=request.user, key=key, upload_id=upload_id).update(
+            status='completed', confirmed_parts=parts, updated_at=timezone.now()
+        )
         return JsonResponse({'success': True})
     except ClientError as e:
         return JsonResponse({'error': str(e)}, status=500)
 
-def send_daily_report(workout):
-    # Generar Excel con diseño mejorado
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = f"Reporte Diario - {workout.title}"
-    
-    # Agregar título principal
-    ws.merge_cells('A1:H1')
-    title_cell = ws['A1']
-    title_cell.value = f"Reporte Diario Completado: {workout.title} por {workout.plan.client.username}"
-    title_cell.font = Font(bold=True, size=14, color="FFFFFF")
-    title_cell.fill = PatternFill(start_color="4F81BD", end_color="4F81BD", fill_type="solid")
-    title_cell.alignment = Alignment(horizontal="center", vertical="center")
-    
-    # Agregar fila en blanco para separación
-    ws.append([])  # Fila 2 vacía
-    
-    # Encabezados
-    headers = ['Ejercicio', 'Peso (kg)', 'Reps', 'RIR', 'RPE', 'Estado', 'Notas', 'Video URL']
-    ws.append(headers)
-    
-    # Estilo para encabezados
-    header_font = Font(bold=True, color="FFFFFF")
-    header_fill = PatternFill(start_color="17375E", end_color="17375E", fill_type="solid")
-    header_alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
-    thin_border = Border(left=Side(style='thin'), right=Side(style='thin'), top=Side(style='thin'), bottom=Side(style='thin'))
-    
-    for col in range(1, len(headers) + 1):
-        cell = ws.cell(row=3, column=col)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = header_alignment
-        cell.border = thin_border
-    
-    # Obtener logs
-    logs = ExerciseLog.objects.filter(workout_exercise__workout=workout)
-    
-    # Colores para estados (para resaltar filas según estado)
-    status_colors = {
-        'completed': PatternFill(start_color="C6EFCE", end_color="C6EFCE", fill_type="solid"),  # Verde claro
-        'half': PatternFill(start_color="FFEB9C", end_color="FFEB9C", fill_type="solid"),      # Amarillo claro
-        'not_completed': PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid")  # Rojo claro
-    }
-    
-    for log in logs:
-        video_url = log.video_log.url if log.video_log else ''
-        row_data = [
-            log.workout_exercise.exercise.name,
-            log.weight_lifted_kg,
-            log.reps_completed,
-            log.rir_actual if log.rir_actual is not None else '',
-            log.rpe_actual if log.rpe_actual is not None else '',
-            log.get_status_display(),
-            log.notes,
-            video_url
-        ]
-        ws.append(row_data)
-        
-        # Obtener número de fila actual
-        current_row = ws.max_row
-        
-        # Aplicar borde y alineación a las celdas de datos
-        data_alignment = Alignment(horizontal="left", vertical="center", wrap_text=True)
-        for col in range(1, len(headers) + 1):
-            cell = ws.cell(row=current_row, column=col)
-            cell.border = thin_border
-            cell.alignment = data_alignment
-            
-            # Formatear números
-            if col in [2, 3, 4, 5]:  # Peso, Reps, RIR, RPE
-                cell.number_format = '0.00' if col == 2 else '0'
-            
-            # Hacer URL de video clickable si existe
-            if col == 8 and video_url:
-                cell.hyperlink = video_url
-                cell.font = Font(underline="single", color="0000FF")
-                cell.value = "Ver Video" if video_url else ''
-        
-        # Resaltar fila según estado
-        status_fill = status_colors.get(log.status, None)
-        if status_fill:
-            for col in range(1, len(headers) + 1):
-                ws.cell(row=current_row, column=col).fill = status_fill
-    
-    # Ajustar ancho de columnas automáticamente
-    for col in range(1, ws.max_column + 1):
-        max_length = 0
-        column_letter = get_column_letter(col)
-        for cell in ws[column_letter]:
-            try:
-                if cell.value:
-                    max_length = max(max_length, len(str(cell.value)))
-            except:
-                pass
-        adjusted_width = (max_length + 2) * 1.2
-        ws.column_dimensions[column_letter].width = adjusted_width
-    
-    # Congelar la fila de encabezados
-    ws.freeze_panes = 'A4'
-    
-    # Guardar en BytesIO
-    output = BytesIO()
-    wb.save(output)
-    output.seek(0)
-    
-    # Mejorar el email: usar HTML para un cuerpo más atractivo
-    trainer_email = workout.plan.trainer.email
-    subject = f"Reporte Diario Completado: {workout.title} por {workout.plan.client.username}"
-    
-    html_message = f"""
-    <html>
-        <body>
-            <h2>Reporte Diario Completado</h2>
-            <p>Estimado entrenador,</p>
-            <p>El cliente {workout.plan.client.username} ha completado el workout "{workout.title}" el {workout.date.strftime('%Y-%m-%d')}.</p>
-            <p>Adjunto encontrarás el reporte detallado en formato Excel, con los logs de ejercicios, incluyendo pesos, reps, RIR/RPE, estados, notas y enlaces a videos si están disponibles.</p>
-            <p>Gracias,</p>
-            <p>Equipo de la App</p>
-        </body>
-    </html>
-    """
-    
-    email = EmailMessage(subject, html_message, settings.EMAIL_HOST_USER, [trainer_email])
-    email.content_subtype = "html"  # Para que se envíe como HTML
-    email.attach(f'reporte_diario_{workout.date.strftime("%Y-%m-%d")}.xlsx', output.getvalue(), 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-    email.send()
-
 
 @login_required
 def progress_view(request, plan_id):
@@ -818,18 +828,19 @@ def progress_view(request, plan_id):
     elif request.user.role == 'CLIENTE' and plan.client != request.user:
         messages.error(request, "No tienes permiso.")
         return redirect('inicio')
-    # Datos para charts: Por ejercicio, fechas y pesos/reps
-    exercises = Exercise.objects.filter(workoutexercise__workout__plan=plan).distinct()
-    chart_data = {}
-    for ex in exercises:
-        logs = ExerciseLog.objects.filter(workout_exercise__exercise=ex, client=plan.client).order_by('date_completed')
-        dates = [log.date_completed.strftime('%Y-%m-%d') for log in logs]
-        weights = [log.weight_lifted_kg for log in logs]
-        reps = [log.reps_completed for log in logs]
-        chart_data[ex.name] = {
-            'dates': dates,
-            'weights': weights,
-            'reps': reps
+    # Datos para charts: Por ejercicio, fechas, pesos/reps, 1RM estimado y volumen semanal (una sola query, ver progress.py)
+    chart_data = build_progress_series(plan, max_points=max_chart_points(request.GET.get('points')))
+    # Récords del cliente para los ejercicios del plan: una query sobre la tabla materializada (ver records.py).
+    exercise_ids = dict(Exercise.objects.filter(name__in=chart_data).values_list('name', 'pk'))
+    records = exercise_records(plan.client, exercise_ids.values())
+    for name, data in chart_data.items():
+        entry = records.get(exercise_ids.get(name)) or {}
+        heaviest, e1rm, volume = entry.get('heaviest'), entry.get('e1rm'), entry.get('volume')
+        data['records'] = {
+            'e1rm': e1rm.value if e1rm else None,
+            'heaviest': heaviest.value if heaviest else None,
+            'heaviest_reps': heaviest.reps if heaviest else None,
+            'volume': volume.value if volume else None,
         }
     context = {'plan': plan, 'chart_data': chart_data}
     return render(request, 'entrenador/progress.html', context)
@@ -854,21 +865,74 @@ def view_log(request, log_id):
 
 
 
-# Logs por cliente para entrenador.
+# Logs por cliente para entrenador. Misma paginación por cursor que client_statistics.
 
 @login_required
 def client_logs(request, client_id):
     if request.user.role != 'ENTRENADOR':
         return redirect('inicio')
     client = get_object_or_404(User, id=client_id, assigned_professional=request.user)
-    logs = ExerciseLog.objects.filter(client=client).order_by('-date_completed')
+    logs, next_cursor = history_page(client, request.GET)
     context = {
         'client': client,
         'logs': logs,
+        'next_cursor': next_cursor,
+        'filters': history_filters(request.GET),
+        'exercises': logged_exercises(client),
+        'history_url': reverse('client_log_history', args=[client.id]),
+        'export_formats': [(fmt, fmt.upper()) for fmt in EXPORT_FORMATS if fmt != 'parquet' or parquet_available()],
     }
     return render(request, 'entrenador/client_logs.html', context)
 
 
+# Páginas siguientes del historial en JSON para el scroll infinito. Accesible para el propio cliente o su entrenador.
+#
+# Por qué: el navegador pide la página siguiente con el cursor que devolvió la anterior; cada respuesta es un LIMIT acotado,
+# así el tiempo de respuesta no depende de cuántos años de historial tenga el cliente.
+@login_required
+def client_log_history(request, client_id):
+    if request.user.role == 'ENTRENADOR':
+        client = get_object_or_404(User, id=client_id, assigned_professional=request.user)
+    elif request.user.role == 'CLIENTE' and request.user.id == client_id:
+        client = request.user
+    else:
+        return JsonResponse({'error': 'No tienes permiso'}, status=403)
+    logs, next_cursor = history_page(client, request.GET)
+    return JsonResponse({'logs': [log_row(log) for log in logs], 'next_cursor': next_cursor})
+
+
+
+# Exportación del historial (CSV/XLSX/Parquet) de un cliente, un plan o todo el roster del entrenador.
+#
+# Por qué: la respuesta es un StreamingHttpResponse alimentado por bloques de export.py, así la memoria del worker no crece con
+# los años de historial y los primeros bytes salen antes de que el proxy corte por timeout. Acepta los mismos filtros que client_logs.
+@login_required
+def export_logs(request):
+    if request.user.role != 'ENTRENADOR':
+        return JsonResponse({'error': 'No tienes permiso'}, status=403)
+    fmt = request.GET.get('format', 'csv')
+    if fmt not in EXPORT_FORMATS:
+        return JsonResponse({'error': f"Formato no soportado: {fmt}"}, status=400)
+    if fmt == 'parquet' and not parquet_available():
+        return JsonResponse({'error': 'La exportación Parquet no está disponible en este servidor'}, status=400)
+
+    client = plan = None
+    scope = 'roster'
+    client_id, plan_id = request.GET.get('client', ''), request.GET.get('plan', '')
+    if client_id.isdigit():
+        client = get_object_or_404(User, id=client_id, assigned_professional=request.user)
+        scope = client.username
+    if plan_id.isdigit():
+        plan = get_object_or_404(TrainingPlan, id=plan_id, trainer=request.user)
+        scope = f'plan{plan.id}'
+
+    logs = export_queryset(request.user, client=client, plan=plan, filters=history_filters(request.GET))
+    content_type, stream = EXPORT_FORMATS[fmt]
+    response = StreamingHttpResponse(stream(export_chunks(logs)), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{export_filename(fmt, scope)}"'
+    return response
+
+
 
 
 
@@ -893,6 +957,38 @@ def create_exercise(request):
 
 
 
+# Autocompletado del catálogo de ejercicios para el widget de WorkoutExerciseForm (ver catalog.py).
+#
+# Por qué: el formulario cargaba todo el catálogo en un <select>. Aquí se devuelven como mucho AUTOCOMPLETE_LIMIT ejercicios
+# por prefijo de nombre (con filtros de grupo muscular y equipamiento), desde caché mientras el catálogo no cambie.
+@login_required
+def exercise_autocomplete(request):
+    if request.user.role != 'ENTRENADOR':
+        return JsonResponse({'error': 'Forbidden'}, status=403)
+    results = search_exercises(
+        request.GET.get('q', ''),
+        muscle_group=request.GET.get('muscle_group', ''),
+        equipment=request.GET.get('equipment', ''),
+    )
+    return JsonResponse({'results': results})
+
+
+# Percentiles de latencia y queries por vista, de la instrumentación de instrumentation.py. Página del admin, solo staff.
+#
+# Por qué: sin números por vista, una regresión en trainer_dashboard, client_dashboard o view_plan solo se notaba cuando
+# alguien se quejaba. Aquí se ve p95, queries por request y la query más duplicada (candidata a N+1) de cada vista.
+@staff_member_required
+def performance_dashboard(request):
+    context = {
+        **admin.site.each_context(request),
+        'title': 'Rendimiento por vista',
+        'rows': performance_summary(),
+        'enabled': getattr(settings, 'PERFORMANCE_INSTRUMENTATION', False),
+        'window_minutes': WINDOW_SECONDS // 60,
+    }
+    return render(request, 'admin/performance.html', context)
+
+
 # Dashboard para nutricionistas: Placeholder para futura implementación.
 
 @login_required
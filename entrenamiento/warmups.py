@@ -0,0 +1,86 @@
+import threading
+from typing import NamedTuple
+
+from django.conf import settings
+
+from .analytics import get_or_compute
+from .cache_versions import versioned_namespace
+from .models import Warmup
+
+# ====================================================================================================================
+# Catálogo de Calentamientos
+# ====================================================================================================================
+# trainer_dashboard y client_dashboard hacían Warmup.objects.all() y lo filtraban dos veces por tipo: dos queries en cada
+# render de un catálogo que solo cambia cuando un entrenador guarda en update_warmup. Aquí el catálogo se precalcula una
+# vez como snapshot inmutable (tuplas de WarmupItem agrupadas por tipo) y se guarda en dos niveles:
+#   - En memoria del proceso, junto a la versión con la que se construyó.
+#   - En la caché compartida (settings.CACHES) bajo 'warmups:snapshot:v<versión>', para que los demás workers no vuelvan
+#     a consultar la base al enterarse de un cambio.
+# Cada lectura compara la versión local con 'warmups:version' en la caché compartida (una lectura de caché, ninguna query):
+# si coincide se sirve la copia en memoria; si no, se toma la del nuevo snapshot. Las señales de Warmup incrementan la
+# versión al confirmar la transacción, así todos los procesos ven el cambio en su siguiente request.
+#
+# La versión es un espacio de nombres de cache_versions.py (inicial desde el reloj, invalidación al confirmar). Con una
+# caché local al proceso (LocMemCache) la versión caduca sola a los CACHE_VERSION_LOCAL_TTL segundos, así que la copia en
+# memoria de cada worker tampoco vive más que eso.
+# ====================================================================================================================
+
+WARMUP_TTL = getattr(settings, 'WARMUP_CACHE_TTL', 24 * 3600)
+WARMUP_VERSIONS = versioned_namespace('warmups')
+
+
+class WarmupItem(NamedTuple):
+    id: int
+    name: str
+    series_reps: str
+    notes: str
+    video_url: str
+    type: str
+
+
+class WarmupSnapshot(NamedTuple):
+    upper_body: tuple
+    lower_body: tuple
+
+
+_local = None  # (versión, WarmupSnapshot): se reemplaza entero, nunca se modifica
+_lock = threading.Lock()
+
+
+def warmup_version():
+    return WARMUP_VERSIONS.version()
+
+
+def invalidate_warmups():
+    WARMUP_VERSIONS.invalidate()
+
+
+def invalidate_warmups_on_commit():
+    WARMUP_VERSIONS.invalidate_on_commit()
+
+
+def build_snapshot():
+    items = [
+        WarmupItem(*row)
+        for row in Warmup.objects.order_by('pk').values_list('id', 'name', 'series_reps', 'notes', 'video_url', 'type')
+    ]
+    return WarmupSnapshot(
+        upper_body=tuple(item for item in items if item.type == 'superior'),
+        lower_body=tuple(item for item in items if item.type == 'inferior'),
+    )
+
+
+def warmup_catalog():
+    # Snapshot vigente del catálogo: {'upper_body', 'lower_body'} como atributos, listo para las plantillas.
+    global _local
+    version = warmup_version()
+    local = _local
+    if version is not None and local is not None and local[0] == version:
+        return local[1]
+    with _lock:
+        if _local is not None and _local[0] == version:
+            return _local[1]
+        snapshot = get_or_compute(f'warmups:snapshot:v{version}', build_snapshot, WARMUP_TTL)
+        if version is not None:
+            _local = (version, snapshot)
+        return snapshot
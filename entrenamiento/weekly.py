@@ -0,0 +1,99 @@
+import datetime
+from collections import defaultdict
+
+from django.db.models import Avg, Count, F, Q
+from django.db.models.functions import Mod
+from django.utils import timezone
+
+from .models import ExerciseLog, TrainingPlan, Workout
+from .xlsx import Column, XlsxReport
+
+# ====================================================================================================================
+# Reporte Semanal por Conjuntos
+# ====================================================================================================================
+# weekly_reports recorría cada plan activo y, por cada ejercicio, hacía 4 aggregate(Avg) sobre TODOS los logs de la semana
+# (sin filtrar por cliente): O(planes × ejercicios × 5) queries sobre la tabla completa. Ahora una corrida hace tres queries
+# sin importar cuántos planes haya:
+#   1. Los planes activos con workouts en la semana (con entrenador y cliente).
+#   2. Consistencia de todos esos planes: un GROUP BY plan sobre Workout usando los contadores desnormalizados.
+#   3. Promedios por (plan, ejercicio): un GROUP BY sobre los logs de la semana del cliente de cada plan.
+# Los workbooks se arman a partir de esas filas (sin BD), así que pueden construirse en un pool de procesos.
+# ====================================================================================================================
+
+WEEKLY_COLUMNS = [
+    Column('Ejercicio'),
+    Column('Avg Peso (kg)', '0.00'),
+    Column('Avg Reps', '0.0'),
+    Column('Avg RIR', '0.0'),
+    Column('Avg RPE', '0.0'),
+    Column('Consistencia (%)', '0.00'),
+]
+
+
+def previous_week(today=None):
+    today = today or timezone.now().date()
+    start = today - datetime.timedelta(days=today.weekday() + 7)  # Lunes de la semana pasada
+    return start, start + datetime.timedelta(days=6)
+
+
+def weekly_plans(start, end, shard=None):
+    plans = TrainingPlan.objects.filter(
+        status='active', workouts__date__range=[start, end]
+    ).distinct().select_related('trainer', 'client').order_by('pk')
+    if shard:
+        index, total = shard
+        plans = plans.annotate(shard=Mod('pk', total)).filter(shard=index)
+    return plans
+
+
+def weekly_data(start, end, shard=None):
+    plans = {plan.pk: plan for plan in weekly_plans(start, end, shard)}
+    if not plans:
+        return []
+
+    consistency = {
+        row['plan_id']: row
+        for row in Workout.objects.filter(plan_id__in=plans, date__range=[start, end]).values('plan_id').annotate(
+            total=Count('pk'),
+            logged=Count('pk', filter=Q(exercise_count__gt=0, logged_count=F('exercise_count'))),
+        ).order_by()
+    }
+
+    # Límites datetime (y no __date) para que el rango use los índices de fecha.
+    since = timezone.make_aware(datetime.datetime.combine(start, datetime.time.min))
+    until = timezone.make_aware(datetime.datetime.combine(end + datetime.timedelta(days=1), datetime.time.min))
+    averages = defaultdict(list)
+    for row in ExerciseLog.objects.filter(
+        workout_exercise__workout__plan_id__in=plans,
+        client=F('workout_exercise__workout__plan__client'),
+        date_completed__gte=since, date_completed__lt=until,
+    ).values('workout_exercise__workout__plan_id', 'workout_exercise__exercise__name').annotate(
+        avg_weight=Avg('weight_lifted_kg'), avg_reps=Avg('reps_completed'),
+        avg_rir=Avg('rir_actual'), avg_rpe=Avg('rpe_actual'),
+    ).order_by('workout_exercise__workout__plan_id', 'workout_exercise__exercise__name'):
+        averages[row['workout_exercise__workout__plan_id']].append([
+            row['workout_exercise__exercise__name'], row['avg_weight'], row['avg_reps'], row['avg_rir'], row['avg_rpe'],
+        ])
+
+    reports = []
+    for plan_id, plan in plans.items():
+        counts = consistency.get(plan_id, {'total': 0, 'logged': 0})
+        value = round(counts['logged'] / counts['total'] * 100, 2) if counts['total'] else 0
+        reports.append({
+            'plan_id': plan_id,
+            'plan_name': plan.name,
+            'client': plan.client.username,
+            'trainer_email': plan.trainer.email,
+            'consistency': value,
+            'rows': [row + [value] for row in averages.get(plan_id, [])],
+        })
+    return reports
+
+
+def build_weekly_workbook(report):
+    # Solo datos planos (picklable): se ejecuta igual en el proceso principal o en un worker del pool.
+    workbook = XlsxReport()
+    sheet = workbook.add_sheet(f"Reporte Semanal - {report['plan_name']}", WEEKLY_COLUMNS)
+    for row in report['rows']:
+        sheet.append(row)
+    return report['plan_id'], workbook.to_bytes()
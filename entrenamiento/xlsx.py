@@ -0,0 +1,150 @@
+import pickle
+import tempfile
+from io import BytesIO
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, NamedStyle, PatternFill, Side
+from openpyxl.utils import get_column_letter
+
+# ====================================================================================================================
+# Constructor de Reportes Excel en Streaming
+# ====================================================================================================================
+# El reporte diario creaba Font/Border/Alignment nuevos por celda y luego releía todas las celdas de cada columna para
+# ajustar anchos; weekly_reports duplicaba parte de eso. Con miles de filas era lento y mantenía el workbook completo en
+# memoria. Este módulo lo comparten ambos reportes:
+#   - Workbook en modo write-only: las filas se serializan a XML al escribirlas, sin objetos Cell vivos.
+#   - NamedStyle compartidos: un estilo registrado una vez por combinación (base, relleno, formato numérico) y referenciado
+#     por nombre, en vez de un objeto de estilo por celda.
+#   - Anchos calculados a medida que llegan las filas. Como en write-only los anchos (<cols>) van antes de los datos en el
+#     XML, las filas se vuelcan primero a un archivo temporal (en memoria hasta SPOOL_LIMIT) y se escriben al cerrar la hoja.
+# ====================================================================================================================
+
+SPOOL_LIMIT = 4 * 1024 * 1024
+MAX_WIDTH = 60
+
+THIN = Side(style='thin')
+BORDER = Border(left=THIN, right=THIN, top=THIN, bottom=THIN)
+
+FILLS = {
+    'title': '4F81BD',
+    'header': '17375E',
+    'completed': 'C6EFCE',     # Verde claro
+    'half': 'FFEB9C',          # Amarillo claro
+    'not_completed': 'FFC7CE',  # Rojo claro
+}
+
+
+def _solid(color):
+    return PatternFill(start_color=color, end_color=color, fill_type='solid')
+
+
+class Column:
+    def __init__(self, header, number_format=None, min_width=8):
+        self.header = header
+        self.number_format = number_format
+        self.min_width = min_width
+
+
+class ReportSheet:
+    def __init__(self, report, title, columns, banner=None):
+        self.report = report
+        self.ws = report.workbook.create_sheet(title=title[:31])  # Límite de Excel para el nombre de la hoja
+        self.columns = columns
+        self.banner = banner
+        self.widths = [max(column.min_width, len(column.header)) for column in columns]
+        self.spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_LIMIT)
+        self.rows = 0
+
+    def append(self, values, fill=None, links=None):
+        # links: {índice de columna: (url, texto)} para celdas con hipervínculo.
+        for index, value in enumerate(values):
+            text = links[index][1] if links and index in links else value
+            if text is not None:
+                self.widths[index] = max(self.widths[index], len(str(text)))
+        pickle.dump((values, fill, links), self.spool, pickle.HIGHEST_PROTOCOL)
+        self.rows += 1
+
+    def _cell(self, value, style):
+        cell = WriteOnlyCell(self.ws, value)
+        cell.style = style
+        return cell
+
+    def close(self):
+        ws, report = self.ws, self.report
+        for index, width in enumerate(self.widths, start=1):
+            ws.column_dimensions[get_column_letter(index)].width = min((width + 2) * 1.2, MAX_WIDTH)
+
+        # Igual que los anchos, el panel congelado va en el encabezado XML: se fija antes del primer append.
+        header_row = 3 if self.banner else 1
+        ws.freeze_panes = f'A{header_row + 1}'
+        if self.banner:
+            ws.merged_cells.add(f'A1:{get_column_letter(len(self.columns))}1')
+            ws.append([self._cell(self.banner, report.style('title'))])
+            ws.append([])
+        ws.append([self._cell(column.header, report.style('header')) for column in self.columns])
+
+        self.spool.seek(0)
+        for _ in range(self.rows):
+            values, fill, links = pickle.load(self.spool)
+            row = []
+            for index, (value, column) in enumerate(zip(values, self.columns)):
+                if links and index in links:
+                    url, text = links[index]
+                    cell = self._cell(text, report.style('link', fill))
+                    cell.hyperlink = url
+                else:
+                    cell = self._cell(value, report.style('cell', fill, column.number_format))
+                row.append(cell)
+            ws.append(row)
+        self.spool.close()
+
+
+class XlsxReport:
+    def __init__(self):
+        self.workbook = Workbook(write_only=True)
+        self.sheets = []
+        self._styles = set()
+
+    def style(self, base, fill=None, number_format=None):
+        # Registra (una sola vez por workbook) y devuelve el nombre del NamedStyle para esta combinación.
+        name = ':'.join(part for part in (base, fill, number_format) if part)
+        if name not in self._styles:
+            style = NamedStyle(name=name)
+            if base == 'title':
+                style.font = Font(bold=True, size=14, color='FFFFFF')
+                style.fill = _solid(FILLS['title'])
+                style.alignment = Alignment(horizontal='center', vertical='center')
+            elif base == 'header':
+                style.font = Font(bold=True, color='FFFFFF')
+                style.fill = _solid(FILLS['header'])
+                style.alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
+                style.border = BORDER
+            else:
+                style.border = BORDER
+                style.alignment = Alignment(horizontal='left', vertical='center', wrap_text=True)
+                if base == 'link':
+                    style.font = Font(underline='single', color='0000FF')
+                if fill:
+                    style.fill = _solid(FILLS[fill])
+                if number_format:
+                    style.number_format = number_format
+            self.workbook.add_named_style(style)
+            self._styles.add(name)
+        return name
+
+    def add_sheet(self, title, columns, banner=None):
+        sheet = ReportSheet(self, title, columns, banner)
+        self.sheets.append(sheet)
+        return sheet
+
+    def save(self, target):
+        # target: ruta o archivo binario. Para exportaciones grandes conviene un archivo temporal en vez de to_bytes().
+        for sheet in self.sheets:
+            sheet.close()
+        self.workbook.save(target)
+
+    def to_bytes(self):
+        output = BytesIO()
+        self.save(output)
+        return output.getvalue()
@@ -0,0 +1,72 @@
+// Autocompletado del catálogo de ejercicios (ver entrenamiento/catalog.py). Se delega en document para que funcione también
+// en las filas que el editor agrega dinámicamente. Solo se envía el id del input oculto; escribir sin elegir lo vacía.
+(function () {
+    if (window.exerciseAutocomplete) return;
+    window.exerciseAutocomplete = true;
+
+    const DEBOUNCE_MS = 200;
+    const timers = new WeakMap();
+
+    function search(box) {
+        const params = new URLSearchParams({ q: box.querySelector('[data-exercise-search]').value });
+        box.querySelectorAll('[data-filter]').forEach((select) => {
+            if (select.value) params.set(select.dataset.filter, select.value);
+        });
+        fetch(`${box.dataset.url}?${params}`, { headers: { 'Accept': 'application/json' } })
+            .then((response) => response.ok ? response.json() : { results: [] })
+            .then((data) => render(box, data.results));
+    }
+
+    function render(box, results) {
+        const list = box.querySelector('[data-exercise-results]');
+        list.replaceChildren(...results.map((exercise) => {
+            const item = document.createElement('button');
+            item.type = 'button';
+            item.className = 'list-group-item list-group-item-action py-1';
+            item.dataset.id = exercise.id;
+            item.dataset.name = exercise.name;
+            item.textContent = exercise.name;
+            const detail = [exercise.muscle_group, exercise.equipment].filter(Boolean).join(' · ');
+            if (detail) {
+                const small = document.createElement('small');
+                small.className = 'text-muted ms-2';
+                small.textContent = detail;
+                item.appendChild(small);
+            }
+            return item;
+        }));
+        list.classList.toggle('d-none', results.length === 0);
+    }
+
+    function schedule(box) {
+        clearTimeout(timers.get(box));
+        timers.set(box, setTimeout(() => search(box), DEBOUNCE_MS));
+    }
+
+    document.addEventListener('input', (event) => {
+        if (!event.target.matches('[data-exercise-search]')) return;
+        const box = event.target.closest('.exercise-autocomplete');
+        box.querySelector('[data-exercise-id]').value = '';
+        schedule(box);
+    });
+
+    document.addEventListener('change', (event) => {
+        if (event.target.matches('.exercise-autocomplete [data-filter]')) schedule(event.target.closest('.exercise-autocomplete'));
+    });
+
+    document.addEventListener('focusin', (event) => {
+        if (event.target.matches('[data-exercise-search]')) schedule(event.target.closest('.exercise-autocomplete'));
+    });
+
+    document.addEventListener('click', (event) => {
+        const item = event.target.closest('[data-exercise-results] [data-id]');
+        document.querySelectorAll('[data-exercise-results]').forEach((list) => {
+            if (!list.contains(event.target)) list.classList.add('d-none');
+        });
+        if (!item) return;
+        const box = item.closest('.exercise-autocomplete');
+        box.querySelector('[data-exercise-id]').value = item.dataset.id;
+        box.querySelector('[data-exercise-search]').value = item.dataset.name;
+        item.parentElement.classList.add('d-none');
+    });
+})();